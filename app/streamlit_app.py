@@ -2,6 +2,8 @@ import streamlit as st
 import pandas as pd
 import sys
 from pathlib import Path
+from datetime import date, datetime
+from urllib.parse import quote
 
 # Add parent directory to path for imports
 sys.path.append(str(Path(__file__).parent.parent))
@@ -9,6 +11,12 @@ sys.path.append(str(Path(__file__).parent.parent))
 from core.pipeline import Pipeline
 from core.config import Config
 from core.schema import ExtractionResult
+from core.tracing import trace_spans
+from core.circuit import breaker
+from core.analytics import AnalyticsStore
+from core.storage import iter_chunks
+from core.render import FORMATS
+from core.usage import budget_used
 
 st.set_page_config(page_title="FollowUpSync", page_icon="🚀", layout="wide")
 
@@ -109,42 +117,106 @@ st.markdown('''
 ''', unsafe_allow_html=True)
 st.markdown('<p class="sub-header">Turn meeting notes into action items with smart scheduling</p>', unsafe_allow_html=True)
 
+def show_circuit(service, base_url):
+    """Availability of a service's MCP server, as seen by its circuit breaker"""
+    state = breaker(service, base_url).snapshot()
+    if state['state'] == 'open':
+        st.error(f"🔌 MCP server unavailable, retrying in {state['retry_in_seconds']:.0f}s")
+        st.caption(state['last_error'])
+    elif state['state'] == 'half_open':
+        st.warning("🩺 MCP server recovering")
+    else:
+        st.caption("🟢 MCP server reachable")
+
+def describe_source(source):
+    if not source:
+        return ""
+    if not source.grounded:
+        return "⚠️ not in transcript"
+    if not source.line:
+        return "approved"
+    return f"L{source.line}" + (f" ({source.speaker})" if source.speaker else "")
+
+def describe_status(status):
+    """Notion/Jira status of a delivered item, as last synced"""
+    if not status:
+        return ""
+    states = [f"{service.title()}: {status[service]}" for service in ('notion', 'jira') if status.get(service)]
+    return ("✅ " if status['done'] else "") + ", ".join(states)
+
+def describe_delivery(operations):
+    """Summarize the create/update/delete operations of one integration"""
+    if not operations:
+        return "Already up to date"
+    
+    parts = []
+    for op, label in (('create', 'created'), ('update', 'updated'), ('delete', 'deleted')):
+        ops = [r for r in operations if r.get('op') == op]
+        if ops:
+            success_count = sum(1 for r in ops if not r.get('error'))
+            parts.append(f"{success_count}/{len(ops)} {label}")
+    return ", ".join(parts)
+
 # Initialize session state
 if 'extraction_result' not in st.session_state:
     st.session_state.extraction_result = None
 if 'artifacts_saved' not in st.session_state:
     st.session_state.artifacts_saved = False
+if 'profiles' not in st.session_state:
+    # step (extract, deliver) -> run ID of its most recent profile
+    st.session_state.profiles = {}
+
+# Team selection, for deployments shared by several tenants
+tenant = st.selectbox("Team", Config.TENANTS) if Config.TENANTS else None
 
 # Mode selection
 mode = st.radio("Mode", ["AWS", "Local"], index=0)
 st.caption("💡 AWS mode: Bedrock Nova AI with smart date parsing | Local mode: Rule-based fallback")
-Config.MODE = "local" if mode == "Local" else "aws"
+# Per session: the global Config is shared by every browser session of this server
+config = Config.for_tenant(tenant).override(MODE="local" if mode == "Local" else "aws")
 
 # Initialize pipeline
-pipeline = Pipeline()
+pipeline = Pipeline(config)
 
 # Section 1: Input
 st.subheader("1️⃣ Input")
 tab1, tab2 = st.tabs(["Paste text", "Upload file (.txt)"])
 text_input = ""
-file_bytes = None
+uploaded = None
 
 with tab1:
     text_input = st.text_area("Paste transcript text", height=200)
 
 with tab2:
     uploaded = st.file_uploader("Upload a .txt transcript", type=["txt"])
-    if uploaded:
-        file_bytes = uploaded.read().decode("utf-8")
+
+incremental = False
+if st.session_state.extraction_result:
+    incremental = st.checkbox(
+        f"♻️ Re-run incrementally (update run {st.session_state.extraction_result.run_id}, re-extract only edited sections)"
+    )
+
+# Unticked, PROFILE_SAMPLE_RATE still profiles a share of runs
+profile_run = st.checkbox("🔬 Profile this run", help="Save a flamegraph of processing and delivery with the run's outputs")
 
 if st.button("🔄 Process", type="primary"):
-    content = text_input if text_input else (file_bytes or "")
-    if not content.strip():
+    if not text_input.strip() and not (uploaded and uploaded.size):
         st.warning("Please paste text or upload a .txt file.")
     else:
         with st.spinner("Processing transcript..."):
             try:
-                result = pipeline.process_transcript(content)
+                previous_run_id = st.session_state.extraction_result.run_id if incremental else None
+                if text_input.strip():
+                    result = pipeline.process_transcript(text_input, run_id=previous_run_id, incremental=incremental,
+                                                         profile=profile_run or None)
+                else:
+                    # Streamed to storage in chunks rather than decoded into one string
+                    uploaded.seek(0)
+                    result = pipeline.process_stream(iter_chunks(uploaded), run_id=previous_run_id, incremental=incremental,
+                                                     profile=profile_run or None)
+                if incremental:
+                    stats = pipeline.incremental.last_stats
+                    st.info(f"♻️ Reused {stats['reused']}/{stats['segments']} sections, re-extracted {stats['extracted']}")
                 st.session_state.extraction_result = result
                 st.session_state.artifacts_saved = False
                 st.success(f"✅ Processed! Run ID: {result.run_id}")
@@ -166,7 +238,8 @@ if st.session_state.extraction_result:
                 decisions_data.append({
                     "Text": decision.text,
                     "Owners": ", ".join(decision.owners) if decision.owners else "",
-                    "Rationale": decision.rationale or ""
+                    "Rationale": decision.rationale or "",
+                    "Source": describe_source(decision.source)
                 })
             st.dataframe(pd.DataFrame(decisions_data), use_container_width=True)
         else:
@@ -175,13 +248,16 @@ if st.session_state.extraction_result:
     with col2:
         st.write("**Action Items**")
         if result.action_items:
+            statuses = pipeline.status.run_status(result.run_id)
             actions_data = []
             for i, item in enumerate(result.action_items):
                 actions_data.append({
                     "Title": item.title,
                     "Owner": item.owner or "Unassigned",
                     "Due Date": str(item.due_date) if item.due_date else "",
-                    "Priority": item.priority or "Medium"
+                    "Priority": item.priority or "Medium",
+                    "Source": describe_source(item.source),
+                    "Status": describe_status(statuses.get(item.id))
                 })
             st.dataframe(pd.DataFrame(actions_data), use_container_width=True)
         else:
@@ -195,12 +271,50 @@ if st.session_state.extraction_result:
                 risks_data.append({
                     "Text": risk.text,
                     "Severity": risk.severity or "Medium",
-                    "Mitigation": risk.mitigation or ""
+                    "Mitigation": risk.mitigation or "",
+                    "Source": describe_source(risk.source)
                 })
             st.dataframe(pd.DataFrame(risks_data), use_container_width=True)
         else:
             st.info("No risks found")
     
+    # What the extraction cost (Bedrock only)
+    if result.usage:
+        usage = result.usage
+        if usage.downgraded_from:
+            st.warning(f"💸 Budget reached: extracted with {usage.model_id} instead of {usage.downgraded_from}")
+        if usage.calls:
+            st.caption(f"🪙 {usage.input_tokens:,} input / {usage.output_tokens:,} output tokens "
+                       f"({usage.cache_read_tokens:,} cached) · {usage.latency_ms / 1000:.1f}s in Bedrock · ${usage.cost_usd:.4f}")
+    
+    # Items the grounding check could not find in the transcript
+    flagged = [item for item in result.action_items if item.source and item.source.score < config.GROUNDING_MIN_SCORE]
+    if flagged:
+        st.warning(f"🔎 {len(flagged)} action item(s) could not be found in the transcript and are not sent to Notion or Jira unless approved")
+        for item in flagged:
+            item.source.grounded = st.checkbox(f"Send anyway: {item.title}", value=item.source.grounded, key=f"ground-{item.id}")
+    
+    located = [
+        (f"{label}: {text}", item.source) for label, kind, field in
+        (("Decision", "decisions", "text"), ("Action", "action_items", "title"), ("Risk", "risks", "text"))
+        for item in getattr(result, kind) for text in [getattr(item, field)] if item.source and item.source.line
+    ]
+    if located:
+        with st.expander("🔎 Sources"):
+            choice = st.selectbox("Item", range(len(located)), format_func=lambda i: located[i][0])
+            source = located[choice][1]
+            try:
+                transcript_lines = pipeline.storage.read_input(result.run_id).split("\n")
+            except Exception as e:
+                st.info(f"Transcript not available: {e}")
+            else:
+                first = max(1, source.line - 3)
+                excerpt = transcript_lines[first - 1:source.line + 3]
+                st.caption(f"Line {source.line}" + (f" · {source.speaker}" if source.speaker else "") + f" · match {source.score:.0%}")
+                st.code("\n".join(
+                    f"{'▶' if n == source.line else ' '} {n:>5}  {line}" for n, line in enumerate(excerpt, first)
+                ), language=None)
+    
     # Section 3: Deliver
     st.subheader("3️⃣ Deliver")
     
@@ -210,15 +324,18 @@ if st.session_state.extraction_result:
         st.write("**Integrations**")
         
         # Slack integration
-        send_slack = st.checkbox("Send to Slack", disabled=not Config.has_slack_config())
+        send_slack = st.checkbox("Send to Slack", disabled=not config.has_slack_config())
         if send_slack:
-            slack_channel = st.text_input("Slack Channel", value=Config.SLACK_DEFAULT_CHANNEL)
+            slack_channel = st.text_input("Slack Channel", value=config.SLACK_DEFAULT_CHANNEL)
         
         # Notion integration
-        send_notion = st.checkbox("Create Notion tasks", disabled=not Config.has_notion_config())
+        send_notion = st.checkbox("Create Notion tasks", disabled=not config.has_notion_config())
         
         # Jira integration
-        send_jira = st.checkbox("Create Jira issues", disabled=not Config.has_jira_config())
+        send_jira = st.checkbox("Create Jira issues", disabled=not config.has_jira_config())
+        
+        # Digest mode: queue the run and deliver it with the others bound for the same place
+        add_to_digest = config.DIGEST_ENABLED and st.checkbox("📬 Add to digest instead of sending now", value=True)
         
         if st.button("📤 Send", type="primary"):
             integrations = {}
@@ -229,19 +346,24 @@ if st.session_state.extraction_result:
             if send_jira:
                 integrations['jira'] = True
             
-            if integrations:
+            if integrations and add_to_digest:
+                queued = pipeline.queue_digest(result, integrations)
+                if queued.get('delivery') is not None:
+                    st.success(f"✅ Digest delivered ({queued['runs']} meetings)")
+                else:
+                    st.success(f"📬 Queued for digest {queued['digest']} ({queued['runs']} meeting(s) so far)")
+            elif integrations:
                 with st.spinner("Sending to integrations..."):
                     try:
-                        delivery_results = pipeline.deliver_to_integrations(result, integrations)
+                        delivery_results = pipeline.deliver_to_integrations(result, integrations, profile=profile_run or None)
                         st.success("✅ Sent to integrations!")
                         
                         # Show results
                         for service, service_result in delivery_results.items():
                             if isinstance(service_result, dict) and service_result.get('ok'):
-                                st.success(f"✅ {service.title()}: Success")
+                                st.success(f"✅ {service.title()}: {describe_delivery(service_result.get('items', []))}")
                             elif isinstance(service_result, list):
-                                success_count = sum(1 for r in service_result if not r.get('error'))
-                                st.success(f"✅ {service.title()}: {success_count}/{len(service_result)} items created")
+                                st.success(f"✅ {service.title()}: {describe_delivery(service_result)}")
                             else:
                                 st.error(f"❌ {service.title()}: {service_result.get('error', 'Unknown error')}")
                     except Exception as e:
@@ -260,7 +382,7 @@ if st.session_state.extraction_result:
                     st.success("✅ Artifacts generated!")
                     
                     # Show download links
-                    if Config.is_aws_mode():
+                    if config.is_aws_mode():
                         # Get content from S3 for download
                         summary_content = pipeline.storage.get_file_content(result.run_id, "Summary.md")
                         json_content = pipeline.storage.get_file_content(result.run_id, "ActionItems.json")
@@ -283,33 +405,157 @@ if st.session_state.extraction_result:
                         mime="application/json"
                     )
                     
+                    # Other rendered formats (ARTIFACT_FORMATS)
+                    for fmt, (filename, key) in FORMATS.items():
+                        if fmt == "markdown" or key not in artifacts:
+                            continue
+                        if config.is_aws_mode():
+                            content = pipeline.storage.get_file_content(result.run_id, filename)
+                        else:
+                            content = Path(artifacts[key]).read_text()
+                        stem, extension = filename.rsplit(".", 1)
+                        st.download_button(f"⬇️ Download {filename}", data=content, file_name=f"{stem}_{result.run_id}.{extension}")
+                    
                 except Exception as e:
                     st.error(f"Error generating artifacts: {str(e)}")
     
+    # Timing of the most recent process/deliver call
+    if pipeline.last_trace_id:
+        st.session_state.last_trace_id = pipeline.last_trace_id
+    if st.session_state.get('last_trace_id'):
+        with st.expander("⏱️ Timing (last operation)"):
+            spans = trace_spans(st.session_state.last_trace_id)
+            if spans:
+                st.dataframe(pd.DataFrame(spans), use_container_width=True)
+            else:
+                st.info("No timing data recorded yet")
+    
+    # Profiles of the most recent process/deliver calls, stored with their run's outputs
+    for step in pipeline.last_profiles:
+        st.session_state.profiles[step] = result.run_id
+    if st.session_state.profiles:
+        with st.expander("🔬 Profiles"):
+            for step, run_id in st.session_state.profiles.items():
+                st.write(f"**{step.title()}** (run {run_id})")
+                speedscope_file = f"Profile-{step}.speedscope.json"
+                if config.is_aws_mode():
+                    profile_url = pipeline.storage.get_download_url(run_id, speedscope_file)
+                    st.markdown(f"[Open in speedscope](https://www.speedscope.app/#profileURL={quote(profile_url, safe='')})")
+                else:
+                    st.markdown("Download the profile and drop it on [speedscope](https://www.speedscope.app)")
+                for filename in (speedscope_file, f"Profile-{step}.collapsed.txt"):
+                    st.download_button(f"⬇️ Download {filename}", data=pipeline.storage.get_file_content(run_id, filename),
+                                       file_name=f"{run_id}_{filename}", key=f"profile-{step}-{filename}")
+    
     # Section 4: Configuration Status
     with st.expander("🔧 Configuration Status"):
         col1, col2, col3 = st.columns(3)
         
         with col1:
             st.write("**Slack**")
-            if Config.has_slack_config():
+            if config.has_slack_config():
                 st.success("✅ Configured")
             else:
                 st.error("❌ Missing SLACK_BOT_TOKEN")
         
         with col2:
             st.write("**Notion**")
-            if Config.has_notion_config():
+            if config.has_notion_config():
                 st.success("✅ Configured")
             else:
                 st.error("❌ Missing NOTION_TOKEN or NOTION_DATABASE_ID")
         
         with col3:
             st.write("**Jira**")
-            if Config.has_jira_config():
+            if config.has_jira_config():
                 st.success("✅ Configured")
             else:
                 st.error("❌ Missing Jira configuration")
+        
+        for column, service in ((col1, 'slack'), (col2, 'notion'), (col3, 'jira')):
+            with column:
+                show_circuit(service, pipeline.mcp_client.base_urls[service])
+        
+        pending = pipeline.outbox.pending()
+        if pending:
+            queued = ", ".join(f"{service.title()}: {count}" for service, count in pending.items())
+            st.warning(f"📮 Deliveries waiting in the outbox ({queued})")
+            if st.button("🔁 Retry queued deliveries"):
+                with st.spinner("Retrying..."):
+                    replayed = pipeline.replay_outbox()
+                st.info(f"Retried {len(replayed)} run(s); {sum(pipeline.outbox.pending().values())} still queued")
+        
+        overdue_items = pipeline.status.overdue()
+        if overdue_items:
+            st.warning(f"⏰ {len(overdue_items)} delivered item(s) still open past their due date")
+            st.dataframe(pd.DataFrame(overdue_items)[["due_date", "owner", "title", "service", "status"]], use_container_width=True)
+        if config.REMINDERS_ENABLED:
+            next_fire_at = pipeline.reminders.next_fire_at()
+            if next_fire_at:
+                st.caption(f"⏰ {pipeline.reminders.pending()} reminder(s) scheduled, next at "
+                           f"{datetime.fromtimestamp(next_fire_at):%Y-%m-%d %H:%M}")
+        if st.button("🔄 Sync status from Notion/Jira"):
+            with st.spinner("Syncing..."):
+                synced = pipeline.sync_status(force=True)
+            for service, outcome in synced.items():
+                if outcome.get('error'):
+                    st.caption(f"{service.title()}: {outcome['error']}")
+                else:
+                    st.caption(f"{service.title()}: {outcome['changes']} change(s), {outcome['updated']} FollowUpSync item(s) updated")
+        
+        digests = pipeline.digests.pending()
+        if digests:
+            st.info(f"📬 {sum(digests.values())} run(s) waiting in {len(digests)} digest(s)")
+            if st.button("📬 Send digests now"):
+                with st.spinner("Sending digests..."):
+                    delivered = pipeline.flush_digests(force=True)
+                st.success(f"Delivered {len(delivered)} digest(s)")
+
+# Section 5: Analytics across runs
+if config.ANALYTICS_ENABLED:
+    st.subheader("📈 Analytics")
+    st.caption("Across every run with saved artifacts")
+    analytics = AnalyticsStore(config.ANALYTICS_DIR)
+    overdue_tab, decisions_tab, risks_tab = st.tabs(["Overdue by owner", "Decisions per week", "Risk severity"])
+    
+    with overdue_tab:
+        overdue = analytics.overdue_by_owner()
+        if overdue.empty:
+            st.info("No overdue action items")
+        else:
+            st.bar_chart(overdue, x="owner", y="overdue")
+            st.dataframe(overdue, use_container_width=True)
+    
+    with decisions_tab:
+        decisions_per_week = analytics.decisions_per_week()
+        if decisions_per_week.empty:
+            st.info("No decisions exported yet")
+        else:
+            st.line_chart(decisions_per_week, x="week", y="decisions")
+    
+    with risks_tab:
+        severity = analytics.risk_severity_trend()
+        if severity.empty:
+            st.info("No risks exported yet")
+        else:
+            st.bar_chart(severity)
+
+# Section 6: Bedrock usage per day and team
+usage_by_day = pd.DataFrame(pipeline.usage.daily(30))
+if not usage_by_day.empty or config.USAGE_DAILY_BUDGET_USD or config.USAGE_MONTHLY_BUDGET_USD:
+    st.subheader("💰 Bedrock Usage")
+    today = date.today()
+    spent_col, month_col = st.columns(2)
+    spent_col.metric("Today", f"${pipeline.usage.spent(config.TENANT, today):.4f}",
+                     help=f"Budget ${config.USAGE_DAILY_BUDGET_USD:.2f}" if config.USAGE_DAILY_BUDGET_USD else "No daily budget")
+    month_col.metric("This month", f"${pipeline.usage.spent(config.TENANT, today.replace(day=1)):.4f}",
+                     help=f"Budget ${config.USAGE_MONTHLY_BUDGET_USD:.2f}" if config.USAGE_MONTHLY_BUDGET_USD else "No monthly budget")
+    if config.USAGE_DAILY_BUDGET_USD or config.USAGE_MONTHLY_BUDGET_USD:
+        used = budget_used(pipeline.usage, config, today)
+        st.progress(min(used, 1.0), text=f"{used:.0%} of budget used")
+    if not usage_by_day.empty:
+        st.bar_chart(usage_by_day, x="day", y="cost_usd", color="tenant" if Config.TENANTS else None)
+        st.dataframe(usage_by_day, use_container_width=True)
 
 # Sidebar with sample data
 with st.sidebar:
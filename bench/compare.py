@@ -0,0 +1,56 @@
+"""Compare two benchmark result files and flag regressions.
+
+    python -m bench.compare bench/results/<baseline>.json bench/results/<candidate>.json --threshold 10
+
+Exits with status 1 when any metric regressed by more than the threshold (percent).
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# Metrics where a larger value is an improvement; everything else is treated as a cost
+HIGHER_IS_BETTER_SUFFIXES = ("_per_s",)
+# Metrics that describe the scenario rather than measure it
+IGNORED_SUFFIXES = ("_count", "transcript_chars", "items", "items_per_transcript")
+
+def compare(baseline: dict, candidate: dict, threshold: float):
+    rows = []
+    regressions = []
+    for name, scenario in candidate["scenarios"].items():
+        old = baseline["scenarios"].get(name)
+        if not old:
+            continue
+        for metric, new_value in scenario["metrics"].items():
+            old_value = old["metrics"].get(metric)
+            if metric.endswith(IGNORED_SUFFIXES) or not old_value or not isinstance(new_value, (int, float)):
+                continue
+            change = (new_value - old_value) / old_value * 100
+            worse = -change if metric.endswith(HIGHER_IS_BETTER_SUFFIXES) else change
+            flag = "REGRESSION" if worse > threshold else ("improved" if worse < -threshold else "")
+            rows.append((name, metric, old_value, new_value, change, flag))
+            if flag == "REGRESSION":
+                regressions.append((name, metric))
+    return rows, regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Regression threshold in percent")
+    args = parser.parse_args()
+
+    baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+    candidate = json.loads(Path(args.candidate).read_text(encoding="utf-8"))
+    rows, regressions = compare(baseline, candidate, args.threshold)
+
+    print(f"{baseline['commit']} -> {candidate['commit']}")
+    for name, metric, old_value, new_value, change, flag in rows:
+        print(f"{name:28} {metric:26} {old_value:>14} {new_value:>14} {change:+8.1f}% {flag}")
+
+    if regressions:
+        print(f"\n{len(regressions)} metric(s) regressed by more than {args.threshold}%")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+"""Extraction accuracy and latency of each configuration over a labeled corpus.
+
+    python -m bench.evaluate                            # every configuration that can run
+    python -m bench.evaluate --config local --config nova-micro
+    python -m bench.evaluate --record --config nova-lite   # call Bedrock and save the responses
+    python -m bench.evaluate --min-f1 0.8               # fastest configuration scoring >= 0.8
+
+Each case in bench/corpus/ holds a transcript, the date of the meeting and the expected
+decisions, action items (with owner and due date) and risks. Extracted items are matched to
+expected ones by fuzzy text similarity and scored as precision/recall/F1; matched action items
+are also checked for owner and due date, resolved against the meeting's date.
+
+Bedrock configurations replay responses recorded in bench/recordings/<config>/<case>.json, so
+an evaluation costs no model calls. A recording is tied to the exact request body: after a
+change to the system prompt it is reported as stale until recorded again with --record.
+Recorded latency and token usage are reported alongside the time spent parsing the response.
+"""
+import argparse
+import hashlib
+import json
+import re
+import sys
+import time
+from datetime import datetime
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from core.config import Config
+from core.extract import Extractor
+from core.schema import ExtractionResult
+
+CORPUS_DIR = Path(__file__).resolve().parent / "corpus"
+RECORDINGS_DIR = Path(__file__).resolve().parent / "recordings"
+
+# Settings applied on top of Config for each configuration
+CONFIGS: Dict[str, Dict[str, Any]] = {
+    "local": {"MODE": "local"},
+    "nova-micro": {"MODE": "aws", "BEDROCK_MODEL_ID": "amazon.nova-micro-v1:0"},
+    "nova-lite": {"MODE": "aws", "BEDROCK_MODEL_ID": "amazon.nova-lite-v1:0"},
+    "claude-haiku": {"MODE": "aws", "BEDROCK_MODEL_ID": "anthropic.claude-3-haiku-20240307-v1:0"},
+}
+
+# Similarity at which an extracted item counts as the expected one
+MATCH_THRESHOLD = 0.6
+
+KINDS = {"decisions": "text", "action_items": "title", "risks": "text"}
+
+STOPWORDS = {"a", "an", "the", "to", "of", "for", "and", "with", "on", "in", "by", "we", "will", "is", "be"}
+
+class StaleRecording(Exception):
+    """Raised when a configuration has no recording for the request it would send"""
+
+def request_digest(body: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(body, sort_keys=True).encode("utf-8")).hexdigest()
+
+class ReplayPool:
+    """Stands in for BedrockPool, answering with the response recorded for one case"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.latency_ms = 0.0
+        self.usage: Dict[str, int] = {}
+
+    def invoke(self, body: Dict[str, Any], model_ids: Optional[Dict[str, str]] = None) -> Tuple[Dict[str, Any], str]:
+        if not self.path.exists():
+            raise StaleRecording(f"no recording at {self.path}")
+        recording = json.loads(self.path.read_text(encoding="utf-8"))
+        if recording["request_sha256"] != request_digest(body):
+            raise StaleRecording(f"{self.path} was recorded for a different request")
+        self.latency_ms = recording["latency_ms"]
+        self.usage = _usage(recording["response"])
+        return recording["response"], recording.get("region", "replay")
+
+class RecordingPool:
+    """Calls Bedrock through the real pool and saves the response for replay"""
+
+    def __init__(self, pool, path: Path):
+        self.pool = pool
+        self.path = path
+        self.latency_ms = 0.0
+        self.usage: Dict[str, int] = {}
+
+    def invoke(self, body: Dict[str, Any], model_ids: Optional[Dict[str, str]] = None) -> Tuple[Dict[str, Any], str]:
+        start = time.perf_counter()
+        response, region = self.pool.invoke(body, model_ids=model_ids)
+        self.latency_ms = round((time.perf_counter() - start) * 1000, 1)
+        self.usage = _usage(response)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps({
+            "request_sha256": request_digest(body),
+            "recorded_at": datetime.now().isoformat(timespec="seconds"),
+            "region": region,
+            "latency_ms": self.latency_ms,
+            "response": response,
+        }, indent=2), encoding="utf-8")
+        return response, region
+
+def _usage(response: Dict[str, Any]) -> Dict[str, int]:
+    usage = response.get("usage", {})
+    return {
+        "input_tokens": usage.get("inputTokens", usage.get("input_tokens", 0)),
+        "output_tokens": usage.get("outputTokens", usage.get("output_tokens", 0)),
+    }
+
+def load_corpus(directory: Path = CORPUS_DIR) -> Dict[str, Dict[str, Any]]:
+    return {path.stem: json.loads(path.read_text(encoding="utf-8")) for path in sorted(directory.glob("*.json"))}
+
+# Scoring
+
+def _tokens(text: str) -> List[str]:
+    return [t for t in re.findall(r"[a-z0-9/-]+", (text or "").lower()) if t not in STOPWORDS]
+
+def similarity(expected: str, actual: str) -> float:
+    """How well `actual` states `expected`, from 0 to 1.
+
+    The larger of the character-level ratio and the share of the expected words that appear in
+    `actual`, so a whole transcript line still matches the short item it contains.
+    """
+    expected_tokens, actual_tokens = _tokens(expected), _tokens(actual)
+    if not expected_tokens or not actual_tokens:
+        return 0.0
+    ratio = SequenceMatcher(None, " ".join(expected_tokens), " ".join(actual_tokens)).ratio()
+    coverage = len(set(expected_tokens) & set(actual_tokens)) / len(set(expected_tokens))
+    # Long lines mentioning the same words as a short item should not win on coverage alone
+    if len(actual_tokens) > 3 * len(expected_tokens):
+        coverage *= 0.8
+    return max(ratio, coverage)
+
+def match(expected: List[str], actual: List[str]) -> List[Tuple[int, int]]:
+    """One-to-one (expected index, actual index) pairs, best matches first"""
+    candidates = sorted(
+        ((similarity(e, a), i, j) for i, e in enumerate(expected) for j, a in enumerate(actual)),
+        reverse=True
+    )
+    pairs, used_expected, used_actual = [], set(), set()
+    for score, i, j in candidates:
+        if score < MATCH_THRESHOLD:
+            break
+        if i in used_expected or j in used_actual:
+            continue
+        pairs.append((i, j))
+        used_expected.add(i)
+        used_actual.add(j)
+    return pairs
+
+def score_case(expected: Dict[str, List[Dict[str, Any]]], result: ExtractionResult) -> Dict[str, int]:
+    """Counts of true and false positives, misses, and correct owners and due dates"""
+    counts: Dict[str, int] = {}
+    for kind, field in KINDS.items():
+        wanted = expected.get(kind, [])
+        found = [getattr(item, field) for item in getattr(result, kind)]
+        pairs = match([w[field] for w in wanted], found)
+        counts[f"{kind}_tp"] = len(pairs)
+        counts[f"{kind}_fp"] = len(found) - len(pairs)
+        counts[f"{kind}_fn"] = len(wanted) - len(pairs)
+        if kind != "action_items":
+            continue
+
+        owners = dates = owners_correct = dates_correct = 0
+        matched = dict(pairs)
+        for i, item in enumerate(wanted):
+            extracted = result.action_items[matched[i]] if i in matched else None
+            if item.get("owner"):
+                owners += 1
+                if extracted and (extracted.owner or "").lower() == item["owner"].lower():
+                    owners_correct += 1
+            # Every expected date counts, so a missed item is also a missed date
+            if item.get("due_date"):
+                dates += 1
+                if extracted and extracted.due_date and extracted.due_date.isoformat() == item["due_date"]:
+                    dates_correct += 1
+        counts.update(owners=owners, owners_correct=owners_correct, dates=dates, dates_correct=dates_correct)
+    return counts
+
+def _ratio(numerator: int, denominator: int) -> float:
+    return round(numerator / denominator, 3) if denominator else 0.0
+
+def _f1(tp: int, fp: int, fn: int) -> Dict[str, float]:
+    precision, recall = _ratio(tp, tp + fp), _ratio(tp, tp + fn)
+    f1 = round(2 * precision * recall / (precision + recall), 3) if precision + recall else 0.0
+    return {"precision": precision, "recall": recall, "f1": f1}
+
+def summarize(counts: List[Dict[str, int]]) -> Dict[str, Any]:
+    """Micro-averaged scores over every case"""
+    total: Dict[str, int] = {}
+    for case in counts:
+        for key, value in case.items():
+            total[key] = total.get(key, 0) + value
+    summary: Dict[str, Any] = {kind: _f1(total[f"{kind}_tp"], total[f"{kind}_fp"], total[f"{kind}_fn"]) for kind in KINDS}
+    summary["overall"] = _f1(*(sum(total[f"{kind}_{c}"] for kind in KINDS) for c in ("tp", "fp", "fn")))
+    summary["owner_accuracy"] = _ratio(total["owners_correct"], total["owners"])
+    summary["date_accuracy"] = _ratio(total["dates_correct"], total["dates"])
+    return summary
+
+# Running
+
+def evaluate(name: str, corpus: Dict[str, Dict[str, Any]], record: bool = False) -> Dict[str, Any]:
+    config = Config.override(**CONFIGS[name])
+    cases = {}
+    latencies = []
+    tokens = 0
+    for case_name, case in corpus.items():
+        reference_date = datetime.strptime(case["reference_date"], "%Y-%m-%d")
+        extractor = Extractor(config, reference_date=reference_date)
+        replay = None
+        if extractor.is_aws:
+            path = RECORDINGS_DIR / name / f"{case_name}.json"
+            replay = extractor.bedrock = RecordingPool(extractor.bedrock, path) if record else ReplayPool(path)
+
+        start = time.perf_counter()
+        try:
+            result = extractor.extract(case["transcript"], f"eval-{case_name}")
+        except StaleRecording as e:
+            return {"status": "stale", "error": str(e)}
+        latency_ms = (time.perf_counter() - start) * 1000
+        if replay:
+            # The recorded model time replaces the replay's own (near zero) call
+            latency_ms += replay.latency_ms
+            tokens += replay.usage["input_tokens"] + replay.usage["output_tokens"]
+        latencies.append(latency_ms)
+        cases[case_name] = score_case(case["expected"], result)
+
+    latencies.sort()
+    return {
+        "status": "ok",
+        "scores": summarize(list(cases.values())),
+        "latency_p50_ms": round(latencies[len(latencies) // 2], 1),
+        "latency_max_ms": round(latencies[-1], 1),
+        "tokens_per_transcript": round(tokens / len(corpus)),
+        "cases": cases,
+    }
+
+def fastest_meeting(results: Dict[str, Dict[str, Any]], min_f1: float) -> Optional[str]:
+    """The configuration with the lowest median latency whose overall F1 reaches `min_f1`"""
+    passing = [
+        (r["latency_p50_ms"], name) for name, r in results.items()
+        if r["status"] == "ok" and r["scores"]["overall"]["f1"] >= min_f1
+    ]
+    return min(passing)[1] if passing else None
+
+def main():
+    parser = argparse.ArgumentParser(description="FollowUpSync extraction evaluation")
+    parser.add_argument("--config", action="append", choices=sorted(CONFIGS),
+                        help="Configuration to evaluate (repeatable); defaults to all")
+    parser.add_argument("--record", action="store_true", help="Call Bedrock and save its responses for replay")
+    parser.add_argument("--min-f1", type=float, help="Pick the fastest configuration with at least this overall F1")
+    parser.add_argument("--output", help="Write the full results as JSON")
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    results = {name: evaluate(name, corpus, record=args.record) for name in args.config or CONFIGS}
+
+    print(f"{len(corpus)} transcripts")
+    print(f"{'config':14} {'F1':>6} {'dec':>6} {'items':>6} {'risks':>6} {'owner':>6} {'date':>6} {'p50 ms':>9} {'tokens':>7}")
+    for name, r in results.items():
+        if r["status"] != "ok":
+            print(f"{name:14} {r['status']}: {r['error']}")
+            continue
+        s = r["scores"]
+        print(f"{name:14} {s['overall']['f1']:6.3f} {s['decisions']['f1']:6.3f} {s['action_items']['f1']:6.3f} "
+              f"{s['risks']['f1']:6.3f} {s['owner_accuracy']:6.3f} {s['date_accuracy']:6.3f} "
+              f"{r['latency_p50_ms']:9.1f} {r['tokens_per_transcript']:7d}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2), encoding="utf-8")
+    if args.min_f1 is not None:
+        choice = fastest_meeting(results, args.min_f1)
+        if not choice:
+            print(f"No configuration reaches F1 {args.min_f1}")
+            sys.exit(1)
+        print(f"Fastest configuration with F1 >= {args.min_f1}: {choice}")
+
+if __name__ == "__main__":
+    main()
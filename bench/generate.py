@@ -0,0 +1,72 @@
+"""Synthetic meeting transcripts for benchmarks.
+
+Lines are phrased so that both the local rule-based extractor and the Bedrock stub pick up
+the planted decisions, action items and risks.
+"""
+import random
+from typing import List
+
+SPEAKERS = ["John", "Sarah", "Mike", "Lisa", "Anthony", "Priya", "Chen", "Maria", "Omar", "Grace"]
+
+TOPICS = [
+    "the onboarding flow", "the billing service", "the mobile release", "the data migration",
+    "the search index", "the design system", "the analytics dashboard", "the auth rewrite",
+    "the API gateway", "the customer survey", "the incident runbook", "the Q3 roadmap",
+]
+
+FILLER = [
+    "I think we should look at {topic} again before we commit to anything.",
+    "Quick update on {topic}: progress is steady, nothing major to report.",
+    "Can everyone see the screen? This is the latest on {topic}.",
+    "Let's park {topic} for now and come back to it later.",
+    "I had a chat with the vendor about {topic} yesterday.",
+    "The numbers for {topic} look roughly in line with last month.",
+]
+
+DECISIONS = [
+    "We decided to move forward with {topic} this sprint.",
+    "Agreed that {topic} gets priority over new features.",
+    "Decision: {topic} ships behind a feature flag first.",
+]
+
+ACTIONS = [
+    "Action: {owner} to finish {topic} by {due}",
+    "{owner} needs to review {topic} by {due}",
+    "TODO: {owner} will document {topic} by {due}",
+]
+
+RISKS = [
+    "Risk: {topic} might slip if the vendor is late.",
+    "One concern is that {topic} has no test coverage yet.",
+    "Blocker: {topic} is waiting on security review.",
+]
+
+DUE_PHRASES = ["Friday", "next Tuesday", "end of month", "Oct 30", "next Monday", "Dec 15"]
+
+def generate_transcript(lines: int = 200, speakers: int = 4, item_density: float = 0.15,
+                        paragraph_lines: int = 8, seed: int = 0) -> str:
+    """Generate a transcript of `lines` speaker lines.
+
+    `item_density` is the fraction of lines that plant a decision, action item or risk.
+    """
+    rng = random.Random(seed)
+    names = SPEAKERS[:max(1, min(speakers, len(SPEAKERS)))]
+    out: List[str] = [
+        f"Meeting Notes - Synthetic Sync #{seed}",
+        f"Attendees: {', '.join(names)}",
+        "",
+    ]
+
+    for i in range(lines):
+        speaker = rng.choice(names)
+        topic = rng.choice(TOPICS)
+        if rng.random() < item_density:
+            kind = rng.choice((DECISIONS, ACTIONS, RISKS))
+            text = rng.choice(kind).format(topic=topic, owner=rng.choice(names), due=rng.choice(DUE_PHRASES))
+        else:
+            text = rng.choice(FILLER).format(topic=topic)
+        out.append(f"{speaker}: {text}")
+        if paragraph_lines and (i + 1) % paragraph_lines == 0:
+            out.append("")
+
+    return '\n'.join(out) + '\n'
@@ -0,0 +1,90 @@
+"""Micro-benchmark of building, reloading and serializing ExtractionResult.
+
+    python -m bench.micro                  # 2,000 action items per result
+    python -m bench.micro --items 20000 --repeat 5
+
+Each case times the per-object path the pipeline used before (a pydantic model call per
+decision, item and risk; result.dict() plus json.dumps) against the current one on the same
+data, and prints the best of --repeat runs.
+"""
+import argparse
+import json
+import sys
+import time
+import warnings
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from core.schema import ActionItem, Decision, ExtractionResult, Risk
+
+def raw_result(items: int) -> Dict[str, Any]:
+    """A model response as Extractor._build_extraction_result receives it"""
+    return {
+        "decisions": [{"text": f"Decision {i}", "owners": ["Sarah"]} for i in range(items // 4)],
+        "action_items": [
+            {"title": f"Follow up on topic {i}", "owner": "Sarah", "due_date": "2030-01-15",
+             "priority": "High", "notes": f"Context {i}"}
+            for i in range(items)
+        ],
+        "risks": [{"text": f"Risk {i}", "severity": "Low"} for i in range(items // 4)],
+        "summary_md": "# Meeting Summary",
+    }
+
+def build_per_object(data: Dict[str, Any], run_id: str) -> ExtractionResult:
+    return ExtractionResult(
+        run_id=run_id,
+        decisions=[Decision(**d) for d in data["decisions"]],
+        action_items=[ActionItem(**a) for a in data["action_items"]],
+        risks=[Risk(**r) for r in data["risks"]],
+        summary_md=data["summary_md"],
+    )
+
+def serialize_dict(result: ExtractionResult) -> str:
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        return json.dumps(result.dict(), indent=2, default=str)
+
+def best_of(repeat: int, fn: Callable[[], Any]) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description="ExtractionResult micro-benchmark")
+    parser.add_argument("--items", type=int, default=2000, help="action items per result")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    raw = raw_result(args.items)
+    result = build_per_object(raw, "micro")
+    dumped = result.model_dump(mode="json")
+    cases = {
+        "validate": (
+            lambda: build_per_object(raw, "micro"),
+            lambda: ExtractionResult.model_validate({**raw, "run_id": "micro"}),
+        ),
+        "reload_cached": (
+            lambda: build_per_object(dumped, "micro"),
+            lambda: ExtractionResult.model_validate(dumped),
+        ),
+        "serialize": (
+            lambda: serialize_dict(result),
+            lambda: result.model_dump_json(indent=2),
+        ),
+    }
+
+    total = len(raw["decisions"]) + len(raw["action_items"]) + len(raw["risks"])
+    print(f"{total} objects per result, best of {args.repeat}")
+    print(f"{'case':16} {'before ms':>12} {'after ms':>12} {'speedup':>9}")
+    for name, (before, after) in cases.items():
+        before_s = best_of(args.repeat, before)
+        after_s = best_of(args.repeat, after)
+        print(f"{name:16} {before_s * 1000:12.2f} {after_s * 1000:12.2f} {before_s / after_s:8.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,409 @@
+"""End-to-end benchmark against local stub services.
+
+    python -m bench.run                                   # every scenario
+    python -m bench.run --scenario deliver_fast --repeat 5
+    python -m bench.compare bench/results/<old>.json bench/results/<new>.json
+
+Results are written as JSON to bench/results/<commit>.json unless --output is given.
+"""
+import argparse
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+STUB_PORT = _free_port()
+MCP_PORTS = {service: _free_port() for service in ("slack", "notion", "jira")}
+GATEWAY_PORT = _free_port()
+STUB_URL = f"http://127.0.0.1:{STUB_PORT}"
+
+# Point the pipeline and the MCP servers at the stubs before they read their configuration
+os.environ.update({
+    "MODE": "local",
+    "AWS_ACCESS_KEY_ID": "bench",
+    "AWS_SECRET_ACCESS_KEY": "bench",
+    "BEDROCK_ENDPOINT_URL": f"{STUB_URL}/bedrock",
+    "SLACK_BOT_TOKEN": "xoxb-bench",
+    "SLACK_API_BASE_URL": f"{STUB_URL}/slack/api",
+    "NOTION_TOKEN": "secret_bench",
+    "NOTION_DATABASE_ID": "bench-database",
+    "NOTION_API_BASE_URL": f"{STUB_URL}/notion/v1",
+    "JIRA_BASE_URL": f"{STUB_URL}/jira",
+    "JIRA_EMAIL": "bench@example.com",
+    "JIRA_API_TOKEN": "bench",
+    "JIRA_PROJECT_KEY": "BENCH",
+    "MCP_SLACK_URL": f"http://127.0.0.1:{MCP_PORTS['slack']}",
+    "MCP_NOTION_URL": f"http://127.0.0.1:{MCP_PORTS['notion']}",
+    "MCP_JIRA_URL": f"http://127.0.0.1:{MCP_PORTS['jira']}",
+    # Upstream limits are modelled by the stubs, not by the MCP servers' own limiters
+    "SLACK_RATE_LIMIT": "0",
+    "NOTION_RATE_LIMIT": "0",
+    "JIRA_RATE_LIMIT": "0",
+    "LOG_LEVEL": os.getenv("LOG_LEVEL", "WARNING"),
+})
+
+import uvicorn
+
+from bench.generate import generate_transcript
+from bench.stubs import StubSettings, create_stub_app
+from core.config import Config
+from core.extract import Extractor
+from core.pipeline import Pipeline
+from core.schema import ActionItem, Decision, ExtractionResult, Risk
+from core.storage import iter_chunks
+
+# kind: "extract", "bedrock_load", "ingest", "deliver" or "digest"; latency_ms / rate_limits configure
+# the stubs. bedrock_load runs `concurrency` extractions at once against rate-limited Bedrock
+# stubs, one per entry of `regions`.
+# ingest reads a transcript file into the pipeline, as one string or streamed (stream: True),
+# with few planted items so that peak memory reflects the transcript rather than the result.
+# transport (deliver only): "http" to the three MCP servers (default), "gateway" to the
+# combined gateway, "mcp" for MCP sessions with the three servers, or "inprocess" to call
+# the handlers directly.
+# digest delivers `meetings` runs one by one and then as one digest; a `recurring` share of
+# each meeting's items is the same in every meeting.
+SCENARIOS: Dict[str, Dict[str, Any]] = {
+    "extract_local_small": {"kind": "extract", "mode": "local", "lines": 100, "repeat": 50},
+    "extract_local_large": {"kind": "extract", "mode": "local", "lines": 20000, "repeat": 3},
+    "extract_bedrock_stub": {"kind": "extract", "mode": "aws", "lines": 300, "repeat": 10, "latency_ms": 50},
+    "bedrock_throttled": {"kind": "bedrock_load", "lines": 50, "repeat": 200, "concurrency": 32, "latency_ms": 50,
+                          "regions": ["us-east-1"], "rate_limits": {"bedrock:us-east-1": 40}},
+    "bedrock_two_regions": {"kind": "bedrock_load", "lines": 50, "repeat": 200, "concurrency": 32, "latency_ms": 50,
+                            "regions": ["us-east-1", "us-west-2"],
+                            "rate_limits": {"bedrock:us-east-1": 40, "bedrock:us-west-2": 40}},
+    "ingest_string_small": {"kind": "ingest", "lines": 20000, "repeat": 3},
+    "ingest_string_large": {"kind": "ingest", "lines": 200000, "repeat": 2},
+    "ingest_stream_small": {"kind": "ingest", "lines": 20000, "repeat": 3, "stream": True},
+    "ingest_stream_large": {"kind": "ingest", "lines": 200000, "repeat": 2, "stream": True},
+    "deliver_fast": {"kind": "deliver", "items": 20, "repeat": 3, "latency_ms": 5},
+    "deliver_slow_api": {"kind": "deliver", "items": 20, "repeat": 2, "latency_ms": 100},
+    "deliver_rate_limited": {"kind": "deliver", "items": 20, "repeat": 2, "latency_ms": 5, "rate_limits": {"slack": 10}},
+    "redeliver_unchanged": {"kind": "deliver", "items": 20, "repeat": 3, "latency_ms": 5, "redeliver": True},
+    "deliver_gateway": {"kind": "deliver", "items": 20, "repeat": 3, "latency_ms": 5, "transport": "gateway"},
+    "deliver_inprocess": {"kind": "deliver", "items": 20, "repeat": 3, "latency_ms": 5, "transport": "inprocess"},
+    "deliver_mcp_session": {"kind": "deliver", "items": 20, "repeat": 3, "latency_ms": 5, "transport": "mcp"},
+    "digest_day": {"kind": "digest", "meetings": 12, "items": 8, "recurring": 0.75, "repeat": 2, "latency_ms": 5},
+}
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+def latency_summary(prefix: str, seconds: List[float]) -> Dict[str, float]:
+    ms = [s * 1000 for s in seconds]
+    return {
+        f"{prefix}_p50_ms": round(percentile(ms, 50), 3),
+        f"{prefix}_p95_ms": round(percentile(ms, 95), 3),
+        f"{prefix}_p99_ms": round(percentile(ms, 99), 3),
+        f"{prefix}_count": len(ms),
+    }
+
+def measure_peak_memory(fn: Callable[[], Any]) -> int:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def serve(app, port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    deadline = time.monotonic() + 10
+    while not server.started:
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"Server on port {port} did not start")
+        time.sleep(0.01)
+    return server
+
+def start_services(settings: StubSettings) -> List[uvicorn.Server]:
+    from mcp import slack_server, notion_server, jira_server, gateway
+
+    return [
+        serve(create_stub_app(settings), STUB_PORT),
+        serve(slack_server.app, MCP_PORTS["slack"]),
+        serve(notion_server.app, MCP_PORTS["notion"]),
+        serve(jira_server.app, MCP_PORTS["jira"]),
+        serve(gateway.app, GATEWAY_PORT),
+    ]
+
+def synthetic_result(run_id: str, items: int) -> ExtractionResult:
+    return ExtractionResult(
+        run_id=run_id,
+        decisions=[Decision(text=f"Decision {i}") for i in range(max(1, items // 4))],
+        action_items=[
+            ActionItem(title=f"Follow up on topic {i}", owner="Sarah", due_date="2030-01-15", notes=f"Context {i}")
+            for i in range(items)
+        ],
+        risks=[Risk(text=f"Risk {i}") for i in range(max(1, items // 4))],
+        summary_md="# Meeting Summary",
+    )
+
+def run_extract(params: Dict[str, Any], repeat: int) -> Dict[str, Any]:
+    extractor = Extractor(Config.override(MODE=params["mode"]))
+    transcript = generate_transcript(lines=params["lines"], speakers=params.get("speakers", 4),
+                                     item_density=params.get("item_density", 0.15), seed=1)
+    durations = []
+    items = 0
+    for i in range(repeat):
+        start = time.perf_counter()
+        result = extractor.extract(transcript, f"bench-{i}")
+        durations.append(time.perf_counter() - start)
+        items = len(result.decisions) + len(result.action_items) + len(result.risks)
+    peak = measure_peak_memory(lambda: extractor.extract(transcript, "bench-mem"))
+
+    total = sum(durations)
+    metrics = {
+        "transcript_chars": len(transcript),
+        "items_per_transcript": items,
+        "transcripts_per_s": round(repeat / total, 3),
+        "chars_per_s": round(repeat * len(transcript) / total, 1),
+        "peak_memory_bytes": peak,
+    }
+    metrics.update(latency_summary("extract", durations))
+    return metrics
+
+def run_bedrock_load(params: Dict[str, Any], repeat: int) -> Dict[str, Any]:
+    from concurrent.futures import ThreadPoolExecutor
+    from core.bedrock import BedrockPool
+
+    config = Config.override(MODE="aws", BEDROCK_REGIONS=params["regions"],
+                             BEDROCK_ENDPOINT_URL=f"{STUB_URL}/bedrock/{{region}}")
+    extractor = Extractor(config)
+    # A fresh pool per scenario, so limits learnt by an earlier one do not carry over
+    pool = extractor.bedrock = BedrockPool(config)
+    transcript = generate_transcript(lines=params["lines"], speakers=4, item_density=0.15, seed=1)
+
+    def extract(i: int) -> float:
+        start = time.perf_counter()
+        extractor.extract(transcript, f"bench-{i}")
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(params["concurrency"]) as executor:
+        durations = list(executor.map(extract, range(repeat)))
+    total = time.perf_counter() - start
+
+    endpoints = pool.snapshot()
+    metrics = {
+        "transcripts_per_s": round(repeat / total, 3),
+        "throttles": sum(e["throttles"] for e in endpoints),
+        "final_limits": {e["region"]: e["limit"] for e in endpoints},
+    }
+    metrics.update(latency_summary("extract", durations))
+    return metrics
+
+def run_ingest(params: Dict[str, Any], repeat: int) -> Dict[str, Any]:
+    pipeline = Pipeline()
+    path = Path(f"bench-{params['lines']}.txt")
+    path.write_text(generate_transcript(lines=params["lines"], speakers=4, item_density=0.002, seed=1), encoding="utf-8")
+
+    def ingest():
+        if params.get("stream"):
+            with open(path, "rb") as f:
+                return pipeline.process_stream(iter_chunks(f))
+        return pipeline.process_transcript(path.read_text(encoding="utf-8"))
+
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        ingest()
+        durations.append(time.perf_counter() - start)
+    peak = measure_peak_memory(ingest)
+
+    size = path.stat().st_size
+    metrics = {
+        "transcript_bytes": size,
+        "peak_memory_bytes": peak,
+        "peak_memory_per_input_byte": round(peak / size, 3),
+        "mb_per_s": round(repeat * size / sum(durations) / 1e6, 2),
+    }
+    metrics.update(latency_summary("ingest", durations))
+    return metrics
+
+def run_deliver(params: Dict[str, Any], repeat: int) -> Dict[str, Any]:
+    pipeline = Pipeline()
+    transport = params.get("transport", "http")
+    if transport == "gateway":
+        pipeline.mcp_client.base_urls = {service: f"http://127.0.0.1:{GATEWAY_PORT}" for service in MCP_PORTS}
+    elif transport in ("inprocess", "mcp"):
+        pipeline.mcp_client.transport = transport
+    call_durations: List[float] = []
+    errors = 0
+    recording = False
+    post = pipeline.mcp_client._post
+
+    def timed_post(service, tool, payload):
+        nonlocal errors
+        start = time.perf_counter()
+        response = post(service, tool, payload)
+        if recording:
+            call_durations.append(time.perf_counter() - start)
+            errors += bool(response.get("error"))
+        return response
+
+    pipeline.mcp_client._post = timed_post
+    integrations = {"slack": {"channel": "#bench"}, "notion": True, "jira": True}
+
+    run_durations = []
+    for _ in range(repeat):
+        # Fresh run IDs, so earlier deliveries in the ledger do not turn creates into no-ops
+        result = synthetic_result(f"bench-{uuid.uuid4().hex[:8]}", params["items"])
+        if params.get("redeliver"):
+            pipeline.deliver_to_integrations(result, integrations)
+        recording = True
+        start = time.perf_counter()
+        pipeline.deliver_to_integrations(result, integrations)
+        run_durations.append(time.perf_counter() - start)
+        recording = False
+
+    peak = measure_peak_memory(
+        lambda: pipeline.deliver_to_integrations(synthetic_result(f"bench-{uuid.uuid4().hex[:8]}", params["items"]), integrations)
+    )
+
+    metrics = {
+        "items": params["items"],
+        "api_calls_per_delivery": round(len(call_durations) / repeat, 2),
+        "errors": errors,
+        "peak_memory_bytes": peak,
+    }
+    metrics.update(latency_summary("delivery", run_durations))
+    metrics.update(latency_summary("mcp_call", call_durations))
+    return metrics
+
+def run_digest(params: Dict[str, Any], repeat: int) -> Dict[str, Any]:
+    """API calls for a day of meetings delivered one by one, and as one digest"""
+    meetings, items = params["meetings"], params["items"]
+    # Items every meeting shares (a standup going over the same backlog); the rest are new
+    recurring = int(items * params.get("recurring", 0.0))
+    pipeline = Pipeline(Config.override(DIGEST_MAX_RUNS=meetings, DIGEST_DIR=tempfile.mkdtemp(prefix="digest-")))
+    calls: Dict[str, int] = {}
+    post = pipeline.mcp_client._post
+
+    def counted_post(service, tool, payload):
+        calls[service] = calls.get(service, 0) + 1
+        return post(service, tool, payload)
+
+    pipeline.mcp_client._post = counted_post
+    integrations = {"slack": {"channel": "#bench"}, "notion": True, "jira": True}
+
+    def day() -> List[ExtractionResult]:
+        batch = uuid.uuid4().hex[:8]
+        results = []
+        for m in range(meetings):
+            result = synthetic_result(f"bench-{batch}-{m}", items)
+            for i, item in enumerate(result.action_items[recurring:], recurring):
+                item.title = f"Meeting {batch}-{m} topic {i}"
+            results.append(result)
+        return results
+
+    individual: Dict[str, int] = {}
+    digest: Dict[str, int] = {}
+    durations = []
+    for _ in range(repeat):
+        calls.clear()
+        for result in day():
+            pipeline.deliver_to_integrations(result, integrations)
+        for service, count in calls.items():
+            individual[service] = individual.get(service, 0) + count
+        calls.clear()
+        start = time.perf_counter()
+        for result in day():
+            pipeline.queue_digest(result, integrations)
+        durations.append(time.perf_counter() - start)
+        for service, count in calls.items():
+            digest[service] = digest.get(service, 0) + count
+
+    metrics = {
+        "meetings": meetings,
+        "api_calls_individual": round(sum(individual.values()) / repeat, 2),
+        "api_calls_digest": round(sum(digest.values()) / repeat, 2),
+        "call_reduction": round(sum(individual.values()) / max(1, sum(digest.values())), 2),
+    }
+    for service in sorted(set(individual) | set(digest)):
+        metrics[f"{service}_calls_individual"] = round(individual.get(service, 0) / repeat, 2)
+        metrics[f"{service}_calls_digest"] = round(digest.get(service, 0) / repeat, 2)
+    metrics.update(latency_summary("digest_day", durations))
+    return metrics
+
+def git_revision() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+                                    capture_output=True, text=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        commit, dirty = "unknown", False
+    return {"commit": commit, "dirty": dirty}
+
+RUNNERS: Dict[str, Callable[[Dict[str, Any], int], Dict[str, Any]]] = {
+    "extract": run_extract,
+    "bedrock_load": run_bedrock_load,
+    "ingest": run_ingest,
+    "deliver": run_deliver,
+    "digest": run_digest,
+}
+
+def main():
+    parser = argparse.ArgumentParser(description="FollowUpSync end-to-end benchmark")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="Scenario to run (repeatable); defaults to all")
+    parser.add_argument("--repeat", type=int, help="Override the per-scenario repeat count")
+    parser.add_argument("--output", help="Results file (default: bench/results/<commit>.json)")
+    args = parser.parse_args()
+
+    revision = git_revision()
+    output = Path(args.output or ROOT / "bench" / "results" / f"{revision['commit']}.json").resolve()
+
+    settings = StubSettings()
+    start_services(settings)
+
+    # Artifacts and ledgers written by the pipeline go to a scratch directory
+    os.chdir(tempfile.mkdtemp(prefix="followupsync-bench-"))
+
+    report = {
+        "schema": 1,
+        **revision,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scenarios": {},
+    }
+    for name in args.scenario or list(SCENARIOS):
+        params = SCENARIOS[name]
+        repeat = args.repeat or params.get("repeat", 3)
+        settings.configure(params.get("latency_ms", 0), params.get("jitter_ms", 0), params.get("rate_limits"))
+        runner = RUNNERS[params["kind"]]
+        metrics = runner(params, repeat)
+        report["scenarios"][name] = {"params": {**params, "repeat": repeat}, "metrics": metrics}
+        print(f"{name}: {json.dumps(metrics)}")
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Results written to {output}")
+
+if __name__ == "__main__":
+    main()
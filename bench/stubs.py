@@ -0,0 +1,230 @@
+"""Local stand-ins for Bedrock, Slack, Notion and Jira.
+
+One FastAPI app serves all four APIs under path prefixes, with configurable latency and
+per-API rate limits:
+
+    /bedrock   -> BEDROCK_ENDPOINT_URL   (InvokeModel, Nova and Claude response formats;
+                                          /bedrock/{region} for one rate limit per region)
+    /slack/api -> SLACK_API_BASE_URL     (chat.postMessage, chat.update, chat.delete)
+    /notion/v1 -> NOTION_API_BASE_URL    (databases.retrieve, pages.create, pages.update)
+    /jira      -> JIRA_BASE_URL          (issue create, edit, delete)
+
+Run standalone with `python -m bench.stubs --port 8900 --latency-ms 50`.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import threading
+import time
+from typing import Dict, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+from core.extract import Extractor
+
+class TokenBucket:
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self) -> float:
+        """Take a token; returns 0 on success or the seconds until one is available"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+class StubSettings:
+    """Latency and rate limits of the stubs; `configure` can change them between scenarios"""
+
+    def __init__(self, latency_ms: float = 0, jitter_ms: float = 0,
+                 rate_limits: Optional[Dict[str, float]] = None, seed: int = 0):
+        self.rng = random.Random(seed)
+        self.configure(latency_ms, jitter_ms, rate_limits)
+
+    def configure(self, latency_ms: float = 0, jitter_ms: float = 0, rate_limits: Optional[Dict[str, float]] = None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        # Requests per second allowed for each API; missing or 0 means unlimited
+        self.buckets = {api: TokenBucket(rate) for api, rate in (rate_limits or {}).items() if rate}
+
+# Directory of every stub service: (handle, full name)
+STUB_PEOPLE = [("sarah", "Sarah Chen"), ("john", "John Miller"), ("mike", "Mike Johnson"), ("lisa", "Lisa Park")]
+
+def _transcript_from_body(body: dict) -> str:
+    message = body.get("messages", [{}])[0]
+    content = message.get("content", "")
+    if isinstance(content, list):
+        content = content[0].get("text", "")
+    marker = "Extract from this transcript:\n\n"
+    return content.split(marker, 1)[-1]
+
+def create_stub_app(settings: Optional[StubSettings] = None) -> FastAPI:
+    settings = settings or StubSettings()
+    app = FastAPI(title="FollowUpSync benchmark stubs")
+    ids = itertools.count(1)
+    extractor = Extractor()
+    app.state.settings = settings
+    app.state.counts = {}
+
+    async def gate(api: str) -> Optional[float]:
+        """Count the call, apply latency and return a retry delay if rate limited"""
+        app.state.counts[api] = app.state.counts.get(api, 0) + 1
+        delay = settings.latency_ms + settings.rng.uniform(0, settings.jitter_ms)
+        if delay:
+            await asyncio.sleep(delay / 1000)
+        bucket = settings.buckets.get(api)
+        return bucket.take() if bucket else 0
+
+    @app.post("/bedrock/model/{model_id}/invoke")
+    async def bedrock_invoke(model_id: str, request: Request):
+        return await _bedrock_invoke("bedrock", model_id, request)
+
+    @app.post("/bedrock/{region}/model/{model_id}/invoke")
+    async def bedrock_region_invoke(region: str, model_id: str, request: Request):
+        # Limited by a "bedrock:<region>" rate limit if there is one, else the shared "bedrock" one
+        api = f"bedrock:{region}" if f"bedrock:{region}" in settings.buckets else "bedrock"
+        return await _bedrock_invoke(api, model_id, request)
+
+    async def _bedrock_invoke(api: str, model_id: str, request: Request):
+        retry_after = await gate(api)
+        if retry_after:
+            return JSONResponse(
+                {"message": "Too many requests, please wait before trying again."},
+                status_code=429,
+                headers={"x-amzn-ErrorType": "ThrottlingException:http://internal.amazon.com/coral/com.amazon.coral.availability/"}
+            )
+
+        body = json.loads(await request.body())
+        transcript = _transcript_from_body(body)
+        result = extractor._extract_local(transcript, "stub")
+        text = json.dumps({
+            "decisions": [{"text": d.text, "owners": d.owners} for d in result.decisions],
+            "action_items": [{"title": a.title, "priority": "Medium", "source_quote": a.title} for a in result.action_items],
+            "risks": [{"text": r.text, "severity": "Medium"} for r in result.risks],
+            "summary_md": result.summary_md,
+        })
+        input_tokens = len(json.dumps(body)) // 4
+        output_tokens = len(text) // 4
+
+        if "nova" in model_id.lower():
+            return {
+                "output": {"message": {"role": "assistant", "content": [{"text": text}]}},
+                "stopReason": "end_turn",
+                "usage": {"inputTokens": input_tokens, "outputTokens": output_tokens,
+                          "totalTokens": input_tokens + output_tokens},
+            }
+        return {
+            "content": [{"type": "text", "text": text}],
+            "stop_reason": "end_turn",
+            "usage": {"input_tokens": input_tokens, "output_tokens": output_tokens},
+        }
+
+    @app.post("/slack/api/{method}")
+    async def slack_api(method: str, request: Request):
+        retry_after = await gate("slack")
+        if retry_after:
+            return JSONResponse({"ok": False, "error": "ratelimited"}, status_code=429,
+                                headers={"Retry-After": str(max(1, round(retry_after)))})
+        if method == "users.list":
+            return {"ok": True, "members": [
+                {"id": f"U0STUB{i}", "name": handle, "profile": {"real_name": name, "email": f"{handle}@example.com"}}
+                for i, (handle, name) in enumerate(STUB_PEOPLE)
+            ], "response_metadata": {"next_cursor": ""}}
+        payload = await request.json()
+        ts = payload.get("ts") or f"{int(time.time())}.{next(ids):06d}"
+        return {"ok": True, "channel": "C0STUB", "ts": ts}
+
+    @app.get("/notion/v1/databases/{database_id}")
+    async def notion_database(database_id: str):
+        await gate("notion")
+        return {
+            "id": database_id,
+            "properties": {
+                "Name": {"type": "title"},
+                "Due Date": {"type": "date"},
+                "Assignee": {"type": "rich_text"},
+                "Owner": {"type": "people"},
+            },
+        }
+
+    @app.get("/notion/v1/users")
+    async def notion_users():
+        await gate("notion")
+        return {"results": [
+            {"object": "user", "id": f"stub-user-{i}", "type": "person", "name": name,
+             "person": {"email": f"{handle}@example.com"}}
+            for i, (handle, name) in enumerate(STUB_PEOPLE)
+        ], "has_more": False, "next_cursor": None}
+
+    @app.post("/notion/v1/pages")
+    async def notion_create_page():
+        if await gate("notion"):
+            return JSONResponse({"object": "error", "code": "rate_limited", "message": "Rate limited"}, status_code=429)
+        page_id = f"stub-page-{next(ids)}"
+        return {"id": page_id, "url": f"https://www.notion.so/{page_id}"}
+
+    @app.patch("/notion/v1/pages/{page_id}")
+    async def notion_update_page(page_id: str):
+        if await gate("notion"):
+            return JSONResponse({"object": "error", "code": "rate_limited", "message": "Rate limited"}, status_code=429)
+        return {"id": page_id, "url": f"https://www.notion.so/{page_id}"}
+
+    @app.post("/jira/rest/api/3/issue")
+    async def jira_create_issue():
+        if await gate("jira"):
+            return JSONResponse({"errorMessages": ["Rate limit exceeded"]}, status_code=429)
+        return JSONResponse({"key": f"STUB-{next(ids)}"}, status_code=201)
+
+    @app.post("/jira/rest/api/3/issue/bulk")
+    async def jira_create_issues(request: Request):
+        if await gate("jira"):
+            return JSONResponse({"errorMessages": ["Rate limit exceeded"]}, status_code=429)
+        body = await request.json()
+        issues = [{"key": f"STUB-{next(ids)}"} for _ in body["issueUpdates"]]
+        return JSONResponse({"issues": issues, "errors": []}, status_code=201)
+
+    @app.get("/jira/rest/api/3/users/search")
+    async def jira_users(startAt: int = 0):
+        await gate("jira")
+        if startAt:
+            return []
+        return [
+            {"accountId": f"stub-account-{i}", "accountType": "atlassian", "displayName": name, "active": True}
+            for i, (handle, name) in enumerate(STUB_PEOPLE)
+        ]
+
+    @app.put("/jira/rest/api/3/issue/{key}")
+    @app.delete("/jira/rest/api/3/issue/{key}")
+    async def jira_change_issue(key: str):
+        if await gate("jira"):
+            return JSONResponse({"errorMessages": ["Rate limit exceeded"]}, status_code=429)
+        return Response(status_code=204)
+
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the local API stubs")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--rate-limit", action="append", default=[], metavar="API=RPS",
+                        help="e.g. --rate-limit slack=1 --rate-limit bedrock=5")
+    args = parser.parse_args()
+
+    rate_limits = {api: float(rps) for api, rps in (item.split("=", 1) for item in args.rate_limit)}
+    import uvicorn
+    uvicorn.run(create_stub_app(StubSettings(args.latency_ms, args.jitter_ms, rate_limits)),
+                host="127.0.0.1", port=args.port)
+
+if __name__ == "__main__":
+    main()
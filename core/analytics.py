@@ -0,0 +1,202 @@
+"""Columnar analytics store of decisions, action items and risks across runs.
+
+Each export appends one Parquet file per dataset, partitioned by the month of the run date:
+
+    {ANALYTICS_DIR}/action_items/month=2026-10/{run_id}-{exported_at}.parquet
+
+Exporting a run again appends a newer snapshot rather than rewriting files; queries keep only
+the latest export of every run. `compact` merges each month's small files into one (dropping
+superseded snapshots), so a year of meetings is read from a dozen files per dataset.
+
+    python -m core.analytics backfill     # export every saved ActionItems.json
+    python -m core.analytics compact
+    python -m core.analytics report
+"""
+import argparse
+import logging
+import os
+import time
+import uuid
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Dict, List
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from core.config import Config
+from core.schema import ExtractionResult
+from core.tracing import span
+
+logger = logging.getLogger(__name__)
+
+_COMMON = [
+    ("run_id", pa.string()),
+    ("date", pa.date32()),
+    ("exported_at", pa.timestamp("ms", tz="UTC")),
+    ("id", pa.string()),
+]
+
+SCHEMAS: Dict[str, pa.Schema] = {
+    "decisions": pa.schema(_COMMON + [
+        ("text", pa.string()),
+        ("rationale", pa.string()),
+        ("owners", pa.list_(pa.string())),
+    ]),
+    "action_items": pa.schema(_COMMON + [
+        ("title", pa.string()),
+        ("owner", pa.string()),
+        ("due_date", pa.date32()),
+        ("priority", pa.string()),
+        ("notes", pa.string()),
+    ]),
+    "risks": pa.schema(_COMMON + [
+        ("text", pa.string()),
+        ("severity", pa.string()),
+        ("mitigation", pa.string()),
+    ]),
+}
+
+PARTITIONING = ds.partitioning(pa.schema([("month", pa.string())]), flavor="hive")
+
+class AnalyticsStore:
+    def __init__(self, directory: str = None):
+        self.directory = Path(directory or Config.ANALYTICS_DIR)
+
+    def export(self, result: ExtractionResult, run_date: date = None) -> Dict[str, int]:
+        """Append a snapshot of a run to every dataset; returns the rows written per dataset"""
+        run_date = run_date or date.today()
+        exported_at = datetime.now(timezone.utc)
+        stamp = exported_at.strftime("%Y%m%dT%H%M%S%f")
+        written = {}
+        with span("analytics.export", run_id=result.run_id):
+            for dataset, schema in SCHEMAS.items():
+                columns = set(schema.names) - {"run_id", "date", "exported_at"}
+                rows = [item.model_dump(include=columns) for item in getattr(result, dataset)]
+                written[dataset] = len(rows)
+                if not rows:
+                    continue
+                table = pa.Table.from_pylist(
+                    [{"run_id": result.run_id, "date": run_date, "exported_at": exported_at, **row} for row in rows],
+                    schema=schema
+                )
+                partition = self.directory / dataset / f"month={run_date:%Y-%m}"
+                self._write(table, partition / f"{result.run_id}-{stamp}.parquet")
+        return written
+
+    def load(self, dataset: str, start: date = None, end: date = None) -> pd.DataFrame:
+        """Rows of the latest export of each run, optionally for run dates in [start, end]"""
+        path = self.directory / dataset
+        schema = SCHEMAS[dataset]
+        if not path.exists():
+            return schema.empty_table().to_pandas()
+
+        with span("analytics.load", dataset=dataset):
+            source = ds.dataset(path, format="parquet", schema=schema.append(pa.field("month", pa.string())),
+                                partitioning=PARTITIONING)
+            conditions = []
+            # The month bounds skip whole partitions, the date bounds filter within them
+            if start:
+                conditions += [ds.field("month") >= f"{start:%Y-%m}", ds.field("date") >= start]
+            if end:
+                conditions += [ds.field("month") <= f"{end:%Y-%m}", ds.field("date") <= end]
+            condition = None
+            for part in conditions:
+                condition = part if condition is None else condition & part
+            table = source.to_table(columns=schema.names, filter=condition)
+            frame = table.to_pandas()
+
+        if frame.empty:
+            return frame
+        latest = frame.groupby("run_id")["exported_at"].transform("max")
+        return frame[frame["exported_at"] == latest].reset_index(drop=True)
+
+    def compact(self, dataset: str = None) -> int:
+        """Merge each partition's files into one, keeping only the latest export of each run.
+
+        Returns the number of files removed.
+        """
+        removed = 0
+        for name in [dataset] if dataset else SCHEMAS:
+            root = self.directory / name
+            if not root.exists():
+                continue
+            for partition in sorted(p for p in root.iterdir() if p.is_dir()):
+                files = sorted(partition.glob("*.parquet"))
+                if len(files) < 2:
+                    continue
+                table = pa.concat_tables(pq.read_table(f, schema=SCHEMAS[name]) for f in files)
+                frame = table.to_pandas()
+                latest = frame.groupby("run_id")["exported_at"].transform("max")
+                table = table.filter(pa.array(frame["exported_at"] == latest))
+                self._write(table, partition / f"compacted-{uuid.uuid4().hex[:12]}.parquet")
+                for f in files:
+                    f.unlink()
+                removed += len(files) - 1
+        return removed
+
+    def _write(self, table: pa.Table, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Written under a name the dataset reader skips, then renamed into place
+        tmp = path.with_name(f".{path.name}.tmp")
+        pq.write_table(table, tmp, compression="zstd")
+        os.replace(tmp, path)
+
+    # Rollups
+
+    def overdue_by_owner(self, today: date = None) -> pd.DataFrame:
+        """Action items past their due date, counted per owner"""
+        today = today or date.today()
+        items = self.load("action_items")
+        overdue = items[pd.to_datetime(items["due_date"]) < pd.Timestamp(today)]
+        counts = overdue["owner"].fillna("Unassigned").value_counts()
+        return counts.rename_axis("owner").reset_index(name="overdue")
+
+    def decisions_per_week(self) -> pd.DataFrame:
+        decisions = self.load("decisions")
+        weeks = pd.to_datetime(decisions["date"]).dt.to_period("W").dt.start_time
+        counts = weeks.value_counts().sort_index()
+        return counts.rename_axis("week").reset_index(name="decisions")
+
+    def risk_severity_trend(self) -> pd.DataFrame:
+        """Risks per week (rows) and severity (columns)"""
+        risks = self.load("risks")
+        weeks = pd.to_datetime(risks["date"]).dt.to_period("W").dt.start_time
+        severity = risks["severity"].fillna("Medium")
+        return pd.crosstab(weeks.rename("week"), severity.rename("severity"))
+
+def backfill(store: AnalyticsStore, output_dir: str = "data/output") -> int:
+    """Export the ActionItems.json of every locally saved run, dated by the file's mtime"""
+    exported = 0
+    for path in sorted(Path(output_dir).glob("*/ActionItems.json")):
+        try:
+            result = ExtractionResult.model_validate_json(path.read_bytes())
+        except ValueError as e:
+            logger.warning("Skipping %s: %s", path, e)
+            continue
+        store.export(result, run_date=date.fromtimestamp(path.stat().st_mtime))
+        exported += 1
+    return exported
+
+def main():
+    parser = argparse.ArgumentParser(description="Analytics store of decisions, action items and risks")
+    parser.add_argument("command", choices=["backfill", "compact", "report"])
+    parser.add_argument("--directory", help="Store directory (default: ANALYTICS_DIR)")
+    args = parser.parse_args()
+
+    store = AnalyticsStore(args.directory)
+    if args.command == "backfill":
+        print(f"Exported {backfill(store)} run(s)")
+    elif args.command == "compact":
+        print(f"Removed {store.compact()} file(s)")
+    else:
+        start = time.perf_counter()
+        reports: List[pd.DataFrame] = [store.overdue_by_owner(), store.decisions_per_week(), store.risk_severity_trend()]
+        for report in reports:
+            print(report.to_string(), end="\n\n")
+        print(f"Computed in {time.perf_counter() - start:.3f}s")
+
+if __name__ == "__main__":
+    main()
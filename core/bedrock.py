@@ -0,0 +1,251 @@
+"""Bedrock invocation layer: adaptive concurrency and routing across regions.
+
+Every configured region (or cross-region inference profile) gets its own bedrock-runtime
+client and an AIMD concurrency limit: each successful call raises the limit by 1/limit
+(about +1 per round of calls), a ThrottlingException halves it. Calls go to the endpoint with
+the most spare capacity; a throttled call is retried on another endpoint, and an endpoint
+that fails with a server or connection error is skipped for BEDROCK_FAILOVER_SECONDS.
+
+    BEDROCK_REGIONS=us-east-1,us-west-2=us.amazon.nova-micro-v1:0
+
+An entry is a region, or region=model ID to use a different model or inference profile
+there. The limits are per process and shared by every Extractor, since Bedrock quotas are
+per account and region.
+
+Under a budget downgrade (core/usage.py) calls go only to the endpoints that serve the cheaper
+model: those using BEDROCK_MODEL_ID, with USAGE_DOWNGRADE_MODEL_ID, and those listed in
+USAGE_DOWNGRADE_REGIONS (region=model ID, e.g. us-west-2=us.amazon.nova-micro-v1:0).
+
+One request body goes to whichever endpoint is picked, so per-region models must be of the same
+family (Nova or Claude) as BEDROCK_MODEL_ID, and downgrade models as USAGE_DOWNGRADE_MODEL_ID;
+other configurations are rejected when the endpoints are parsed.
+"""
+import json
+import logging
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import boto3
+from botocore.config import Config as BotoConfig
+from botocore.exceptions import BotoCoreError, ClientError
+
+from core.config import Config
+from core.tracing import metrics, span
+
+logger = logging.getLogger(__name__)
+
+THROTTLE_CODES = {"ThrottlingException", "TooManyRequestsException", "ServiceQuotaExceededException"}
+# Worth retrying elsewhere; anything else (validation, access denied) fails the call
+UNAVAILABLE_CODES = {"ServiceUnavailableException", "InternalServerException", "ModelNotReadyException",
+                     "ModelTimeoutException"}
+
+class AIMDLimiter:
+    """Additive-increase/multiplicative-decrease concurrency limit"""
+
+    def __init__(self, initial: float, minimum: float, maximum: float, backoff: float = 0.5):
+        self.limit = float(initial)
+        self.minimum = float(minimum)
+        self.maximum = float(maximum)
+        self.backoff = backoff
+        self.last_decrease = 0.0
+
+    def on_success(self):
+        self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+    def on_throttle(self, started: float, inflight: int):
+        # Calls that were already in flight when the limit last dropped were sent under the
+        # old limit; only throttles of calls sent since then lower it again
+        if started < self.last_decrease:
+            return
+        self.last_decrease = time.monotonic()
+        self.limit = max(self.minimum, min(self.limit, inflight) * self.backoff)
+
+    def capacity(self) -> int:
+        return int(self.limit)
+
+class _Endpoint:
+    def __init__(self, region: str, model_id: str, client, limiter: AIMDLimiter):
+        self.region = region
+        self.model_id = model_id
+        self.client = client
+        self.limiter = limiter
+        self.inflight = 0
+        self.throttles = 0
+        self.unavailable_until = 0.0
+
+    def spare(self) -> float:
+        return 1 - self.inflight / self.limiter.limit
+
+class BedrockPool:
+    def __init__(self, config=None):
+        config = config or Config
+        self.max_attempts = config.BEDROCK_MAX_ATTEMPTS
+        self.failover_seconds = config.BEDROCK_FAILOVER_SECONDS
+        boto_config = BotoConfig(
+            # Throttles are handled here, where they drive the concurrency limit
+            retries={"mode": "standard", "total_max_attempts": 1},
+            max_pool_connections=config.BEDROCK_MAX_CONCURRENCY,
+            connect_timeout=config.BEDROCK_CONNECT_TIMEOUT,
+            read_timeout=config.BEDROCK_READ_TIMEOUT,
+            tcp_keepalive=True
+        )
+        self.endpoints: List[_Endpoint] = []
+        for region, model_id in parse_regions(config):
+            client = boto3.client(
+                "bedrock-runtime",
+                region_name=region,
+                endpoint_url=config.BEDROCK_ENDPOINT_URL.format(region=region) if config.BEDROCK_ENDPOINT_URL else None,
+                config=boto_config
+            )
+            limiter = AIMDLimiter(config.BEDROCK_INITIAL_CONCURRENCY, 1, config.BEDROCK_MAX_CONCURRENCY)
+            self.endpoints.append(_Endpoint(region, model_id, client, limiter))
+        self.lock = threading.Lock()
+        self.available = threading.Condition(self.lock)
+
+    def invoke(self, body: Dict[str, Any], model_ids: Optional[Dict[str, str]] = None) -> Tuple[Dict[str, Any], str]:
+        """InvokeModel on the least-loaded endpoint, retrying throttles and outages on others.
+
+        model_ids maps regions to the model to call there instead of the endpoint's own (e.g. a
+        cheaper one under a budget, see downgrade_models); endpoints it leaves out are skipped.
+        Returns the decoded response body and the region that answered.
+        """
+        regions = {e.region for e in self.endpoints if model_ids is None or e.region in model_ids}
+        if not regions:
+            raise ValueError(f"No Bedrock endpoint in {sorted(model_ids)}")
+        payload = json.dumps(body)
+        tried: Set[str] = set()
+        last_error: Optional[Exception] = None
+        for attempt in range(self.max_attempts):
+            endpoint = self._acquire(tried, regions)
+            tried.add(endpoint.region)
+            started = time.monotonic()
+            endpoint_model_id = model_ids[endpoint.region] if model_ids else endpoint.model_id
+            with span("bedrock.invoke_model", kind='client', model_id=endpoint_model_id,
+                      region=endpoint.region, attempt=attempt + 1) as call:
+                try:
+                    response = endpoint.client.invoke_model(modelId=endpoint_model_id, body=payload)
+                    result = json.loads(response['body'].read())
+                except ClientError as e:
+                    code = e.response.get('Error', {}).get('Code', '')
+                    call.set_error(code or str(e))
+                    if code in THROTTLE_CODES:
+                        self._release(endpoint, started=started, throttled=True)
+                    elif code in UNAVAILABLE_CODES:
+                        self._release(endpoint, unavailable=True)
+                    else:
+                        self._release(endpoint)
+                        raise
+                    last_error = e
+                except BotoCoreError as e:
+                    # Connection and read timeouts
+                    call.set_error(str(e))
+                    self._release(endpoint, unavailable=True)
+                    last_error = e
+                else:
+                    call.set_attribute("request_id", response.get('ResponseMetadata', {}).get('RequestId', ''))
+                    self._release(endpoint)
+                    return result, endpoint.region
+
+            logger.info("⏳ Bedrock %s attempt %d failed: %s", endpoint.region, attempt + 1, last_error)
+            if len(tried) >= len(regions):
+                # Every endpoint has had a go: back off before going round again
+                tried.clear()
+                time.sleep(min(5.0, 0.2 * 2 ** attempt) * random.uniform(0.5, 1.5))
+        logger.warning("❌ Bedrock call failed after %d attempts: %s", self.max_attempts, last_error)
+        raise last_error
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        with self.lock:
+            return [
+                {"region": e.region, "model_id": e.model_id, "limit": round(e.limiter.limit, 2), "inflight": e.inflight,
+                 "throttles": e.throttles, "available": e.unavailable_until <= time.monotonic()}
+                for e in self.endpoints
+            ]
+
+    def _acquire(self, tried: Set[str], regions: Set[str]) -> _Endpoint:
+        endpoints = [e for e in self.endpoints if e.region in regions]
+        with self.lock:
+            while True:
+                now = time.monotonic()
+                up = [e for e in endpoints if e.unavailable_until <= now] or endpoints
+                candidates = [e for e in up if e.region not in tried] or up
+                free = [e for e in candidates if e.inflight < e.limiter.capacity()]
+                if free:
+                    endpoint = max(free, key=_Endpoint.spare)
+                    endpoint.inflight += 1
+                    self._report(endpoint)
+                    return endpoint
+                self.available.wait(0.5)
+
+    def _release(self, endpoint: _Endpoint, started: float = 0.0, throttled: bool = False, unavailable: bool = False):
+        with self.lock:
+            endpoint.inflight -= 1
+            if throttled:
+                endpoint.throttles += 1
+                metrics.increment("followupsync_bedrock_throttles_total", region=endpoint.region)
+                endpoint.limiter.on_throttle(started, endpoint.inflight + 1)
+                logger.info("🐢 Bedrock %s throttled, concurrency limit now %.1f", endpoint.region, endpoint.limiter.limit)
+            elif unavailable:
+                endpoint.unavailable_until = time.monotonic() + self.failover_seconds
+            else:
+                endpoint.limiter.on_success()
+            self._report(endpoint)
+            self.available.notify_all()
+
+    def _report(self, endpoint: _Endpoint):
+        metrics.set_gauge("followupsync_bedrock_concurrency_limit", endpoint.limiter.limit, region=endpoint.region)
+        metrics.set_gauge("followupsync_bedrock_inflight", endpoint.inflight, region=endpoint.region)
+
+def _family(model_id: str) -> str:
+    """Request and response format of a model (nova or claude)"""
+    return "nova" if "nova" in model_id.lower() else "claude"
+
+def _check_family(setting: str, region: str, model_id: str, expected: str):
+    if _family(model_id) != _family(expected):
+        raise ValueError(f"{setting}: {region}={model_id} is not a {_family(expected)} model like {expected}; "
+                         f"one request body cannot serve both")
+
+def parse_regions(config) -> List[Tuple[str, str]]:
+    """(region, model ID) of every configured endpoint"""
+    endpoints = []
+    for entry in config.BEDROCK_REGIONS or [config.BEDROCK_REGION]:
+        region, _, model_id = entry.partition("=")
+        region, model_id = region.strip(), model_id.strip() or config.BEDROCK_MODEL_ID
+        _check_family("BEDROCK_REGIONS", region, model_id, config.BEDROCK_MODEL_ID)
+        endpoints.append((region, model_id))
+    return endpoints
+
+def downgrade_models(config) -> Dict[str, str]:
+    """Region -> model ID of the endpoints that can serve USAGE_DOWNGRADE_MODEL_ID.
+
+    An endpoint with its own model or inference profile in BEDROCK_REGIONS may not serve the
+    downgrade model under that ID, so it is left out unless USAGE_DOWNGRADE_REGIONS names its
+    downgrade model.
+    """
+    listed = {}
+    for entry in config.USAGE_DOWNGRADE_REGIONS:
+        region, _, model_id = entry.partition("=")
+        region, model_id = region.strip(), model_id.strip() or config.USAGE_DOWNGRADE_MODEL_ID
+        _check_family("USAGE_DOWNGRADE_REGIONS", region, model_id, config.USAGE_DOWNGRADE_MODEL_ID)
+        listed[region] = model_id
+    models = {}
+    for region, model_id in parse_regions(config):
+        if region in listed:
+            models[region] = listed[region]
+        elif model_id == config.BEDROCK_MODEL_ID:
+            models[region] = config.USAGE_DOWNGRADE_MODEL_ID
+    return models
+
+_pools: Dict[tuple, BedrockPool] = {}
+_pools_lock = threading.Lock()
+
+def bedrock_pool(config=None) -> BedrockPool:
+    """The process-wide pool for a configuration's endpoints"""
+    config = config or Config
+    key = (tuple(parse_regions(config)), config.BEDROCK_ENDPOINT_URL)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = BedrockPool(config)
+        return _pools[key]
@@ -0,0 +1,162 @@
+"""Per-service circuit breakers for the MCP servers.
+
+After CIRCUIT_FAILURE_THRESHOLD consecutive failures a breaker opens and calls to that
+service fail immediately instead of each waiting for a timeout. While open, the health
+monitor probes the server's /health endpoint; once it answers (or CIRCUIT_RESET_SECONDS
+pass) the breaker goes half-open and lets a single trial call through, which closes it
+again on success.
+
+Breakers are process-wide, so their state survives Pipeline and MCPClient instances. There is
+one per service and server URL: tenants pointing a service at different servers do not share
+a circuit.
+"""
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional, Set, Tuple
+
+import requests
+
+from core.config import Config
+from core.tracing import metrics
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitBreaker:
+    def __init__(self, name: str, base_url: str = None, failure_threshold: int = None, reset_seconds: float = None):
+        self.name = name
+        self.base_url = base_url
+        self.failure_threshold = failure_threshold or Config.CIRCUIT_FAILURE_THRESHOLD
+        self.reset_seconds = Config.CIRCUIT_RESET_SECONDS if reset_seconds is None else reset_seconds
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.trial_in_flight = False
+        self.lock = threading.Lock()
+        # Called when a health probe finds the server back, e.g. to replay queued work (which
+        # then serves as the half-open trial); keyed so re-registering a hook replaces it
+        self.on_recovery: Dict[str, Callable[["CircuitBreaker"], None]] = {}
+
+    def allow(self) -> bool:
+        """Whether a call may go out now; in half-open state only one trial call at a time"""
+        with self.lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self._set_state(HALF_OPEN)
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            if self.state != CLOSED:
+                logger.info("✅ %s circuit closed", self.name)
+            self.failures = 0
+            self.trial_in_flight = False
+            self._set_state(CLOSED)
+
+    def record_failure(self, error: str):
+        with self.lock:
+            self.failures += 1
+            self.last_error = error
+            self.trial_in_flight = False
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    logger.warning("🔌 %s circuit opened after %s failure(s): %s", self.name, self.failures, error)
+                self.opened_at = time.monotonic()
+                self._set_state(OPEN)
+
+    def mark_healthy(self):
+        """A health probe succeeded: let the next call through as a trial"""
+        with self.lock:
+            if self.state != OPEN:
+                return
+            self._set_state(HALF_OPEN)
+        logger.info("🩺 %s MCP server is answering health checks again", self.name)
+        for callback in list(self.on_recovery.values()):
+            threading.Thread(target=callback, args=(self,), daemon=True).start()
+
+    def snapshot(self) -> Dict[str, object]:
+        with self.lock:
+            retry_in = None
+            if self.state == OPEN:
+                retry_in = max(0.0, self.reset_seconds - (time.monotonic() - self.opened_at))
+            return {
+                "state": self.state,
+                "failures": self.failures,
+                "last_error": self.last_error,
+                "retry_in_seconds": retry_in
+            }
+
+    def _set_state(self, state: str):
+        self.state = state
+        metrics.set_gauge("followupsync_circuit_open", 1 if state == OPEN else 0, service=self.name,
+                          url=self.base_url or "")
+
+breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+def breaker(service: str, base_url: str) -> CircuitBreaker:
+    """The breaker of a service's MCP server at base_url"""
+    key = (service, base_url)
+    with _breakers_lock:
+        if key not in breakers:
+            breakers[key] = CircuitBreaker(service, base_url)
+        return breakers[key]
+
+class HealthMonitor:
+    """Probes the /health endpoint of every registered server whose breaker is open"""
+
+    def __init__(self, base_urls: Dict[str, str] = None, interval: float = None):
+        # (service, base_url) pairs; every MCPClient registers its own with add()
+        self.targets: Set[Tuple[str, str]] = set()
+        self.targets_lock = threading.Lock()
+        self.add(base_urls or {})
+        self.interval = Config.CIRCUIT_PROBE_SECONDS if interval is None else interval
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="mcp-health-monitor", daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+
+    def add(self, base_urls: Dict[str, str]):
+        with self.targets_lock:
+            self.targets.update(base_urls.items())
+
+    def probe(self, base_url: str) -> bool:
+        try:
+            response = requests.get(f"{base_url}/health", timeout=Config.MCP_CONNECT_TIMEOUT)
+            return response.status_code == 200
+        except requests.RequestException:
+            return False
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            with self.targets_lock:
+                targets = list(self.targets)
+            for service, base_url in targets:
+                current = breaker(service, base_url)
+                if current.state == OPEN and self.probe(base_url):
+                    current.mark_healthy()
+
+_monitor: Optional[HealthMonitor] = None
+
+def start_health_monitor(base_urls: Dict[str, str]) -> HealthMonitor:
+    """Start the process-wide health monitor once and have it probe these servers too"""
+    global _monitor
+    with _breakers_lock:
+        if _monitor is None:
+            _monitor = HealthMonitor()
+            _monitor.start()
+    _monitor.add(base_urls)
+    return _monitor
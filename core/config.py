@@ -1,14 +1,36 @@
 import os
+import re
+import logging
+import threading
+from typing import Optional
 from dotenv import load_dotenv
 
 load_dotenv()
 
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO"),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+)
+
 class Config:
     MODE = os.getenv("MODE", "local")
     
     # Bedrock
     BEDROCK_REGION = os.getenv("BEDROCK_REGION", "us-east-1")
     BEDROCK_MODEL_ID = os.getenv("BEDROCK_MODEL_ID", "amazon.nova-micro-v1:0")
+    # Override to point at a local stub (see bench/stubs.py); "{region}" is replaced per region
+    BEDROCK_ENDPOINT_URL = os.getenv("BEDROCK_ENDPOINT_URL")
+    # Regions to spread calls over (core/bedrock.py), each optionally "region=model ID" for an
+    # inference profile; defaults to BEDROCK_REGION
+    BEDROCK_REGIONS = [r.strip() for r in os.getenv("BEDROCK_REGIONS", "").split(",") if r.strip()]
+    # Concurrent calls per region: starting point and ceiling of the adaptive limit
+    BEDROCK_INITIAL_CONCURRENCY = int(os.getenv("BEDROCK_INITIAL_CONCURRENCY", "4"))
+    BEDROCK_MAX_CONCURRENCY = int(os.getenv("BEDROCK_MAX_CONCURRENCY", "32"))
+    BEDROCK_MAX_ATTEMPTS = int(os.getenv("BEDROCK_MAX_ATTEMPTS", "6"))
+    # How long a region that failed with a server or connection error is skipped
+    BEDROCK_FAILOVER_SECONDS = float(os.getenv("BEDROCK_FAILOVER_SECONDS", "30"))
+    BEDROCK_CONNECT_TIMEOUT = float(os.getenv("BEDROCK_CONNECT_TIMEOUT", "5"))
+    BEDROCK_READ_TIMEOUT = float(os.getenv("BEDROCK_READ_TIMEOUT", "120"))
     
     # Slack
     SLACK_BOT_TOKEN = os.getenv("SLACK_BOT_TOKEN")
@@ -26,8 +48,155 @@ class Config:
     
     # AWS
     S3_BUCKET = os.getenv("S3_BUCKET")
+    # Also look up runs without a ULID under the old followupsync/{run_id}/ layout; turn off
+    # once they are moved (python -m core.migrate_runs)
+    S3_LEGACY_FALLBACK = os.getenv("S3_LEGACY_FALLBACK", "true").lower() == "true"
     MCP_AUTH_TOKEN = os.getenv("MCP_AUTH_TOKEN", "change-me")
     
+    # MCP servers
+    MCP_SLACK_URL = os.getenv("MCP_SLACK_URL", "http://localhost:8001")
+    MCP_NOTION_URL = os.getenv("MCP_NOTION_URL", "http://localhost:8002")
+    MCP_JIRA_URL = os.getenv("MCP_JIRA_URL", "http://localhost:8003")
+    # "http": REST call per tool to the servers above; "mcp": MCP sessions over streamable HTTP
+    # to the same servers; "stdio": MCP sessions with servers started as subprocesses;
+    # "inprocess": run the handlers inside this process
+    MCP_TRANSPORT = os.getenv("MCP_TRANSPORT", "http")
+    # Connecting to a local MCP server is fast or it is down; reading may wait on the SaaS API
+    MCP_CONNECT_TIMEOUT = float(os.getenv("MCP_CONNECT_TIMEOUT", "2"))
+    MCP_READ_TIMEOUT = float(os.getenv("MCP_READ_TIMEOUT", "30"))
+    CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "3"))
+    CIRCUIT_RESET_SECONDS = float(os.getenv("CIRCUIT_RESET_SECONDS", "30"))
+    CIRCUIT_PROBE_SECONDS = float(os.getenv("CIRCUIT_PROBE_SECONDS", "5"))
+    # Deliveries that failed because a service was unavailable, kept for replay
+    OUTBOX_DIR = os.getenv("OUTBOX_DIR", "data/outbox")
+    
+    # Digest mode (core/digest.py): runs are queued per set of integrations and delivered
+    # together once DIGEST_MAX_RUNS are queued or DIGEST_INTERVAL_MINUTES after the first
+    DIGEST_ENABLED = os.getenv("DIGEST_ENABLED", "false").lower() == "true"
+    DIGEST_DIR = os.getenv("DIGEST_DIR", "data/digests")
+    DIGEST_INTERVAL_MINUTES = float(os.getenv("DIGEST_INTERVAL_MINUTES", "240"))
+    DIGEST_MAX_RUNS = int(os.getenv("DIGEST_MAX_RUNS", "20"))
+    
+    # Status sync (core/status.py): Notion/Jira status of delivered items, pulled incrementally
+    STATUS_SYNC_ENABLED = os.getenv("STATUS_SYNC_ENABLED", "false").lower() == "true"
+    STATUS_DIR = os.getenv("STATUS_DIR", "data/status")
+    STATUS_SYNC_INTERVAL_SECONDS = float(os.getenv("STATUS_SYNC_INTERVAL_SECONDS", "300"))
+    # Jira polling interval while webhooks are arriving, to catch up on missed ones
+    STATUS_SYNC_FALLBACK_SECONDS = float(os.getenv("STATUS_SYNC_FALLBACK_SECONDS", "3600"))
+    # How far back the first sync looks, and how much each sync re-reads before its cursor
+    # (Notion edit times are rounded to the minute)
+    STATUS_SYNC_LOOKBACK_DAYS = int(os.getenv("STATUS_SYNC_LOOKBACK_DAYS", "30"))
+    STATUS_SYNC_OVERLAP_SECONDS = float(os.getenv("STATUS_SYNC_OVERLAP_SECONDS", "120"))
+    # Shared secret of the Jira webhook (X-Hub-Signature), required to accept its events
+    JIRA_WEBHOOK_SECRET = os.getenv("JIRA_WEBHOOK_SECRET")
+    
+    # Follow-up reminders (core/reminders.py): Slack nudges at REMINDER_HOUR on each item's due
+    # date shifted by each offset, e.g. -24 = the day before, 72 = three days late
+    REMINDERS_ENABLED = os.getenv("REMINDERS_ENABLED", "false").lower() == "true"
+    REMINDERS_DIR = os.getenv("REMINDERS_DIR", "data/reminders")
+    REMINDER_HOUR = int(os.getenv("REMINDER_HOUR", "9"))
+    REMINDER_OFFSETS_HOURS = [float(h) for h in os.getenv("REMINDER_OFFSETS_HOURS", "-24,0,24,72").split(",") if h.strip()]
+    REMINDER_RETRY_SECONDS = float(os.getenv("REMINDER_RETRY_SECONDS", "300"))
+    
+    # Owner directory (core/directory.py)
+    DIRECTORY_TTL_SECONDS = float(os.getenv("DIRECTORY_TTL_SECONDS", "3600"))
+    DIRECTORY_ALIASES_PATH = os.getenv("DIRECTORY_ALIASES_PATH", "content/directory_aliases.json")
+    
+    # Grounding (core/grounding.py): items whose text cannot be found in the transcript with at
+    # least this score are "flag"ged (kept, not sent to Notion/Jira), "drop"ped, or "off"
+    GROUNDING_POLICY = os.getenv("GROUNDING_POLICY", "flag")
+    GROUNDING_MIN_SCORE = float(os.getenv("GROUNDING_MIN_SCORE", "0.6"))
+    
+    # Artifacts rendered besides Summary.md (markdown, html, csv, ics, jira_csv; see core/render.py),
+    # and a directory of templates that replace the built-in ones in content/templates
+    ARTIFACT_FORMATS = [f.strip() for f in os.getenv("ARTIFACT_FORMATS", "html,csv,ics,jira_csv").split(",") if f.strip()]
+    ARTIFACT_TEMPLATES_DIR = os.getenv("ARTIFACT_TEMPLATES_DIR") or None
+    
+    # Columnar analytics store (core/analytics.py), appended to whenever artifacts are saved
+    ANALYTICS_ENABLED = os.getenv("ANALYTICS_ENABLED", "true").lower() == "true"
+    ANALYTICS_DIR = os.getenv("ANALYTICS_DIR", "data/analytics")
+    
+    # Sampling profiler (core/profiling.py): share of processing/delivery calls profiled, with
+    # the profile saved next to the run's outputs, and how often the stack is sampled
+    PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+    PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "10"))
+    
+    # Ingestion service
+    INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "4"))
+    INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "100"))
+    INGEST_JOB_RETENTION = int(os.getenv("INGEST_JOB_RETENTION", "10000"))
+    
+    # Watch-folder daemon (python -m core.watcher)
+    WATCH_DIRS = [d for d in os.getenv("WATCH_DIRS", "").split(os.pathsep) if d]
+    WATCH_PATTERNS = os.getenv("WATCH_PATTERNS", "*.txt").split(",")
+    WATCH_SETTLE_SECONDS = float(os.getenv("WATCH_SETTLE_SECONDS", "1.0"))
+    WATCH_WORKERS = int(os.getenv("WATCH_WORKERS", "4"))
+    WATCH_QUEUE_SIZE = int(os.getenv("WATCH_QUEUE_SIZE", "200"))
+    WATCH_CURSOR_PATH = os.getenv("WATCH_CURSOR_PATH", "data/watch_cursor.json")
+    
+    # Tenants sharing this deployment. Each is configured by TENANT_<ID>_<SETTING> variables
+    # on top of the settings above, e.g. TENANT_MARKETING_SLACK_BOT_TOKEN (see for_tenant)
+    TENANTS = [t.strip() for t in os.getenv("TENANTS", "").split(",") if t.strip()]
+    TENANT = None
+    # A tenant's share of the shared worker pool relative to other tenants, and the most jobs
+    # it may run at once (0 = no limit)
+    WORKER_WEIGHT = float(os.getenv("WORKER_WEIGHT", "1"))
+    WORKER_MAX_CONCURRENCY = int(os.getenv("WORKER_MAX_CONCURRENCY", "0"))
+    # Bedrock tokens (estimated prompt + completion) a tenant may use per minute (0 = no limit)
+    BEDROCK_TOKENS_PER_MINUTE = int(os.getenv("BEDROCK_TOKENS_PER_MINUTE", "0"))
+    
+    # Bedrock usage accounting (core/usage.py): tokens and estimated cost of every extraction;
+    # each tenant's store is in a subdirectory (see for_tenant)
+    USAGE_DIR = os.getenv("USAGE_DIR", "data/usage")
+    # Spend limits in USD (0 = none), per tenant with TENANT_<ID>_USAGE_DAILY_BUDGET_USD etc.
+    # Past USAGE_DOWNGRADE_AT of either, extraction moves to USAGE_DOWNGRADE_MODEL_ID if set;
+    # past the limit, to local extraction
+    USAGE_DAILY_BUDGET_USD = float(os.getenv("USAGE_DAILY_BUDGET_USD", "0"))
+    USAGE_MONTHLY_BUDGET_USD = float(os.getenv("USAGE_MONTHLY_BUDGET_USD", "0"))
+    USAGE_DOWNGRADE_AT = float(os.getenv("USAGE_DOWNGRADE_AT", "0.8"))
+    USAGE_DOWNGRADE_MODEL_ID = os.getenv("USAGE_DOWNGRADE_MODEL_ID") or None
+    # Downgrade model of BEDROCK_REGIONS entries with their own model or inference profile, as
+    # region=model ID; such regions are skipped while downgraded unless listed here
+    USAGE_DOWNGRADE_REGIONS = [r.strip() for r in os.getenv("USAGE_DOWNGRADE_REGIONS", "").split(",") if r.strip()]
+    
+    @classmethod
+    def for_tenant(cls, tenant: Optional[str]) -> type:
+        """Configuration of one tenant, as a Config subclass used exactly like Config.
+
+        TENANT_<ID>_<SETTING> variables override the deployment defaults; the outbox, digests,
+        status store, reminders, analytics and usage stores move to per-tenant subdirectories and
+        the watch cursor to a per-tenant file, unless set explicitly.
+        """
+        if not tenant:
+            return cls
+        if not re.fullmatch(r'[A-Za-z0-9_-]+', tenant) or (cls.TENANTS and tenant not in cls.TENANTS):
+            raise ValueError(f"Unknown tenant: {tenant}")
+        with _tenants_lock:
+            key = (cls, tenant)
+            if key not in _tenant_configs:
+                prefix = f"TENANT_{tenant.upper().replace('-', '_')}_"
+                cursor_root, cursor_ext = os.path.splitext(cls.WATCH_CURSOR_PATH)
+                settings = {
+                    "TENANT": tenant,
+                    "OUTBOX_DIR": f"{cls.OUTBOX_DIR}/{tenant}",
+                    "DIGEST_DIR": f"{cls.DIGEST_DIR}/{tenant}",
+                    "STATUS_DIR": f"{cls.STATUS_DIR}/{tenant}",
+                    "REMINDERS_DIR": f"{cls.REMINDERS_DIR}/{tenant}",
+                    "ANALYTICS_DIR": f"{cls.ANALYTICS_DIR}/{tenant}",
+                    "USAGE_DIR": f"{cls.USAGE_DIR}/{tenant}",
+                    "WATCH_CURSOR_PATH": f"{cursor_root}_{tenant}{cursor_ext}",
+                }
+                for name in dir(cls):
+                    if name.isupper() and prefix + name in os.environ:
+                        settings[name] = _coerce(os.environ[prefix + name], getattr(cls, name))
+                _tenant_configs[key] = type(f"Config_{tenant}", (cls,), settings)
+            return _tenant_configs[key]
+    
+    @classmethod
+    def override(cls, **settings) -> type:
+        """This configuration with some settings replaced, e.g. Config.override(MODE="local")"""
+        return type(cls.__name__, (cls,), settings)
+    
     @classmethod
     def is_aws_mode(cls):
         return cls.MODE == "aws"
@@ -42,4 +211,20 @@ class Config:
     
     @classmethod
     def has_jira_config(cls):
-        return bool(cls.JIRA_BASE_URL and cls.JIRA_EMAIL and cls.JIRA_API_TOKEN)
\ No newline at end of file
+        return bool(cls.JIRA_BASE_URL and cls.JIRA_EMAIL and cls.JIRA_API_TOKEN)
+
+_tenant_configs = {}
+_tenants_lock = threading.Lock()
+
+def _coerce(value: str, default):
+    """Parse an environment value as the type of the setting it overrides"""
+    if isinstance(default, bool):
+        return value.lower() == "true"
+    if isinstance(default, int):
+        return int(value)
+    if isinstance(default, float):
+        return float(value)
+    if isinstance(default, list):
+        values = [v for v in value.split(",") if v]
+        return [float(v) for v in values] if default and isinstance(default[0], float) else values
+    return value
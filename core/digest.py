@@ -0,0 +1,222 @@
+"""Digest delivery: many runs batched into one consolidated delivery.
+
+With DIGEST_ENABLED, a processed run is queued instead of being delivered on its own. Runs
+bound for the same integrations (Slack channel, Notion, Jira) collect in one digest,
+{DIGEST_DIR}/{key}.json, which is delivered once it holds DIGEST_MAX_RUNS runs or
+DIGEST_INTERVAL_MINUTES after its first run, whichever comes first:
+
+- one Slack post (overflow goes in its thread) instead of one per meeting, with action items
+  grouped by owner and then by due date;
+- an item raised in several meetings is delivered once, noting the meetings it came from;
+- owners are resolved once for the whole digest.
+
+    python -m core.digest status
+    python -m core.digest flush [--all] [--tenant marketing]
+
+Digests are flushed by the ingestion service as they come due; elsewhere, run `flush` from
+cron.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from core.config import Config
+from core.ids import content_hash
+from core.schema import ExtractionResult
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+
+PRIORITY_RANK = {"Low": 0, "Medium": 1, "High": 2}
+
+def digest_key(integrations: Dict[str, Any]) -> str:
+    """Name of the digest shared by every run sent to the same integrations"""
+    canonical = json.dumps(integrations, sort_keys=True, default=str)
+    slack = integrations.get('slack') or {}
+    label = (slack.get('channel') or '').lstrip('#@') if isinstance(slack, dict) else ''
+    digest = hashlib.sha1(canonical.encode('utf-8')).hexdigest()[:10]
+    return f"{label}-{digest}" if label else digest
+
+class DigestQueue:
+    """Runs waiting to be delivered together, kept on disk like the outbox.
+
+    One file per digest, {DIGEST_DIR}/{key}.json, holding the integrations it goes to, when
+    its first run was queued and the result of every run, in the order they were queued.
+    """
+
+    def __init__(self, directory: str = None):
+        self.directory = Path(directory or Config.DIGEST_DIR)
+
+    def add(self, result: ExtractionResult, integrations: Dict[str, Any]) -> Dict[str, Any]:
+        key = digest_key(integrations)
+        with _lock:
+            entry = self._read(key) or {
+                "key": key,
+                "integrations": integrations,
+                "opened_at": datetime.now(timezone.utc).isoformat(),
+                "runs": {}
+            }
+            # Re-queuing a run (e.g. after an edit) replaces its earlier result
+            entry["runs"][result.run_id] = result.model_dump(mode='json')
+            self._write(key, entry)
+        return entry
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with _lock:
+            return self._read(key)
+
+    def remove(self, key: str, run_ids: Iterable[str]):
+        """Drop delivered runs; runs queued meanwhile stay for the next digest"""
+        with _lock:
+            entry = self._read(key)
+            if not entry:
+                return
+            for run_id in run_ids:
+                entry["runs"].pop(run_id, None)
+            if entry["runs"]:
+                entry["opened_at"] = datetime.now(timezone.utc).isoformat()
+                self._write(key, entry)
+            else:
+                os.remove(self._path(key))
+
+    def entries(self) -> List[Dict[str, Any]]:
+        if not self.directory.exists():
+            return []
+        with _lock:
+            return [json.loads(path.read_text(encoding='utf-8')) for path in sorted(self.directory.glob("*.json"))]
+
+    def pending(self) -> Dict[str, int]:
+        """Number of queued runs per digest"""
+        return {entry["key"]: len(entry["runs"]) for entry in self.entries()}
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def _read(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        return json.loads(path.read_text(encoding='utf-8')) if path.exists() else None
+
+    def _write(self, key: str, entry: Dict[str, Any]):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp = self._path(key).with_suffix('.tmp')
+        tmp.write_text(json.dumps(entry, indent=2), encoding='utf-8')
+        os.replace(tmp, self._path(key))
+
+def is_due(entry: Dict[str, Any], interval_minutes: float, max_runs: int, now: datetime = None) -> bool:
+    """Whether a digest is full, or has waited long enough since its first run"""
+    if len(entry["runs"]) >= max_runs:
+        return True
+    opened_at = datetime.fromisoformat(entry["opened_at"])
+    return (now or datetime.now(timezone.utc)) - opened_at >= timedelta(minutes=interval_minutes)
+
+def build_digest(entry: Dict[str, Any]) -> ExtractionResult:
+    """One result holding the items of every queued run, each item once.
+
+    Items are matched across meetings by their text. A repeated action item keeps its first
+    owner, its earliest due date and its highest priority, and notes every meeting it was
+    raised in; it is grounded if any meeting supports it.
+    """
+    run_ids = list(entry["runs"])
+    decisions: Dict[str, Any] = {}
+    action_items: Dict[str, Any] = {}
+    risks: Dict[str, Any] = {}
+    meetings: Dict[str, List[str]] = {}
+
+    for run_id in run_ids:
+        result = ExtractionResult.model_validate(entry["runs"][run_id])
+        for decision in result.decisions:
+            key = content_hash(decision.text)
+            kept = decisions.setdefault(key, decision)
+            for owner in decision.owners:
+                if owner not in kept.owners:
+                    kept.owners.append(owner)
+        for risk in result.risks:
+            key = content_hash(risk.text)
+            kept = risks.setdefault(key, risk)
+            if PRIORITY_RANK.get(risk.severity, 1) > PRIORITY_RANK.get(kept.severity, 1):
+                kept.severity = risk.severity
+            kept.mitigation = kept.mitigation or risk.mitigation
+        for item in result.action_items:
+            key = content_hash(item.title)
+            sources = meetings.setdefault(key, [])
+            if run_id not in sources:
+                sources.append(run_id)
+            kept = action_items.setdefault(key, item)
+            if kept is item:
+                continue
+            kept.owner = kept.owner or item.owner
+            if item.due_date and (not kept.due_date or item.due_date < kept.due_date):
+                kept.due_date = item.due_date
+            if PRIORITY_RANK.get(item.priority, 1) > PRIORITY_RANK.get(kept.priority, 1):
+                kept.priority = item.priority
+            kept.notes = kept.notes or item.notes
+            if item.source and item.source.grounded and kept.source and not kept.source.grounded:
+                kept.source = item.source
+
+    for key, item in action_items.items():
+        if len(meetings[key]) > 1:
+            raised = f"Raised in meetings: {', '.join(meetings[key])}"
+            item.notes = f"{item.notes}\n{raised}" if item.notes else raised
+
+    opened_at = datetime.fromisoformat(entry["opened_at"])
+    summary = [f"# Meeting Digest - {len(run_ids)} meetings", ""] + [f"- {run_id}" for run_id in run_ids]
+    return ExtractionResult(
+        # Stable for the batch, so re-delivering it (outbox, retries) updates rather than duplicates
+        run_id=f"digest-{entry['key']}-{opened_at:%Y%m%d%H%M%S}",
+        decisions=list(decisions.values()),
+        action_items=list(action_items.values()),
+        risks=list(risks.values()),
+        summary_md="\n".join(summary) + "\n",
+        sources=run_ids
+    )
+
+class DigestScheduler:
+    """Background thread that delivers digests as they come due"""
+
+    def __init__(self, pipelines: Callable[[], Iterable[Any]], interval_seconds: float = 60):
+        self.pipelines = pipelines
+        self.interval_seconds = interval_seconds
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="digest-scheduler", daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+
+    def _run(self):
+        while not self.stopped.wait(self.interval_seconds):
+            for pipeline in self.pipelines():
+                try:
+                    pipeline.flush_digests()
+                except Exception:
+                    logger.exception("Digest flush failed")
+
+def main():
+    from core.pipeline import Pipeline
+
+    parser = argparse.ArgumentParser(description="Deliver queued digests")
+    parser.add_argument("command", choices=["status", "flush"])
+    parser.add_argument("--all", action="store_true", help="Flush every digest, not only those that are due")
+    parser.add_argument("--tenant", help="One of TENANTS; the default configuration when omitted")
+    args = parser.parse_args()
+
+    pipeline = Pipeline(Config.for_tenant(args.tenant))
+    if args.command == "status":
+        for entry in pipeline.digests.entries():
+            due = is_due(entry, pipeline.config.DIGEST_INTERVAL_MINUTES, pipeline.config.DIGEST_MAX_RUNS)
+            print(f"{entry['key']}: {len(entry['runs'])} run(s) since {entry['opened_at']}{' (due)' if due else ''}")
+        return
+    delivered = pipeline.flush_digests(force=args.all)
+    print(f"Delivered {len(delivered)} digest(s)")
+
+if __name__ == "__main__":
+    main()
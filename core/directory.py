@@ -0,0 +1,196 @@
+"""Owner name resolution for Slack mentions, Jira assignees and Notion people.
+
+The directory is built from one bulk user-list call per service and kept in memory for
+DIRECTORY_TTL_SECONDS. Once it is stale, lookups keep using it while a background thread
+rebuilds it, so delivery never waits on a user lookup after the first load. There is one
+directory per tenant and process (see directory()), so it outlives Pipeline instances, e.g.
+across Streamlit reruns.
+
+An optional aliases file maps names as they are spoken in meetings to directory names, or
+straight to IDs:
+
+    {"Bob": "Robert Smith", "PM": {"slack": "U024BE7LH", "jira": "5b10ac8d82e05b22cc7d4ef5"}}
+"""
+import difflib
+import json
+import logging
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from core.config import Config
+from core.tracing import span
+
+logger = logging.getLogger(__name__)
+
+SERVICES = ('slack', 'jira', 'notion')
+# Minimum difflib ratio for a fuzzy match; below this an owner stays unresolved
+MATCH_CUTOFF = 0.85
+
+def normalize_name(name: str) -> str:
+    return re.sub(r'[^a-z0-9@.]+', ' ', name.lower()).strip()
+
+class _ServiceIndex:
+    """Normalized names of one service's users -> user ID"""
+
+    def __init__(self, users: List[Dict[str, Optional[str]]]):
+        self.ids: Dict[str, str] = {}
+        ambiguous = set()
+        first_names: Dict[str, set] = {}
+        for user in users:
+            for key in self._keys(user):
+                if self.ids.get(key, user['id']) != user['id']:
+                    ambiguous.add(key)
+                self.ids.setdefault(key, user['id'])
+            full_name = normalize_name(user.get('name') or '')
+            if ' ' in full_name:
+                first_names.setdefault(full_name.split()[0], set()).add(user['id'])
+        # A bare first name only resolves when a single user has it
+        for first, ids in first_names.items():
+            if len(ids) > 1:
+                ambiguous.add(first)
+            else:
+                self.ids.setdefault(first, next(iter(ids)))
+        for key in ambiguous:
+            self.ids.pop(key, None)
+        self.keys = list(self.ids)
+
+    @staticmethod
+    def _keys(user: Dict[str, Optional[str]]) -> Iterable[str]:
+        for field in ('name', 'display_name', 'handle', 'email'):
+            value = normalize_name(user.get(field) or '')
+            if value:
+                yield value
+        email = user.get('email')
+        if email:
+            yield normalize_name(email.split('@')[0].replace('.', ' '))
+
+    def lookup(self, key: str) -> Optional[str]:
+        if key in self.ids:
+            return self.ids[key]
+        match = difflib.get_close_matches(key, self.keys, n=1, cutoff=MATCH_CUTOFF)
+        return self.ids[match[0]] if match else None
+
+class Directory:
+    def __init__(self, mcp_client, ttl_seconds: float = None, aliases_path: str = None):
+        self.mcp_client = mcp_client
+        self.ttl_seconds = Config.DIRECTORY_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.aliases_path = Path(aliases_path or Config.DIRECTORY_ALIASES_PATH)
+        self.indexes: Dict[str, _ServiceIndex] = {}
+        self.aliases: Dict[str, object] = {}
+        # name -> resolved IDs, valid for the current index generation
+        self.resolved: Dict[str, Dict[str, Optional[str]]] = {}
+        self.loaded_at: Optional[float] = None
+        self.lock = threading.Lock()
+        self.load_lock = threading.Lock()
+        self.refreshing = False
+
+    def resolve(self, name: Optional[str]) -> Dict[str, Optional[str]]:
+        """IDs of `name` in each service; a service maps to None when it has no clear match"""
+        if not name:
+            return dict.fromkeys(SERVICES)
+        self._ensure_fresh()
+        with self.lock:
+            cached = self.resolved.get(name)
+            if cached is None:
+                cached = self.resolved[name] = self._match(name)
+            return dict(cached)
+
+    def resolve_all(self, names: Iterable[Optional[str]]) -> Dict[str, Dict[str, Optional[str]]]:
+        return {name: self.resolve(name) for name in set(names) if name}
+
+    def refresh(self):
+        """Rebuild the index from the services' bulk user lists"""
+        with span("directory.refresh") as refresh_span:
+            listings = {
+                'slack': self.mcp_client.list_slack_users,
+                'jira': self.mcp_client.list_jira_users,
+                'notion': self.mcp_client.list_notion_users,
+            }
+            indexes = {}
+            for service, list_users in listings.items():
+                response = list_users()
+                if response.get('error'):
+                    # Keep the last good index of a service that is temporarily failing
+                    logger.info("Directory: no %s users (%s)", service, response['error'])
+                    if service in self.indexes:
+                        indexes[service] = self.indexes[service]
+                    continue
+                users = response.get('users', [])
+                if service == 'jira':
+                    users = [{**u, 'id': u['account_id']} for u in users]
+                elif service == 'slack':
+                    users = [
+                        {**u, 'name': u.get('real_name'), 'handle': u.get('name')}
+                        for u in users
+                    ]
+                indexes[service] = _ServiceIndex(users)
+                refresh_span.set_attribute(f"{service}.users", len(users))
+            aliases = self._load_aliases()
+
+        with self.lock:
+            self.indexes = indexes
+            self.aliases = aliases
+            self.resolved = {}
+            self.loaded_at = time.monotonic()
+
+    def _ensure_fresh(self):
+        if self.loaded_at is None:
+            # The first load is the only one callers wait for
+            with self.load_lock:
+                if self.loaded_at is None:
+                    self.refresh()
+            return
+        if time.monotonic() - self.loaded_at < self.ttl_seconds:
+            return
+        with self.lock:
+            if self.refreshing:
+                return
+            self.refreshing = True
+        threading.Thread(target=self._refresh_in_background, name="directory-refresh", daemon=True).start()
+
+    def _refresh_in_background(self):
+        try:
+            self.refresh()
+        except Exception:
+            logger.exception("Directory refresh failed")
+        finally:
+            self.refreshing = False
+
+    def _load_aliases(self) -> Dict[str, object]:
+        if not self.aliases_path.exists():
+            return {}
+        try:
+            raw = json.loads(self.aliases_path.read_text(encoding='utf-8'))
+        except ValueError as e:
+            logger.warning("Ignoring invalid aliases file %s: %s", self.aliases_path, e)
+            return {}
+        return {normalize_name(alias): target for alias, target in raw.items()}
+
+    def _match(self, name: str) -> Dict[str, Optional[str]]:
+        key = normalize_name(name)
+        alias = self.aliases.get(key)
+        if isinstance(alias, dict):
+            # Pinned IDs win; services the alias leaves out fall back to the name itself
+            ids = {service: alias.get(service) for service in SERVICES}
+        else:
+            ids = dict.fromkeys(SERVICES)
+            if isinstance(alias, str):
+                key = normalize_name(alias)
+        for service in SERVICES:
+            if ids[service] is None and service in self.indexes:
+                ids[service] = self.indexes[service].lookup(key)
+        return ids
+
+_directories: Dict[tuple, Directory] = {}
+_directories_lock = threading.Lock()
+
+def directory(config, mcp_client) -> Directory:
+    """The process-wide directory of a configuration's tenant; mcp_client serves its first load"""
+    key = (config.TENANT, config.DIRECTORY_TTL_SECONDS, config.DIRECTORY_ALIASES_PATH)
+    with _directories_lock:
+        if key not in _directories:
+            _directories[key] = Directory(mcp_client, config.DIRECTORY_TTL_SECONDS, config.DIRECTORY_ALIASES_PATH)
+        return _directories[key]
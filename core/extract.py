@@ -1,29 +1,171 @@
 import json
+import logging
 import re
-from typing import Dict, Any
-from datetime import datetime
-from core.schema import ExtractionResult, Decision, ActionItem, Risk
+import threading
+import time
+from typing import Dict, Any, Iterable, Iterator, Optional
+from datetime import datetime, timedelta
+from core.schema import ExtractionResult, Usage
 from core.config import Config
+from core.tracing import span
+from core.usage import budget_model, usage_from_response
+from core.workers import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# Longest excerpt of a model response written to debug logs
+LOG_EXCERPT_CHARS = 500
+
+# Completion tokens requested from Bedrock, also reserved against a tenant's token quota
+MAX_TOKENS = 4000
+
+MONTH_DATE_PATTERN = re.compile(r'(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)\w*\s+(\d{1,2})')
+
+_token_budgets = {}
+_token_budgets_lock = threading.Lock()
+
+def token_budget(config) -> Optional[TokenBucket]:
+    """The Bedrock token quota shared by every extractor of a tenant, or None if unlimited"""
+    if not config.BEDROCK_TOKENS_PER_MINUTE:
+        return None
+    with _token_budgets_lock:
+        budget = _token_budgets.get(config.TENANT)
+        if budget is None or budget.capacity != config.BEDROCK_TOKENS_PER_MINUTE:
+            budget = _token_budgets[config.TENANT] = TokenBucket(
+                config.BEDROCK_TOKENS_PER_MINUTE / 60, config.BEDROCK_TOKENS_PER_MINUTE
+            )
+        return budget
+
+def iter_lines(text: str) -> Iterator[str]:
+    """Lines of a string, without building the full list that split() would"""
+    start = 0
+    while start <= len(text):
+        end = text.find('\n', start)
+        if end == -1:
+            end = len(text)
+        yield text[start:end]
+        start = end + 1
 
 class Extractor:
-    def __init__(self):
-        self.is_aws = Config.is_aws_mode()
+    def __init__(self, config=None, reference_date: datetime = None, usage=None):
+        self.config = config or Config
+        # "Today" for resolving relative due dates; fixed by evaluations, otherwise the clock
+        self.reference_date = reference_date
+        # UsageStore whose spend is checked against the tenant's budgets; None for no budgets
+        self.usage = usage
+        self.is_aws = self.config.is_aws_mode()
         if self.is_aws:
-            import boto3
-            self.bedrock_client = boto3.client('bedrock-runtime', region_name=Config.BEDROCK_REGION)
+            from core.bedrock import bedrock_pool
+            self.bedrock = bedrock_pool(self.config)
+    
+    def signature(self, usage: Optional[Usage] = None) -> str:
+        """Identifies the extraction backend, so cached results are only reused by the same one.
+        
+        Given the usage of a result, the backend that produced it; otherwise the one the next
+        extraction will use, which a budget may have downgraded.
+        """
+        if not self.is_aws:
+            return "local"
+        if usage is not None:
+            model_id = usage.model_id
+        else:
+            model_id = budget_model(self.usage, self.config) if self.usage else self.config.BEDROCK_MODEL_ID
+            if model_id and model_id != self.config.BEDROCK_MODEL_ID:
+                from core.bedrock import downgrade_models
+                # As in _extract_bedrock: without a region serving the cheaper model, the configured one runs
+                if not downgrade_models(self.config):
+                    model_id = self.config.BEDROCK_MODEL_ID
+        return f"bedrock:{model_id}" if model_id and model_id != "local" else "local"
     
     def extract(self, transcript: str, run_id: str) -> ExtractionResult:
-        print(f"🔍 Extract mode: {'AWS' if self.is_aws else 'LOCAL'}")
+        logger.debug("🔍 Extract mode: %s", 'AWS' if self.is_aws else 'LOCAL')
+        with span("extract", run_id=run_id, mode='aws' if self.is_aws else 'local', transcript_chars=len(transcript)):
+            if self.is_aws:
+                model_id = budget_model(self.usage, self.config) if self.usage else self.config.BEDROCK_MODEL_ID
+                if model_id is None:
+                    logger.warning("💸 Bedrock budget of %s spent, extracting %s locally", self.config.TENANT or 'default', run_id)
+                    result = self._extract_local(transcript, run_id)
+                    result.usage = Usage(model_id="local", downgraded_from=self.config.BEDROCK_MODEL_ID)
+                    return result
+                return self._extract_bedrock(transcript, run_id, model_id)
+            else:
+                return self._extract_local(transcript, run_id)
+    
+    def extract_lines(self, lines: Iterable[str], run_id: str, transcript_bytes: int = None) -> ExtractionResult:
+        """Extract from a stream of lines in local mode, without the whole transcript in memory"""
         if self.is_aws:
-            return self._extract_bedrock(transcript, run_id)
+            raise ValueError("Bedrock extraction needs the whole transcript; use extract()")
+        with span("extract", run_id=run_id, mode='local', transcript_bytes=transcript_bytes or 0):
+            return self._extract_lines(lines, run_id)
+    
+    def _extract_bedrock(self, transcript: str, run_id: str, model_id: str = None) -> ExtractionResult:
+        model_id = model_id or self.config.BEDROCK_MODEL_ID
+        downgraded = model_id != self.config.BEDROCK_MODEL_ID
+        # The configured model keeps the per-region models of BEDROCK_REGIONS; a downgrade only
+        # goes to the regions that serve the cheaper model
+        model_ids = None
+        if downgraded:
+            from core.bedrock import downgrade_models
+            model_ids = downgrade_models(self.config)
+            if not model_ids:
+                logger.warning("💸 No Bedrock region serves %s, keeping %s", model_id, self.config.BEDROCK_MODEL_ID)
+                model_id, downgraded, model_ids = self.config.BEDROCK_MODEL_ID, False, None
+        logger.info("🔥 Using AWS Bedrock with model: %s%s", model_id, " (budget downgrade)" if downgraded else "")
+        with span("extract.build_prompt"):
+            body = self._build_request_body(transcript, model_id)
+        
+        budget = token_budget(self.config)
+        if budget:
+            # Rough estimate (4 characters per token) until Bedrock reports the real usage
+            reserved = len(json.dumps(body)) // 4 + MAX_TOKENS
+            with span("bedrock.token_quota", tenant=self.config.TENANT or '', tokens=reserved) as quota:
+                quota.set_attribute("waited_seconds", round(budget.acquire(reserved), 3))
+        
+        started = time.perf_counter()
+        result, region = self.bedrock.invoke(body, model_ids=model_ids)
+        logger.debug("🌎 Bedrock answered from %s", region)
+        
+        usage = usage_from_response(result, model_ids.get(region, model_id) if downgraded else model_id,
+                                    (time.perf_counter() - started) * 1000)
+        if downgraded:
+            usage.downgraded_from = self.config.BEDROCK_MODEL_ID
+        if budget:
+            used = usage.input_tokens + usage.output_tokens
+            if used:
+                budget.refund(reserved - used)
+        
+        if "nova" in model_id.lower():
+            content = result['output']['message']['content'][0]['text']
         else:
-            return self._extract_local(transcript, run_id)
+            content = result['content'][0]['text']
+        
+        try:
+            logger.debug("🤖 Bedrock response (%d chars): %s", len(content), content[:LOG_EXCERPT_CHARS])
+            
+            with span("extract.parse_json", response_chars=len(content)):
+                # Clean up the response - remove markdown code blocks
+                clean_content = content.strip()
+                if clean_content.startswith('```json'):
+                    clean_content = clean_content[7:]  # Remove ```json
+                if clean_content.endswith('```'):
+                    clean_content = clean_content[:-3]  # Remove ```
+                clean_content = clean_content.strip()
+                
+                extracted_data = json.loads(clean_content)
+                logger.info("✅ Successfully parsed Bedrock JSON response")
+                extraction = self._build_extraction_result(extracted_data, run_id)
+        except json.JSONDecodeError as e:
+            logger.warning("❌ Bedrock JSON parse failed: %s, falling back to local", e)
+            extraction = self._extract_local(transcript, run_id)
+        
+        # The call is paid for whether or not its answer could be used
+        extraction.usage = usage
+        return extraction
     
-    def _extract_bedrock(self, transcript: str, run_id: str) -> ExtractionResult:
-        print(f"🔥 Using AWS Bedrock with model: {Config.BEDROCK_MODEL_ID}")
+    def _build_request_body(self, transcript: str, model_id: str = None) -> Dict[str, Any]:
         system_prompt = self._load_system_prompt()
         
-        if "nova" in Config.BEDROCK_MODEL_ID.lower():
+        if "nova" in (model_id or self.config.BEDROCK_MODEL_ID).lower():
             # Nova format
             body = {
                 "messages": [
@@ -35,57 +177,31 @@ class Extractor:
                     }
                 ],
                 "inferenceConfig": {
-                    "maxTokens": 4000
+                    "maxTokens": MAX_TOKENS
                 }
             }
         else:
             # Claude format
             body = {
                 "anthropic_version": "bedrock-2023-05-31",
-                "max_tokens": 4000,
+                "max_tokens": MAX_TOKENS,
                 "system": system_prompt,
                 "messages": [
                     {"role": "user", "content": f"Extract from this transcript:\n\n{transcript}"}
                 ]
             }
         
-        response = self.bedrock_client.invoke_model(
-            modelId=Config.BEDROCK_MODEL_ID,
-            body=json.dumps(body)
-        )
-        
-        result = json.loads(response['body'].read())
-        
-        if "nova" in Config.BEDROCK_MODEL_ID.lower():
-            content = result['output']['message']['content'][0]['text']
-        else:
-            content = result['content'][0]['text']
-        
-        try:
-            print(f"🤖 Full Bedrock response: {content}")
-            
-            # Clean up the response - remove markdown code blocks
-            clean_content = content.strip()
-            if clean_content.startswith('```json'):
-                clean_content = clean_content[7:]  # Remove ```json
-            if clean_content.endswith('```'):
-                clean_content = clean_content[:-3]  # Remove ```
-            clean_content = clean_content.strip()
-            
-            extracted_data = json.loads(clean_content)
-            print("✅ Successfully parsed Bedrock JSON response")
-            return self._build_extraction_result(extracted_data, run_id)
-        except json.JSONDecodeError as e:
-            print(f"❌ Bedrock JSON parse failed: {e}, falling back to local")
-            return self._extract_local(transcript, run_id)
+        return body
     
     def _extract_local(self, transcript: str, run_id: str) -> ExtractionResult:
+        return self._extract_lines(iter_lines(transcript), run_id)
+    
+    def _extract_lines(self, lines: Iterable[str], run_id: str) -> ExtractionResult:
         # Simple rule-based extraction as fallback
         decisions = []
         action_items = []
         risks = []
         
-        lines = transcript.split('\n')
         for line in lines:
             line = line.strip()
             if not line:
@@ -93,26 +209,28 @@ class Extractor:
                 
             # Look for decision patterns
             if any(keyword in line.lower() for keyword in ['decided', 'decision', 'agreed', 'resolved']):
-                decisions.append(Decision(text=line))
+                decisions.append({'text': line})
             
             # Look for action patterns
             elif any(keyword in line.lower() for keyword in ['action:', 'todo:', 'task:', 'will do', 'needs to']):
                 title = re.sub(r'^(action:|todo:|task:)\s*', '', line, flags=re.IGNORECASE)
-                action_items.append(ActionItem(title=title))
+                action_items.append({'title': title})
             
             # Look for risk patterns
             elif any(keyword in line.lower() for keyword in ['risk', 'blocker', 'concern', 'issue']):
-                risks.append(Risk(text=line))
+                risks.append({'text': line})
         
-        summary_md = f"# Meeting Summary\n\n**Decisions:** {len(decisions)}\n**Action Items:** {len(action_items)}\n**Risks:** {len(risks)}"
-        
-        return ExtractionResult(
-            run_id=run_id,
-            decisions=decisions,
-            action_items=action_items,
-            risks=risks,
-            summary_md=summary_md
-        )
+        return ExtractionResult.model_validate({
+            'run_id': run_id,
+            'decisions': decisions,
+            'action_items': action_items,
+            'risks': risks,
+            'summary_md': self.build_counts_summary(decisions, action_items, risks)
+        })
+    
+    @staticmethod
+    def build_counts_summary(decisions: list, action_items: list, risks: list) -> str:
+        return f"# Meeting Summary\n\n**Decisions:** {len(decisions)}\n**Action Items:** {len(action_items)}\n**Risks:** {len(risks)}"
     
     def _load_system_prompt(self) -> str:
         try:
@@ -132,7 +250,7 @@ Return ONLY valid JSON:
 {"decisions": [{"text": "...", "owners": ["..."]}], "action_items": [{"title": "...", "owner": "...", "due_date": "...", "priority": "...", "notes": "..."}], "risks": [{"text": "...", "severity": "..."}], "summary_md": "..."}"""
     
     def _build_extraction_result(self, data: Dict[str, Any], run_id: str) -> ExtractionResult:
-        decisions = [Decision(**d) for d in data.get('decisions', [])]
+        today = self.reference_date or datetime.now()
         
         # Clean up action items - handle invalid dates
         action_items = []
@@ -144,49 +262,40 @@ Return ONLY valid JSON:
             # Fix only clearly outdated years (2023, 2024) but keep future years (2026+)
             elif item_data.get('due_date'):
                 date_str = item_data['due_date']
-                current_year = datetime.now().year
                 
                 # Only fix years that are clearly from old training data
                 if date_str.startswith('2023-') or date_str.startswith('2024-'):
-                    item_data['due_date'] = f"{current_year}{date_str[4:]}"
+                    item_data['due_date'] = f"{today.year}{date_str[4:]}"
                 # Keep years 2025+ as they're likely intentional future dates
             
             # Process relative dates from source_quote or notes (even if due_date exists)
             source_text = item_data.get('source_quote', '') or item_data.get('notes', '') or item_data.get('title', '')
-            calculated_date = self._parse_relative_date(source_text)
+            calculated_date = self._parse_relative_date(source_text, today)
             if calculated_date:
                 # Override any existing due_date with our calculated one
                 item_data['due_date'] = calculated_date
-            elif not item_data.get('due_date'):
-                # Only keep existing due_date if we couldn't calculate a better one
-                pass
             
-            action_items.append(ActionItem(**item_data))
+            action_items.append(item_data)
         
-        risks = [Risk(**r) for r in data.get('risks', [])]
-        
-        return ExtractionResult(
-            run_id=run_id,
-            decisions=decisions,
-            action_items=action_items,
-            risks=risks,
-            summary_md=data.get('summary_md', '')
-        )
+        # One validation pass over the whole tree rather than a model call per item
+        return ExtractionResult.model_validate({
+            'run_id': run_id,
+            'decisions': data.get('decisions', []),
+            'action_items': action_items,
+            'risks': data.get('risks', []),
+            'summary_md': data.get('summary_md', '')
+        })
     
-    def _parse_relative_date(self, text: str) -> str:
+    def _parse_relative_date(self, text: str, today: datetime = None) -> str:
         """Parse relative dates from text and return YYYY-MM-DD format"""
-        from datetime import datetime, timedelta
-        import re
-        
         if not text:
             return None
             
         text = text.lower()
-        today = datetime.now()
+        today = today or datetime.now()
         
         # Check for specific dates like "Oct 30", "December 15", etc.
-        month_pattern = r'(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)\w*\s+(\d{1,2})'
-        month_match = re.search(month_pattern, text)
+        month_match = MONTH_DATE_PATTERN.search(text)
         
         if month_match:
             month_abbr = month_match.group(1)
@@ -0,0 +1,327 @@
+"""Checks that extracted items are supported by the transcript, and where.
+
+A TranscriptIndex is built once per run in a single pass over the transcript: its words, the
+first word and speaker of every line, and the positions of every content word. Each item is
+then located in time proportional to its length and the (capped) postings of its rarest words:
+
+- a verbatim quote is aligned where its rarest words occur, scored by the share of its word
+  trigrams found in place;
+- a paraphrase is scored by the share of its content words on the best line (or pair of
+  adjacent lines).
+
+A transcript too large to hold is read twice instead, by a StreamedTranscriptIndex that keeps
+only the postings of the items' own words and the lines they lead to.
+
+The better of the two is the item's grounding score, from 0 to 1. Items below
+GROUNDING_MIN_SCORE are flagged (kept, but not turned into Notion pages or Jira issues) or
+dropped, depending on GROUNDING_POLICY.
+"""
+import re
+from bisect import bisect_right
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from core.schema import ActionItem, ExtractionResult, SourceSpan
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+# "Name: what they said" at the start of a line
+SPEAKER_PATTERN = re.compile(r"[ \t]*([A-Z][\w.'-]*(?: [A-Z][\w.'-]*){0,2})[ \t]*:[ \t]+\S")
+
+# Occurrences of a word looked at per query. Rarer words locate an item anyway, and the cap
+# keeps a query bounded when a phrase repeats throughout a long transcript.
+MAX_POSTINGS = 16
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have", "i", "i'll", "in", "is",
+    "it", "of", "on", "or", "our", "so", "that", "the", "this", "to", "we", "we'll", "will", "with", "you",
+}
+
+def _words(text: str) -> List[str]:
+    return WORD_PATTERN.findall((text or "").lower())
+
+class TranscriptIndex:
+    def __init__(self, transcript: str):
+        self.text = transcript
+        # Per line: character offset, position of its first word, speaker
+        self.line_starts: List[int] = []
+        self.line_words: List[int] = []
+        self.speakers: List[Optional[str]] = []
+        self.words: List[str] = []
+        self.postings: Dict[str, List[int]] = defaultdict(list)
+
+        offset = 0
+        speaker = None
+        for line in transcript.split("\n"):
+            speaker = _speaker(line, speaker)
+            self.line_starts.append(offset)
+            self.line_words.append(len(self.words))
+            self.speakers.append(speaker)
+            self.words.extend(_words(line))
+            offset += len(line) + 1
+        for position, word in enumerate(self.words):
+            if word not in STOPWORDS:
+                self.postings[word].append(position)
+        self.word_count = len(self.words)
+
+    def line_text(self, line: int) -> str:
+        """Text of a 0-based line"""
+        end = self.line_starts[line + 1] - 1 if line + 1 < len(self.line_starts) else len(self.text)
+        return self.text[self.line_starts[line]:end]
+
+    def line_of(self, position: int) -> int:
+        """0-based line of a word position"""
+        return bisect_right(self.line_words, position) - 1
+
+    def locate(self, quote: str) -> Optional[SourceSpan]:
+        """Best supporting span of the transcript for a quote or paraphrase, if any"""
+        words = _words(quote)
+        if not words:
+            return None
+        aligned = self._align(words)
+        # A verbatim quote needs no word-by-word search
+        candidates = [aligned] if aligned and aligned[0] == 1.0 else [c for c in (aligned, self._cover(words)) if c]
+        if not candidates:
+            return None
+        score, first, last = max(candidates)
+        line = self.line_of(first)
+        start, end = self._offset(first)[0], self._offset(last)[1]
+        return SourceSpan(start=start, end=end, line=line + 1, speaker=self._speaker(line), score=round(score, 3))
+
+    # Transcript access, overridden by StreamedTranscriptIndex
+
+    def _postings(self, words: Iterable[str]) -> List[Tuple[str, int, List[int]]]:
+        """(word, occurrences, positions) of the indexed words among `words`"""
+        return [(w, len(self.postings[w]), self.postings[w]) for w in words if w in self.postings]
+
+    def _slice(self, first: int, last: int) -> List[str]:
+        return self.words[first:last]
+
+    def _window(self, line: int) -> Tuple[int, List[str]]:
+        """Position of the first word of a line, and the words of that line and the next"""
+        first = self.line_words[line]
+        last = self.line_words[line + 2] if line + 2 < len(self.line_words) else len(self.words)
+        return first, self.words[first:last]
+
+    def _line_start(self, line: int) -> Tuple[int, int]:
+        """Character offset and first word position of a line"""
+        return self.line_starts[line], self.line_words[line]
+
+    def _speaker(self, line: int) -> Optional[str]:
+        return self.speakers[line]
+
+    # Queries
+
+    def _offset(self, position: int) -> Tuple[int, int]:
+        """Character span of a word, found by re-reading its line"""
+        line = self.line_of(position)
+        text = self.line_text(line)
+        line_start, line_word = self._line_start(line)
+        matches = list(WORD_PATTERN.finditer(text.lower()))
+        index = position - line_word
+        if index >= len(matches):
+            # Lowercasing changed the text's length: fall back to the whole line
+            return line_start, line_start + len(text)
+        return tuple(line_start + o for o in matches[index].span())
+
+    def _anchors(self, words: List[str]) -> List[int]:
+        """Candidate start positions of a verbatim quote, agreed on by the most rare words first"""
+        if len(words) < 3:
+            return []
+        postings = [((k, w), count, positions) for k, w in enumerate(words) for _, count, positions in self._postings([w])]
+        if not postings:
+            return []
+        votes: Dict[int, int] = defaultdict(int)
+        for (k, _), positions in _rarest(postings):
+            for p in positions:
+                if p >= k:
+                    votes[p - k] += 1
+        return sorted(votes, key=lambda a: (-votes[a], a))[:MAX_POSTINGS]
+
+    def _align(self, words: List[str]) -> Optional[Tuple[float, int, int]]:
+        """Where a verbatim quote occurs: anchors from its rarest words, scored by the share of
+        the quote's trigrams found in place"""
+        count = len(words) - 2
+        best = None
+        # Stopping at a verbatim match
+        for anchor in self._anchors(words):
+            placed = self._slice(anchor, anchor + len(words))
+            support = count if placed == words else sum(1 for k in range(count) if placed[k:k + 3] == words[k:k + 3])
+            if best is None or support > best[0]:
+                best = (support, anchor)
+                if support == count:
+                    break
+        if best is None or not best[0]:
+            return None
+        support, anchor = best
+        return support / count, anchor, min(self.word_count, anchor + len(words)) - 1
+
+    def _content(self, words: List[str]) -> set:
+        return {w for w in words if w not in STOPWORDS} or set(words)
+
+    def _candidate_lines(self, content: set) -> List[int]:
+        """Lines holding the rarest of the content words"""
+        postings = self._postings(content)
+        return sorted({self.line_of(p) for _, positions in _rarest(postings) for p in positions})
+
+    def _cover(self, words: List[str]) -> Optional[Tuple[float, int, int]]:
+        """Share of the content words found on the best line, or pair of adjacent lines"""
+        content = self._content(words)
+        # Candidate lines come from the rarest words; every content word is then checked there
+        lines = self._candidate_lines(content)
+        if not lines:
+            return None
+
+        best = None
+        for line in lines:
+            first, window = self._window(line)
+            found: Dict[str, int] = {}
+            for offset, word in enumerate(window):
+                if word in content:
+                    found.setdefault(word, first + offset)
+            candidate = (len(found) / len(content), -line)
+            if best is None or candidate > best[0]:
+                best = (candidate, found)
+        (score, _), found = best
+        positions = sorted(found.values())
+        return score, positions[0], positions[-1]
+
+class StreamedTranscriptIndex(TranscriptIndex):
+    """A TranscriptIndex for known quotes over a transcript too large to hold in memory.
+
+    read_lines (called twice) yields the transcript's lines. The first pass keeps the first
+    MAX_POSTINGS positions and the count of every content word of the quotes; the second keeps
+    only the lines those quotes can be located on. Results match TranscriptIndex for the quotes
+    given; memory depends on the number of quotes, not on the length of the transcript.
+    """
+
+    def __init__(self, read_lines: Callable[[], Iterable[str]], quotes: Iterable[str]):
+        quotes = [_words(q) for q in quotes]
+        vocabulary = {w for words in quotes for w in words if w not in STOPWORDS}
+        self.counts: Dict[str, int] = defaultdict(int)
+        self.postings = {}
+        # Line of every kept posting
+        self.posting_lines: Dict[int, int] = {}
+        position = 0
+        for number, line in enumerate(read_lines()):
+            for word in _words(line):
+                if word in vocabulary:
+                    self.counts[word] += 1
+                    positions = self.postings.setdefault(word, [])
+                    if len(positions) < MAX_POSTINGS:
+                        positions.append(position)
+                        self.posting_lines[position] = number
+                position += 1
+        self.word_count = position
+
+        # What locate() will look at: the words at each anchor, the lines (and the next ones)
+        # holding rare words
+        ranges = sorted((a, a + len(words)) for words in quotes for a in self._anchors(words))
+        wanted = {n for words in quotes for line in self._candidate_lines(self._content(words)) for n in (line, line + 1)}
+
+        # 0-based line -> (character offset, first word position, text, speaker, words)
+        self.lines: Dict[int, Tuple[int, int, str, Optional[str], List[str]]] = {}
+        offset = position = 0
+        speaker = None
+        next_range = 0
+        for number, line in enumerate(read_lines()):
+            speaker = _speaker(line, speaker)
+            words = _words(line)
+            end = position + len(words)
+            while next_range < len(ranges) and ranges[next_range][1] <= position:
+                next_range += 1
+            overlaps = end > position and next_range < len(ranges) and ranges[next_range][0] < end
+            if number in wanted or overlaps:
+                self.lines[number] = (offset, position, line, speaker, words)
+            offset += len(line) + 1
+            position = end
+        self.line_numbers = sorted(self.lines)
+        self.line_firsts = [self.lines[n][1] for n in self.line_numbers]
+
+    def line_text(self, line: int) -> str:
+        return self.lines[line][2]
+
+    def line_of(self, position: int) -> int:
+        if position in self.posting_lines:
+            return self.posting_lines[position]
+        return self.line_numbers[bisect_right(self.line_firsts, position) - 1]
+
+    def _postings(self, words: Iterable[str]) -> List[Tuple[str, int, List[int]]]:
+        return [(w, self.counts[w], self.postings[w]) for w in words if w in self.postings]
+
+    def _slice(self, first: int, last: int) -> List[str]:
+        words: List[str] = []
+        position = first
+        while position < last:
+            _, line_word, _, _, line_words = self.lines[self.line_of(position)]
+            taken = line_words[position - line_word:position - line_word + last - position]
+            if not taken:
+                break
+            words.extend(taken)
+            position += len(taken)
+        return words
+
+    def _window(self, line: int) -> Tuple[int, List[str]]:
+        first = self.lines[line][1]
+        following = self.lines.get(line + 1)
+        return first, self.lines[line][4] + (following[4] if following else [])
+
+    def _line_start(self, line: int) -> Tuple[int, int]:
+        return self.lines[line][0], self.lines[line][1]
+
+    def _speaker(self, line: int) -> Optional[str]:
+        return self.lines[line][3]
+
+def _rarest(postings: List[Tuple[object, int, List[int]]]) -> List[Tuple[object, List[int]]]:
+    """Postings short enough to scan in full; if there are none, the start of the shortest few"""
+    rare = [(key, positions) for key, count, positions in postings if count <= MAX_POSTINGS]
+    if rare:
+        return rare
+    shortest = sorted(postings, key=lambda p: p[1])[:3]
+    return [(key, positions[:MAX_POSTINGS]) for key, _, positions in shortest]
+
+def _speaker(line: str, current: Optional[str]) -> Optional[str]:
+    """Speaker of a line, given the speaker of the line before"""
+    found = SPEAKER_PATTERN.match(line)
+    if found:
+        return found.group(1)
+    # A blank line ends a speaker's turn
+    return None if not line.strip() else current
+
+def deliverable_items(result: ExtractionResult) -> List[ActionItem]:
+    """Action items to turn into tasks and issues: all but those flagged as ungrounded"""
+    return [item for item in result.action_items if not item.source or item.source.grounded]
+
+def _quotes(kind: str, item) -> Iterable[str]:
+    if kind == "action_items":
+        return [q for q in (item.source_quote, item.title) if q]
+    return [item.text]
+
+def result_quotes(result: ExtractionResult) -> List[str]:
+    """Every quote ground_result will locate, for a StreamedTranscriptIndex"""
+    return [q for kind in ("decisions", "action_items", "risks") for item in getattr(result, kind)
+            for q in _quotes(kind, item)]
+
+def ground_result(result: ExtractionResult, index: TranscriptIndex, min_score: float,
+                  policy: str = "flag") -> Dict[str, int]:
+    """Attach a source span to every item and flag or drop the unsupported ones.
+
+    Returns the number of items checked, flagged and dropped.
+    """
+    stats = {"checked": 0, "flagged": 0, "dropped": 0}
+    for kind in ("decisions", "action_items", "risks"):
+        kept = []
+        for item in getattr(result, kind):
+            spans = [s for s in (index.locate(q) for q in _quotes(kind, item)) if s]
+            source = max(spans, key=lambda s: s.score) if spans else SourceSpan(score=0.0)
+            source.grounded = source.score >= min_score
+            item.source = source
+            stats["checked"] += 1
+            if source.grounded:
+                kept.append(item)
+            elif policy == "drop":
+                stats["dropped"] += 1
+            else:
+                stats["flagged"] += 1
+                kept.append(item)
+        setattr(result, kind, kept)
+    return stats
@@ -0,0 +1,74 @@
+import hashlib
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+from core.schema import ExtractionResult
+
+# result attribute -> (id prefix, text field used for hashing)
+ITEM_KINDS: Dict[str, Tuple[str, str]] = {
+    'decisions': ('dec', 'text'),
+    'action_items': ('act', 'title'),
+    'risks': ('risk', 'text'),
+}
+
+# Crockford's base32, the alphabet of ULIDs
+ULID_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+
+_ulid_lock = threading.Lock()
+_last_ulid = (0, 0)
+
+def new_run_id(now: float = None) -> str:
+    """A ULID: 48-bit millisecond timestamp then 80 random bits, as 26 characters.
+
+    IDs sort by creation time; those created in the same millisecond by this process
+    increment the random part, so they stay in order too.
+    """
+    global _last_ulid
+    ms = int((time.time() if now is None else now) * 1000)
+    with _ulid_lock:
+        last_ms, last_random = _last_ulid
+        if ms <= last_ms:
+            ms, randomness = last_ms, last_random + 1
+            if randomness >= 1 << 80:
+                ms, randomness = ms + 1, 0
+        else:
+            randomness = int.from_bytes(os.urandom(10), 'big')
+        _last_ulid = (ms, randomness)
+    value = ms << 80 | randomness
+    return ''.join(ULID_ALPHABET[(value >> shift) & 31] for shift in range(125, -1, -5))
+
+def run_id_time(run_id: str) -> Optional[datetime]:
+    """When a ULID run ID was created; None for other IDs (digests, runs from before ULIDs)"""
+    if len(run_id) != 26 or run_id[0] > '7' or any(c not in ULID_ALPHABET for c in run_id):
+        return None
+    ms = 0
+    for char in run_id[:10]:
+        ms = ms << 5 | ULID_ALPHABET.index(char)
+    return datetime.fromtimestamp(ms / 1000, timezone.utc)
+
+def content_hash(text: str, length: int = 16) -> str:
+    """Whitespace- and case-insensitive hash of a piece of text"""
+    normalized = ' '.join((text or '').split()).lower()
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()[:length]
+
+def item_id(kind: str, *parts) -> str:
+    prefix = ITEM_KINDS[kind][0]
+    digest = hashlib.sha1('|'.join(str(p) for p in parts).encode('utf-8')).hexdigest()[:10]
+    return f"{prefix}-{digest}"
+
+def assign_item_ids(result: ExtractionResult) -> ExtractionResult:
+    """Give every item without an ID a content-derived one, unique within the result"""
+    for kind, (_, text_field) in ITEM_KINDS.items():
+        seen = set()
+        for item in getattr(result, kind):
+            if not item.id:
+                text_hash = content_hash(getattr(item, text_field))
+                occurrence = 0
+                item.id = item_id(kind, text_hash, occurrence)
+                while item.id in seen:
+                    occurrence += 1
+                    item.id = item_id(kind, text_hash, occurrence)
+            seen.add(item.id)
+    return result
@@ -0,0 +1,234 @@
+import bisect
+import json
+import logging
+import re
+import zlib
+from array import array
+from difflib import SequenceMatcher
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from core.schema import ExtractionResult
+from core.extract import Extractor
+from core.storage import StorageManager
+from core.ids import ITEM_KINDS, content_hash, item_id
+from core.usage import combine
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILENAME = "Segments.json"
+
+# Segments end at blank lines, or at a content-defined cut inside long blocks so
+# that an edit only shifts the boundaries of the block it touches.
+MIN_CUT_LINES = 8
+MAX_SEGMENT_LINES = 64
+CUT_MODULUS = 8
+
+# Minimum title similarity for an edited item to keep the ID of the item it replaces
+ID_MATCH_RATIO = 0.6
+
+def segment_lines(lines: Iterable[str]) -> Iterator[Tuple[str, int]]:
+    """(text, 1-based number of its first line) of every segment, one segment in memory at a time"""
+    current = []
+    first = 0
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            if current:
+                yield '\n'.join(current), first
+                current = []
+            continue
+
+        if not current:
+            first = number
+        current.append(line)
+        at_cut = len(current) >= MIN_CUT_LINES and zlib.crc32(line.encode('utf-8')) % CUT_MODULUS == 0
+        if at_cut or len(current) >= MAX_SEGMENT_LINES:
+            yield '\n'.join(current), first
+            current = []
+
+    if current:
+        yield '\n'.join(current), first
+
+def split_segments(transcript: str) -> List[str]:
+    return [text for text, _ in segment_lines(transcript.split('\n'))]
+
+def _words(text: str) -> set:
+    return set(re.findall(r"\w+", (text or '').lower()))
+
+class IncrementalExtractor:
+    """Re-extracts only the transcript segments that changed since the previous version of a run.
+
+    Per-segment results are kept in a Segments.json manifest next to the run's artifacts.
+    """
+
+    def __init__(self, extractor: Extractor, storage: StorageManager):
+        self.extractor = extractor
+        self.storage = storage
+        self.last_stats: Dict[str, int] = {}
+
+    def extract(self, transcript: str, run_id: str) -> ExtractionResult:
+        segments = split_segments(transcript)
+        hashes = [content_hash(segment) for segment in segments]
+        signature = self.extractor.signature()
+        old_entries = self._load_manifest(run_id, signature)
+        old_hashes = [entry['hash'] for entry in old_entries]
+
+        opcodes = SequenceMatcher(None, old_hashes, hashes, autojunk=False).get_opcodes()
+
+        # Segments that were moved rather than edited are reused by hash
+        displaced = {}
+        for tag, i1, i2, _, _ in opcodes:
+            if tag != 'equal':
+                for entry in old_entries[i1:i2]:
+                    displaced.setdefault(entry['hash'], entry)
+
+        entries: List[Dict[str, Any]] = []
+        extracted = 0
+        # Bedrock usage of the segments extracted this time; reused ones cost nothing
+        usages = []
+        for tag, i1, i2, j1, j2 in opcodes:
+            if tag == 'equal':
+                entries.extend(old_entries[i1:i2])
+                continue
+
+            candidates = old_entries[i1:i2]
+            used_ids = set()
+            for j in range(j1, j2):
+                reused = displaced.pop(hashes[j], None)
+                if reused is not None:
+                    entries.append(reused)
+                else:
+                    entries.append(self._extract_segment(segments[j], hashes[j], run_id, candidates, used_ids, usages))
+                    extracted += 1
+
+        # A budget downgrade can start mid-run: segments from two backends match neither next time
+        signatures = {self.extractor.signature(usage) for usage in usages}
+        if len(entries) > extracted or not usages:
+            signatures.add(signature)
+        self.storage.save_output(run_id, MANIFEST_FILENAME, {
+            'extractor': signatures.pop() if len(signatures) == 1 else 'mixed',
+            'segments': entries,
+        })
+        self.last_stats = {
+            'segments': len(entries),
+            'reused': len(entries) - extracted,
+            'extracted': extracted,
+        }
+        logger.info("♻️ Incremental extract: reused %d/%d segments, re-extracted %d",
+                    self.last_stats['reused'], len(entries), extracted)
+
+        result = self._merge(entries, run_id)
+        result.usage = combine(usages)
+        return result
+
+    def seed(self, read_lines: Callable[[], Iterable[str]], run_id: str, result: ExtractionResult):
+        """Write the manifest of a run extracted in one piece.
+
+        Each item goes to the segment it was grounded in, or else the segment sharing most of
+        its words, so that the first incremental edit re-extracts only the segments it touches
+        and unchanged items keep their IDs. read_lines is called twice (to place the items, then
+        to write the manifest) and only one segment is held at a time, so a streamed transcript
+        is never in memory as a whole.
+        """
+        starts = array('L')
+        # Items not grounded to a line: [words, item, best overlap, best segment]
+        loose = [
+            [_words(getattr(item, text_field)), item, -1, 0]
+            for kind, (_, text_field) in ITEM_KINDS.items() for item in getattr(result, kind)
+            if not (item.source and item.source.line and item.source.grounded)
+        ]
+        for index, (text, first) in enumerate(segment_lines(read_lines())):
+            starts.append(first)
+            if loose:
+                segment_words = _words(text)
+                for candidate in loose:
+                    overlap = len(candidate[0] & segment_words)
+                    if overlap > candidate[2]:
+                        candidate[2], candidate[3] = overlap, index
+
+        placed: Dict[int, Dict[str, List[Dict[str, Any]]]] = {}
+        if starts:
+            best = {id(item): index for _, item, _, index in loose}
+            for kind in ITEM_KINDS:
+                for item in getattr(result, kind):
+                    if id(item) in best:
+                        index = best[id(item)]
+                    else:
+                        index = max(0, bisect.bisect_right(starts, item.source.line) - 1)
+                    placed.setdefault(index, {}).setdefault(kind, []).append(item.model_dump(mode='json'))
+
+        def manifest() -> Iterator[str]:
+            yield f'{{"extractor": {json.dumps(self.extractor.signature(result.usage))}, "segments": ['
+            for index, (text, _) in enumerate(segment_lines(read_lines())):
+                items = placed.get(index, {})
+                entry = {'hash': content_hash(text), **{kind: items.get(kind, []) for kind in ITEM_KINDS}}
+                yield (",\n" if index else "\n") + json.dumps(entry, default=str)
+            yield "\n]}\n"
+
+        self.storage.save_output_stream(run_id, MANIFEST_FILENAME, manifest())
+    
+    def _load_manifest(self, run_id: str, signature: str) -> List[Dict[str, Any]]:
+        content = self.storage.read_output(run_id, MANIFEST_FILENAME)
+        if not content:
+            return []
+        manifest = json.loads(content)
+        # Results from a different model or mode are not comparable
+        if manifest.get('extractor') != signature:
+            return []
+        return manifest.get('segments', [])
+
+    def _extract_segment(self, segment: str, segment_hash: str, run_id: str,
+                         candidates: List[Dict[str, Any]], used_ids: set, usages: list) -> Dict[str, Any]:
+        result = self.extractor.extract(segment, run_id)
+        usages.append(result.usage)
+
+        entry = {'hash': segment_hash}
+        for kind, (_, text_field) in ITEM_KINDS.items():
+            previous = [item for candidate in candidates for item in candidate.get(kind, [])]
+            items = []
+            for index, item in enumerate(getattr(result, kind)):
+                item.id = self._match_previous_id(getattr(item, text_field), previous, text_field, used_ids)
+                if not item.id:
+                    item.id = item_id(kind, segment_hash, index)
+                used_ids.add(item.id)
+                items.append(item.model_dump(mode='json'))
+            entry[kind] = items
+        return entry
+
+    def _match_previous_id(self, text: str, previous: List[Dict[str, Any]],
+                           text_field: str, used_ids: set) -> Optional[str]:
+        best_id = None
+        best_ratio = ID_MATCH_RATIO
+        for item in previous:
+            if item.get('id') in used_ids:
+                continue
+            ratio = SequenceMatcher(None, text.lower(), (item.get(text_field) or '').lower()).ratio()
+            if ratio >= best_ratio:
+                best_id = item.get('id')
+                best_ratio = ratio
+        return best_id
+
+    def _merge(self, entries: List[Dict[str, Any]], run_id: str) -> ExtractionResult:
+        merged = {}
+        for kind in ITEM_KINDS:
+            items = []
+            seen = {}
+            for entry in entries:
+                for data in entry.get(kind, []):
+                    original_id = data.get('id')
+                    # A segment repeated verbatim yields the same IDs twice
+                    if original_id in seen:
+                        seen[original_id] += 1
+                        data = {**data, 'id': f"{original_id}-{seen[original_id]}"}
+                    else:
+                        seen[original_id] = 0
+                    items.append(data)
+            merged[kind] = items
+
+        # One validation pass over the cached dicts instead of a model call per item
+        return ExtractionResult.model_validate({
+            'run_id': run_id,
+            'decisions': merged['decisions'],
+            'action_items': merged['action_items'],
+            'risks': merged['risks'],
+            'summary_md': Extractor.build_counts_summary(merged['decisions'], merged['action_items'], merged['risks'])
+        })
@@ -0,0 +1,55 @@
+import hashlib
+import json
+from typing import Dict, Any, List, Tuple
+from core.storage import StorageManager
+
+LEDGER_FILENAME = "Delivery.json"
+
+def fingerprint(payload: Dict[str, Any]) -> str:
+    return hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:16]
+
+class DeliveryLedger:
+    """Maps a run's item IDs to the external IDs created for them in each integration.
+
+    Stored as Delivery.json next to the run's artifacts:
+    {"notion": {"items": {"act-1a2b": {"external_id": "<page id>", "fingerprint": "..."}}}, ...}
+    """
+
+    def __init__(self, storage: StorageManager, run_id: str):
+        self.storage = storage
+        self.run_id = run_id
+        content = storage.read_output(run_id, LEDGER_FILENAME)
+        self.data: Dict[str, Any] = json.loads(content) if content else {}
+
+    def service(self, name: str) -> Dict[str, Any]:
+        return self.data.setdefault(name, {"items": {}})
+
+    def reset(self, name: str) -> Dict[str, Any]:
+        self.data[name] = {"items": {}}
+        return self.data[name]
+
+    def plan(self, name: str, payloads: Dict[str, Dict[str, Any]]) -> Tuple[List[str], List[str], List[str]]:
+        """Split item IDs into creates, updates and deletes against what was delivered before"""
+        entries = self.service(name)["items"]
+        creates = [item_id for item_id in payloads if item_id not in entries]
+        updates = [
+            item_id for item_id in payloads
+            if item_id in entries and entries[item_id]["fingerprint"] != fingerprint(payloads[item_id])
+        ]
+        deletes = [item_id for item_id in entries if item_id not in payloads]
+        return creates, updates, deletes
+
+    def external_id(self, name: str, item_id: str) -> str:
+        return self.service(name)["items"][item_id]["external_id"]
+
+    def record(self, name: str, item_id: str, external_id: str, payload: Dict[str, Any]):
+        self.service(name)["items"][item_id] = {
+            "external_id": external_id,
+            "fingerprint": fingerprint(payload),
+        }
+
+    def forget(self, name: str, item_id: str):
+        self.service(name)["items"].pop(item_id, None)
+
+    def save(self):
+        self.storage.save_output(self.run_id, LEDGER_FILENAME, self.data)
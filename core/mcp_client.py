@@ -1,41 +1,191 @@
+import importlib
+import logging
+import threading
 import requests
 from typing import Dict, Any, List
+from core.circuit import breaker, start_health_monitor
 from core.config import Config
+from core.mcp_session import HTTPMCPSession, MCPSession, StdioMCPSession
+from core.tracing import span, inject
+
+logger = logging.getLogger(__name__)
+
+# Config setting holding the API token a tenant passes to the Slack and Notion servers
+# (Jira credentials are part of every Jira payload already)
+TENANT_TOKENS = {
+    'slack': 'SLACK_BOT_TOKEN',
+    'notion': 'NOTION_TOKEN',
+}
+
+def _record_status(circuit, status_code: int):
+    # Only server errors say the MCP server (or the API behind it) is unwell; a rejected
+    # request must not open the circuit
+    if status_code >= 500:
+        circuit.record_failure(f"HTTP {status_code}")
+    else:
+        circuit.record_success()
+
+def _retryable(status_code: int) -> bool:
+    # Server errors and rate limits may succeed later; other failures would not
+    return status_code >= 500 or status_code == 429
+
+# Issues per Jira bulk create request (the Jira maximum)
+JIRA_BULK_LIMIT = 50
 
 class MCPClient:
-    def __init__(self):
-        self.is_aws = Config.is_aws_mode()
+    def __init__(self, config=None):
+        self.config = config or Config
+        self.is_aws = self.config.is_aws_mode()
         self.base_urls = {
-            'slack': 'http://localhost:8001',
-            'notion': 'http://localhost:8002', 
-            'jira': 'http://localhost:8003'
+            'slack': self.config.MCP_SLACK_URL,
+            'notion': self.config.MCP_NOTION_URL,
+            'jira': self.config.MCP_JIRA_URL
         }
+        self.transport = self.config.MCP_TRANSPORT
+        # Keep-alive connections to the MCP servers instead of a new connection per call
+        self.http = requests.Session()
+        # transport "mcp" (streamable HTTP) or "stdio": one MCP session per server, opened on first use
+        self.sessions: Dict[str, MCPSession] = {}
+        self.sessions_lock = threading.Lock()
+        if self.transport in ('http', 'mcp'):
+            # Probes /health of this client's servers while their circuit is open
+            start_health_monitor(self.base_urls)
+    
+    def _post(self, service: str, tool: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        url = f"{self.base_urls[service]}/{tool}"
+        if self.config.TENANT and service in TENANT_TOKENS:
+            # The MCP servers only hold the default tokens; a tenant sends its own
+            payload = {"token": getattr(self.config, TENANT_TOKENS[service]), **payload}
+        with span(f"mcp.{tool}", kind='client', service_name=service) as call:
+            if self.transport == 'inprocess':
+                return self._call_handler(service, tool, payload, call)
+            
+            circuit = breaker(service, self.base_urls[service])
+            if not circuit.allow():
+                # Fail fast instead of waiting on a server that is known to be down
+                error = f"{service} MCP server unavailable (circuit open)"
+                call.set_error(error)
+                return {"error": error, "retryable": True}
+            if self.transport in ('mcp', 'stdio'):
+                return self._call_session(service, tool, payload, call)
+            try:
+                response = self.http.post(url, json=payload, headers=inject({}),
+                                          timeout=(self.config.MCP_CONNECT_TIMEOUT, self.config.MCP_READ_TIMEOUT))
+                result = response.json()
+            except Exception as e:
+                circuit.record_failure(str(e))
+                call.set_error(str(e))
+                logger.warning("%s call %s failed: %s", service, tool, e)
+                return {"error": str(e), "retryable": True}
+            
+            call.set_attribute("http.status_code", response.status_code)
+            _record_status(circuit, response.status_code)
+            # MCP servers report failures as HTTPException, i.e. {"detail": ...}
+            if response.status_code >= 400:
+                error = str(result.get("detail", f"HTTP {response.status_code}"))
+                call.set_error(error)
+                logger.warning("%s call %s returned %s: %s", service, tool, response.status_code, error)
+                return {"error": error, "retryable": _retryable(response.status_code)}
+            return result
+    
+    def _call_handler(self, service: str, tool: str, payload: Dict[str, Any], call) -> Dict[str, Any]:
+        """Run an MCP tool's handler directly, skipping the local HTTP hop and JSON round-trip"""
+        from fastapi import HTTPException
+        
+        handler, request_model = importlib.import_module(f"mcp.{service}_server").TOOLS[tool]
+        try:
+            return handler(request_model(**payload))
+        except HTTPException as e:
+            call.set_attribute("http.status_code", e.status_code)
+            error, retryable = str(e.detail), _retryable(e.status_code)
+        except Exception as e:
+            # An unexpected failure, like a 500 from the HTTP transport
+            error, retryable = str(e), True
+        call.set_error(error)
+        logger.warning("%s call %s failed: %s", service, tool, error)
+        return {"error": error, "retryable": retryable}
+    
+    def _session(self, service: str) -> MCPSession:
+        # Services behind the same gateway share one session
+        key = service if self.transport == 'stdio' else f"{self.base_urls[service]}/mcp"
+        with self.sessions_lock:
+            session = self.sessions.get(key)
+            if session is None or session.closed:
+                if self.transport == 'stdio':
+                    session = StdioMCPSession.for_service(service)
+                else:
+                    session = HTTPMCPSession(key)
+                self.sessions[key] = session
+            return session
     
-    def post_to_slack(self, channel: str, text: str, thread_ts: str = None) -> Dict[str, Any]:
-        if not Config.has_slack_config():
+    def _call_session(self, service: str, tool: str, payload: Dict[str, Any], call) -> Dict[str, Any]:
+        circuit = breaker(service, self.base_urls[service])
+        try:
+            result = self._session(service).call_tool(tool, payload)
+        except Exception as e:
+            circuit.record_failure(str(e) or type(e).__name__)
+            result = {"error": str(e) or type(e).__name__, "retryable": True}
+        else:
+            # Tool errors carry the status the REST endpoint would have answered with
+            status = result.pop("status_code", 200) if result.get("error") else 200
+            _record_status(circuit, status)
+            if result.get("error"):
+                call.set_attribute("http.status_code", status)
+                result["retryable"] = _retryable(status)
+        if result.get("error"):
+            call.set_error(str(result["error"]))
+            logger.warning("%s call %s failed: %s", service, tool, result["error"])
+        return result
+    
+    def close(self):
+        with self.sessions_lock:
+            for session in self.sessions.values():
+                session.close()
+            self.sessions.clear()
+    
+    def post_to_slack(self, channel: str, text: str, thread_ts: str = None, blocks: List[Dict[str, Any]] = None) -> Dict[str, Any]:
+        if not self.config.has_slack_config():
             return {"error": "Slack not configured"}
         
-        url = f"{self.base_urls['slack']}/slack_post_message"
         payload = {
             "channel": channel,
             "text": text
         }
         if thread_ts:
             payload["thread_ts"] = thread_ts
+        if blocks:
+            payload["blocks"] = blocks
         
-        try:
-            response = requests.post(url, json=payload, timeout=30)
-            return response.json()
-        except Exception as e:
-            return {"error": str(e)}
+        return self._post('slack', 'slack_post_message', payload)
     
-    def create_notion_task(self, title: str, body: str, due_date: str = None, assignee: str = None) -> Dict[str, Any]:
-        if not Config.has_notion_config():
+    def update_slack_message(self, channel: str, ts: str, text: str, blocks: List[Dict[str, Any]] = None) -> Dict[str, Any]:
+        if not self.config.has_slack_config():
+            return {"error": "Slack not configured"}
+        
+        payload = {"channel": channel, "ts": ts, "text": text}
+        if blocks is not None:
+            payload["blocks"] = blocks
+        return self._post('slack', 'slack_update_message', payload)
+    
+    def delete_slack_message(self, channel: str, ts: str) -> Dict[str, Any]:
+        if not self.config.has_slack_config():
+            return {"error": "Slack not configured"}
+        
+        return self._post('slack', 'slack_delete_message', {"channel": channel, "ts": ts})
+    
+    def list_slack_users(self) -> Dict[str, Any]:
+        if not self.config.has_slack_config():
+            return {"error": "Slack not configured"}
+        
+        return self._post('slack', 'slack_list_users', {})
+    
+    def create_notion_task(self, title: str, body: str, due_date: str = None, assignee: str = None,
+                           assignee_user_id: str = None) -> Dict[str, Any]:
+        if not self.config.has_notion_config():
             return {"error": "Notion not configured"}
         
-        url = f"{self.base_urls['notion']}/notion_create_task"
         payload = {
-            "database_id": Config.NOTION_DATABASE_ID,
+            "database_id": self.config.NOTION_DATABASE_ID,
             "title": title,
             "body": body
         }
@@ -43,36 +193,121 @@ class MCPClient:
             payload["due_date"] = due_date
         if assignee:
             payload["assignee"] = assignee
+        if assignee_user_id:
+            payload["assignee_user_id"] = assignee_user_id
         
-        try:
-            print(f"Sending to Notion: {payload}")
-            response = requests.post(url, json=payload, timeout=30)
-            print(f"Notion response status: {response.status_code}")
-            result = response.json()
-            print(f"Notion response: {result}")
-            return result
-        except Exception as e:
-            print(f"Notion error: {str(e)}")
-            return {"error": str(e)}
+        return self._post('notion', 'notion_create_task', payload)
     
-    def create_jira_issue(self, summary: str, description: str, assignee: str = None) -> Dict[str, Any]:
-        if not Config.has_jira_config():
-            return {"error": "Jira not configured"}
+    def update_notion_task(self, page_id: str, title: str, body: str = None, due_date: str = None, assignee: str = None,
+                           assignee_user_id: str = None) -> Dict[str, Any]:
+        if not self.config.has_notion_config():
+            return {"error": "Notion not configured"}
         
-        url = f"{self.base_urls['jira']}/jira_create_issue"
         payload = {
-            "cloud_base_url": Config.JIRA_BASE_URL,
-            "email": Config.JIRA_EMAIL,
-            "api_token": Config.JIRA_API_TOKEN,
-            "project_key": Config.JIRA_PROJECT_KEY,
-            "summary": summary,
-            "description": description
+            "page_id": page_id,
+            "database_id": self.config.NOTION_DATABASE_ID,
+            "title": title,
+            # Sent even when empty: None clears the page's due date
+            "due_date": due_date
         }
+        if body is not None:
+            payload["body"] = body
         if assignee:
             payload["assignee"] = assignee
+        if assignee_user_id:
+            payload["assignee_user_id"] = assignee_user_id
         
-        try:
-            response = requests.post(url, json=payload, timeout=30)
-            return response.json()
-        except Exception as e:
-            return {"error": str(e)}
\ No newline at end of file
+        return self._post('notion', 'notion_update_task', payload)
+    
+    def archive_notion_task(self, page_id: str) -> Dict[str, Any]:
+        if not self.config.has_notion_config():
+            return {"error": "Notion not configured"}
+        
+        return self._post('notion', 'notion_archive_task', {"page_id": page_id})
+    
+    def list_notion_users(self) -> Dict[str, Any]:
+        if not self.config.has_notion_config():
+            return {"error": "Notion not configured"}
+        
+        return self._post('notion', 'notion_list_users', {})
+    
+    def query_notion_changes(self, since: str) -> Dict[str, Any]:
+        if not self.config.has_notion_config():
+            return {"error": "Notion not configured"}
+        
+        return self._post('notion', 'notion_query_changes', {"database_id": self.config.NOTION_DATABASE_ID, "since": since})
+    
+    def _jira_credentials(self) -> Dict[str, Any]:
+        return {
+            "cloud_base_url": self.config.JIRA_BASE_URL,
+            "email": self.config.JIRA_EMAIL,
+            "api_token": self.config.JIRA_API_TOKEN
+        }
+    
+    def create_jira_issue(self, summary: str, description: str, assignee_account_id: str = None) -> Dict[str, Any]:
+        if not self.config.has_jira_config():
+            return {"error": "Jira not configured"}
+        
+        payload = self._jira_credentials()
+        payload.update({
+            "project_key": self.config.JIRA_PROJECT_KEY,
+            "summary": summary,
+            "description": description
+        })
+        if assignee_account_id:
+            payload["assignee_account_id"] = assignee_account_id
+        
+        return self._post('jira', 'jira_create_issue', payload)
+    
+    def create_jira_issues(self, issues: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Create up to JIRA_BULK_LIMIT issues in one call; one response per issue, in order"""
+        if not self.config.has_jira_config():
+            return [{"error": "Jira not configured"}] * len(issues)
+        
+        payload = self._jira_credentials()
+        payload.update({
+            "project_key": self.config.JIRA_PROJECT_KEY,
+            "issues": issues
+        })
+        response = self._post('jira', 'jira_create_issues', payload)
+        if response.get('error'):
+            # The whole call failed, so every issue did
+            return [response] * len(issues)
+        return response['issues']
+    
+    def update_jira_issue(self, issue_key: str, summary: str, description: str, assignee_account_id: str = None) -> Dict[str, Any]:
+        if not self.config.has_jira_config():
+            return {"error": "Jira not configured"}
+        
+        payload = self._jira_credentials()
+        payload.update({
+            "issue_key": issue_key,
+            "summary": summary,
+            "description": description
+        })
+        if assignee_account_id:
+            payload["assignee_account_id"] = assignee_account_id
+        
+        return self._post('jira', 'jira_update_issue', payload)
+    
+    def delete_jira_issue(self, issue_key: str) -> Dict[str, Any]:
+        if not self.config.has_jira_config():
+            return {"error": "Jira not configured"}
+        
+        payload = self._jira_credentials()
+        payload["issue_key"] = issue_key
+        return self._post('jira', 'jira_delete_issue', payload)
+    
+    def list_jira_users(self) -> Dict[str, Any]:
+        if not self.config.has_jira_config():
+            return {"error": "Jira not configured"}
+        
+        return self._post('jira', 'jira_list_users', self._jira_credentials())
+    
+    def search_jira_updates(self, minutes: int) -> Dict[str, Any]:
+        if not self.config.has_jira_config():
+            return {"error": "Jira not configured"}
+        
+        payload = self._jira_credentials()
+        payload.update({"project_key": self.config.JIRA_PROJECT_KEY, "minutes": minutes})
+        return self._post('jira', 'jira_search_updates', payload)
@@ -0,0 +1,251 @@
+"""Long-lived Model Context Protocol client sessions.
+
+A session is initialized once and then carries every tool call to its server. Calls from
+concurrent threads are pipelined: stdio writes them back to back and matches responses by
+JSON-RPC id, and streamable HTTP sends whatever has queued up as one batch per request.
+"""
+import abc
+import itertools
+import json
+import logging
+import queue
+import subprocess
+import sys
+import threading
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Dict, List
+
+import requests
+
+from core.tracing import inject
+
+logger = logging.getLogger(__name__)
+
+PROTOCOL_VERSION = "2025-03-26"
+SESSION_HEADER = "Mcp-Session-Id"
+CLIENT_INFO = {"name": "followupsync", "version": "1.0.0"}
+# Batches in flight at once on one HTTP session
+HTTP_SENDERS = 4
+# Queued after the last message to make a sender thread exit
+_STOP = object()
+
+class MCPError(Exception):
+    """A JSON-RPC error response, or a session that can no longer be used"""
+
+class MCPSession(abc.ABC):
+    def __init__(self, timeout: float = 30):
+        self.timeout = timeout
+        self.ids = itertools.count(1)
+        self.pending: Dict[int, Future] = {}
+        self.pending_lock = threading.Lock()
+        self.closed = False
+
+    def call_tool(self, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Call a tool; tool failures come back as {"error": ...} like the REST endpoints"""
+        result = self.request("tools/call", {"name": name, "arguments": arguments, "_meta": inject({})})
+        if result.get("isError"):
+            return {"error": " ".join(c.get("text", "") for c in result.get("content", [])),
+                    "status_code": (result.get("_meta") or {}).get("status_code", 500)}
+        if "structuredContent" in result:
+            return result["structuredContent"]
+        return json.loads(result["content"][0]["text"])
+
+    def request(self, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        if self.closed:
+            raise MCPError("MCP session is closed")
+        request_id = next(self.ids)
+        future = Future()
+        with self.pending_lock:
+            self.pending[request_id] = future
+        self._send({"jsonrpc": "2.0", "id": request_id, "method": method, "params": params})
+        try:
+            return future.result(self.timeout)
+        finally:
+            with self.pending_lock:
+                self.pending.pop(request_id, None)
+
+    def notify(self, method: str, params: Dict[str, Any] = None):
+        self._send({"jsonrpc": "2.0", "method": method, "params": params or {}})
+
+    def _initialize(self):
+        self.request("initialize", {
+            "protocolVersion": PROTOCOL_VERSION,
+            "capabilities": {},
+            "clientInfo": CLIENT_INFO
+        })
+        self.notify("notifications/initialized")
+
+    def _resolve(self, message: Dict[str, Any]):
+        with self.pending_lock:
+            future = self.pending.get(message.get("id"))
+        if future is None or future.done():
+            return
+        if "error" in message:
+            future.set_exception(MCPError(message["error"].get("message", "Unknown error")))
+        else:
+            future.set_result(message.get("result", {}))
+
+    def _fail_pending(self, error: Exception, ids: List[int] = None):
+        with self.pending_lock:
+            futures = [f for i, f in self.pending.items() if ids is None or i in ids]
+        for future in futures:
+            if not future.done():
+                future.set_exception(error)
+
+    @abc.abstractmethod
+    def _send(self, message: Dict[str, Any]):
+        """Hand one JSON-RPC message to the transport; responses arrive through _resolve"""
+
+    def close(self):
+        self.closed = True
+        self._fail_pending(MCPError("MCP session is closed"))
+
+class StdioMCPSession(MCPSession):
+    """Session with a server started as a subprocess speaking MCP on stdin/stdout"""
+
+    def __init__(self, command: List[str], timeout: float = 30):
+        super().__init__(timeout)
+        self.process = subprocess.Popen(
+            command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            cwd=str(Path(__file__).parent.parent),
+            text=True,
+            bufsize=1
+        )
+        self.write_lock = threading.Lock()
+        threading.Thread(target=self._read, name="mcp-stdio-reader", daemon=True).start()
+        self._initialize()
+
+    def _send(self, message: Dict[str, Any]):
+        with self.write_lock:
+            try:
+                self.process.stdin.write(json.dumps(message) + "\n")
+                self.process.stdin.flush()
+            except (BrokenPipeError, ValueError) as e:
+                self.closed = True
+                raise MCPError(f"MCP server exited: {e}")
+
+    def _read(self):
+        for line in self.process.stdout:
+            try:
+                message = json.loads(line)
+            except ValueError:
+                logger.warning("Ignoring non-JSON output from MCP server: %s", line[:200])
+                continue
+            for item in (message if isinstance(message, list) else [message]):
+                self._resolve(item)
+        self.closed = True
+        self._fail_pending(MCPError("MCP server exited"))
+
+    def close(self):
+        super().close()
+        if self.process.poll() is None:
+            self.process.stdin.close()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+    @classmethod
+    def for_service(cls, service: str, timeout: float = 30) -> "StdioMCPSession":
+        script = Path(__file__).parent.parent / "mcp" / f"{service}_server.py"
+        return cls([sys.executable, str(script), "--stdio"], timeout)
+
+class HTTPMCPSession(MCPSession):
+    """Session over streamable HTTP (`POST <server>/mcp`) on keep-alive connections"""
+
+    def __init__(self, url: str, timeout: float = 30):
+        super().__init__(timeout)
+        self.url = url
+        self.http = requests.Session()
+        self.session_id = None
+        self.outbox: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+        self.senders: List[threading.Thread] = []
+        self.senders_stopped = False
+        # initialize is sent directly: its response carries the session id the senders need
+        messages = self._post([{
+            "jsonrpc": "2.0",
+            "id": next(self.ids),
+            "method": "initialize",
+            "params": {"protocolVersion": PROTOCOL_VERSION, "capabilities": {}, "clientInfo": CLIENT_INFO}
+        }])
+        if not messages or "error" in messages[0]:
+            raise MCPError(f"MCP initialize failed: {messages[0]['error'] if messages else 'no response'}")
+        for i in range(HTTP_SENDERS):
+            sender = threading.Thread(target=self._drain, name=f"mcp-http-sender-{i}", daemon=True)
+            sender.start()
+            self.senders.append(sender)
+        self.notify("notifications/initialized")
+
+    def _send(self, message: Dict[str, Any]):
+        self.outbox.put(message)
+
+    def _drain(self):
+        while True:
+            message = self.outbox.get()
+            if message is _STOP:
+                return
+            batch = [message]
+            stop = False
+            # Everything that queued up while the previous batch was in flight goes together
+            while True:
+                try:
+                    message = self.outbox.get_nowait()
+                except queue.Empty:
+                    break
+                if message is _STOP:
+                    stop = True
+                    break
+                batch.append(message)
+            ids = [m["id"] for m in batch if "id" in m]
+            try:
+                for message in self._post(batch):
+                    self._resolve(message)
+            except Exception as e:
+                logger.warning("MCP request to %s failed: %s", self.url, e)
+                self._fail_pending(e if isinstance(e, MCPError) else MCPError(str(e)), ids)
+                if self.closed:
+                    # The server dropped the session; nothing queued after this can succeed
+                    self._stop_senders()
+            if stop:
+                return
+
+    def _stop_senders(self):
+        with self.pending_lock:
+            if self.senders_stopped:
+                return
+            self.senders_stopped = True
+        for _ in self.senders:
+            self.outbox.put(_STOP)
+
+    def _post(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        headers = {"Accept": "application/json, text/event-stream"}
+        if self.session_id:
+            headers[SESSION_HEADER] = self.session_id
+        response = self.http.post(self.url, json=batch, headers=headers, timeout=self.timeout)
+        if response.status_code == 404 and self.session_id:
+            # The server forgot the session (e.g. it restarted); callers open a new one
+            self.closed = True
+            raise MCPError("MCP session expired")
+        if response.status_code >= 400:
+            raise MCPError(f"HTTP {response.status_code}: {response.text[:200]}")
+        self.session_id = response.headers.get(SESSION_HEADER, self.session_id)
+        if response.status_code == 202:
+            # Only notifications were sent
+            return []
+        messages = response.json()
+        return messages if isinstance(messages, list) else [messages]
+
+    def close(self):
+        super().close()
+        self._stop_senders()
+        for sender in self.senders:
+            if sender is not threading.current_thread():
+                sender.join(self.timeout)
+        if self.session_id:
+            try:
+                self.http.delete(self.url, headers={SESSION_HEADER: self.session_id}, timeout=5)
+            except requests.RequestException:
+                pass
@@ -0,0 +1,114 @@
+"""Move runs saved under the old S3 layout to the partitioned one.
+
+Runs used to be saved as followupsync/{run_id}/{filename}; they now live under
+followupsync/{shard}/{yyyy}/{mm}/{dd}/{run_id}/ (see core/storage.py), and runs whose ID
+predates ULIDs under followupsync/{shard}/undated/{run_id}/. Migrating copies each object
+server-side, uploads the transcript of runs whose input was only kept locally
+(data/input/{run_id}.txt), then deletes the old keys. Run IDs are kept, since delivery ledgers,
+Notion/Jira items, status and reminders refer to them.
+
+    python -m core.migrate_runs plan
+    python -m core.migrate_runs migrate [--keep] [--workers 8]
+    python -m core.migrate_runs list --since 2026-10-01 [--until 2026-10-08]
+
+A migration can be interrupted and re-run: moved runs are no longer under the old layout.
+Until it is done, S3_LEGACY_FALLBACK=true reads unmigrated runs where they are; set it to false
+afterwards.
+"""
+import argparse
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+from core.config import Config
+from core.storage import KEY_ROOT, KEY_SHARDS, StorageManager, key_shard_name, legacy_prefix, run_prefix
+
+logger = logging.getLogger(__name__)
+
+SHARD_NAMES = {key_shard_name(shard) for shard in range(KEY_SHARDS)}
+
+# Keys per DeleteObjects request (the S3 maximum)
+DELETE_BATCH = 1000
+
+def legacy_runs(storage: StorageManager) -> Iterator[str]:
+    """IDs of the runs still saved under followupsync/{run_id}/"""
+    paginator = storage.s3_client.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=storage.config.S3_BUCKET, Prefix=f"{KEY_ROOT}/", Delimiter='/'):
+        for prefix in page.get('CommonPrefixes', []):
+            name = prefix['Prefix'][len(KEY_ROOT) + 1:-1]
+            if name not in SHARD_NAMES:
+                yield name
+
+def _keys(storage: StorageManager, prefix: str) -> List[str]:
+    paginator = storage.s3_client.get_paginator('list_objects_v2')
+    return [obj['Key'] for page in paginator.paginate(Bucket=storage.config.S3_BUCKET, Prefix=f"{prefix}/")
+            for obj in page.get('Contents', [])]
+
+def migrate_run(storage: StorageManager, run_id: str, keep: bool = False) -> Dict[str, Any]:
+    """Copy one run to its new prefix, upload its local input if S3 has none, drop the old keys"""
+    bucket = storage.config.S3_BUCKET
+    old_prefix, new_prefix = legacy_prefix(run_id), run_prefix(run_id)
+    try:
+        keys = _keys(storage, old_prefix)
+        for key in keys:
+            # Managed copy: multipart for objects over 5 GB, server-side either way
+            storage.s3_client.copy({'Bucket': bucket, 'Key': key}, bucket, new_prefix + key[len(old_prefix):])
+
+        names = {key[len(old_prefix) + 1:] for key in keys}
+        input_path = Path(f"data/input/{run_id}.txt")
+        if "input.txt" in names:
+            input_status = "present"
+        elif input_path.exists():
+            storage.s3_client.upload_file(str(input_path), bucket, f"{new_prefix}/input.txt")
+            input_status = "uploaded"
+        else:
+            input_status = "missing"
+
+        if not keep:
+            for start in range(0, len(keys), DELETE_BATCH):
+                storage.s3_client.delete_objects(Bucket=bucket, Delete={
+                    'Objects': [{'Key': key} for key in keys[start:start + DELETE_BATCH]], 'Quiet': True
+                })
+    except Exception as e:
+        logger.warning("❌ Moving run %s failed: %s", run_id, e)
+        return {"run_id": run_id, "error": str(e)}
+    return {"run_id": run_id, "objects": len(keys), "input": input_status, "prefix": new_prefix}
+
+def migrate(storage: StorageManager, keep: bool = False, workers: int = 8) -> List[Dict[str, Any]]:
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="migrate-runs") as executor:
+        return list(executor.map(lambda run_id: migrate_run(storage, run_id, keep), legacy_runs(storage)))
+
+def main():
+    parser = argparse.ArgumentParser(description="Move runs to the partitioned S3 key layout")
+    parser.add_argument("command", choices=["plan", "migrate", "list"])
+    parser.add_argument("--keep", action="store_true", help="Keep the objects under the old layout")
+    parser.add_argument("--workers", type=int, default=8, help="Runs moved in parallel")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="list: first day (YYYY-MM-DD)")
+    parser.add_argument("--until", type=datetime.fromisoformat, help="list: day after the last (default: now)")
+    parser.add_argument("--tenant", help="One of TENANTS; the default configuration when omitted")
+    args = parser.parse_args()
+
+    storage = StorageManager(Config.for_tenant(args.tenant))
+    if args.command == "list":
+        if not args.since:
+            parser.error("list needs --since")
+        for run_id in storage.list_runs(args.since, args.until):
+            print(run_id)
+        return
+    if not storage.is_aws:
+        print("Local runs stay in data/output/{run_id}/; nothing to migrate")
+        return
+    if args.command == "plan":
+        for run_id in legacy_runs(storage):
+            print(f"{legacy_prefix(run_id)}/ -> {run_prefix(run_id)}/")
+        return
+    results = migrate(storage, args.keep, args.workers)
+    failed = [r for r in results if r.get("error")]
+    uploaded = sum(1 for r in results if r.get("input") == "uploaded")
+    print(f"Moved {len(results) - len(failed)} run(s), uploaded {uploaded} input(s)"
+          + (f"; {len(failed)} failed: {', '.join(r['run_id'] for r in failed)}" if failed else ""))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from core.config import Config
+from core.schema import ExtractionResult
+
+_lock = threading.Lock()
+
+class Outbox:
+    """Deliveries that could not reach an integration, kept on disk until they are replayed.
+
+    One file per run, {OUTBOX_DIR}/{run_id}.json, holding the result and the integrations
+    still owed. Replaying simply delivers the run again: the delivery ledger makes that
+    create only what is missing.
+    """
+
+    def __init__(self, directory: str = None):
+        self.directory = Path(directory or Config.OUTBOX_DIR)
+
+    def add(self, result: ExtractionResult, service: str, options: Any, error: str):
+        with _lock:
+            entry = self._read(result.run_id) or {"run_id": result.run_id, "services": {}}
+            previous = entry["services"].get(service, {})
+            entry["result"] = result.model_dump(mode='json')
+            entry["services"][service] = {
+                "options": options,
+                "error": error,
+                "attempts": previous.get("attempts", 0) + 1,
+                "queued_at": previous.get("queued_at") or datetime.now(timezone.utc).isoformat()
+            }
+            self._write(result.run_id, entry)
+
+    def remove(self, run_id: str, service: str):
+        with _lock:
+            entry = self._read(run_id)
+            if not entry or service not in entry["services"]:
+                return
+            del entry["services"][service]
+            if entry["services"]:
+                self._write(run_id, entry)
+            else:
+                os.remove(self._path(run_id))
+
+    def entries(self) -> List[Dict[str, Any]]:
+        if not self.directory.exists():
+            return []
+        with _lock:
+            return [json.loads(path.read_text(encoding='utf-8')) for path in sorted(self.directory.glob("*.json"))]
+
+    def pending(self) -> Dict[str, int]:
+        """Number of queued runs per service"""
+        counts: Dict[str, int] = {}
+        for entry in self.entries():
+            for service in entry["services"]:
+                counts[service] = counts.get(service, 0) + 1
+        return counts
+
+    def _path(self, run_id: str) -> Path:
+        return self.directory / f"{run_id}.json"
+
+    def _read(self, run_id: str) -> Optional[Dict[str, Any]]:
+        path = self._path(run_id)
+        return json.loads(path.read_text(encoding='utf-8')) if path.exists() else None
+
+    def _write(self, run_id: str, entry: Dict[str, Any]):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp = self._path(run_id).with_suffix('.tmp')
+        tmp.write_text(json.dumps(entry, indent=2), encoding='utf-8')
+        os.replace(tmp, self._path(run_id))
@@ -1,131 +1,532 @@
-import uuid
-from typing import Dict, Any, List
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, Any, Iterable, List, Optional, Callable
 from core.schema import ExtractionResult
-from core.extract import Extractor
+from core.extract import Extractor, iter_lines
 from core.storage import StorageManager
-from core.mcp_client import MCPClient
+from core.mcp_client import JIRA_BULK_LIMIT, MCPClient
+from core.incremental import IncrementalExtractor
+from core.ids import assign_item_ids, new_run_id
+from core.grounding import (StreamedTranscriptIndex, TranscriptIndex, deliverable_items, ground_result,
+                            result_quotes)
+from core.render import FORMATS, renderer
+from core.ledger import DeliveryLedger, fingerprint
+from core.directory import directory
+from core.slack_blocks import render_digest, render_messages, render_reminder
+from core.circuit import OPEN, breaker
+from core.outbox import Outbox
+from core.digest import DigestQueue, build_digest, is_due
+from core.status import SERVICES as STATUS_SERVICES, StatusStore, StatusSync
+from core.reminders import BATCH_SIZE as REMINDER_BATCH_SIZE, ReminderQueue, coalesce, unique_items
+from core.profiling import SamplingProfiler, save_profile, should_profile
+from core.usage import UsageStore, budget_used
+from core.tracing import metrics, span
+from core.config import Config
+
+logger = logging.getLogger(__name__)
 
 class Pipeline:
-    def __init__(self):
-        self.extractor = Extractor()
-        self.storage = StorageManager()
-        self.mcp_client = MCPClient()
+    def __init__(self, config=None):
+        # Config or a tenant's Config.for_tenant(...), passed on to every component
+        self.config = config or Config
+        # Bedrock spend per day and tenant, checked against the budgets before each extraction
+        self.usage = UsageStore(self.config.USAGE_DIR)
+        self.extractor = Extractor(self.config, usage=self.usage)
+        self.storage = StorageManager(self.config)
+        self.mcp_client = MCPClient(self.config)
+        self.incremental = IncrementalExtractor(self.extractor, self.storage)
+        # Owner name -> Slack/Jira/Notion user IDs, shared by every pipeline of the tenant in this process
+        self.directory = directory(self.config, self.mcp_client)
+        self.outbox = Outbox(self.config.OUTBOX_DIR)
+        self.digests = DigestQueue(self.config.DIGEST_DIR)
+        # A digest is delivered by one caller at a time (size threshold, scheduler, CLI)
+        self.digest_lock = threading.Lock()
+        self.analytics = None
+        # Status of delivered Notion/Jira items, pulled back by sync_status
+        self.status = StatusStore(self.config.STATUS_DIR)
+        self.status_sync = StatusSync(self.mcp_client, self.status, self.config)
+        self.reminders = ReminderQueue(self.config.REMINDERS_DIR)
+        for service in ('slack', 'notion', 'jira'):
+            # When a service answers health checks again, deliver what was queued for it
+            hook = f"outbox:{self.config.TENANT}" if self.config.TENANT else 'outbox'
+            circuit = breaker(service, self.mcp_client.base_urls[service])
+            circuit.on_recovery[hook] = lambda circuit: self.replay_outbox(circuit.name)
+        # Trace of the most recent pipeline call, for in-app timing
+        self.last_trace_id = None
+        # Saved paths of the profiles taken by the most recent calls, per step (extract, deliver)
+        self.last_profiles: Dict[str, Dict[str, str]] = {}
     
-    def process_transcript(self, transcript: str) -> ExtractionResult:
-        run_id = str(uuid.uuid4())[:8]
+    def process_transcript(self, transcript: str, run_id: Optional[str] = None, incremental: bool = False,
+                           profile: Optional[bool] = None) -> ExtractionResult:
+        """Extract a transcript.
+
+        Passing the run_id of a previous run with incremental=True re-extracts only the
+        segments that changed and keeps the IDs of unchanged items. profile=True saves a
+        profile of the call with the run's outputs; by default PROFILE_SAMPLE_RATE decides.
+        """
+        run_id = run_id or new_run_id()
         
-        # Save input
-        self.storage.save_input(run_id, transcript)
+        with self._profiled("extract", run_id, profile), \
+                span("process_transcript", run_id=run_id, incremental=incremental) as root:
+            self.last_trace_id = root.trace_id
+            
+            # Save input
+            with span("storage.save_input"):
+                self.storage.save_input(run_id, transcript)
+            
+            # Extract structured data
+            if incremental:
+                result = self.incremental.extract(transcript, run_id)
+            else:
+                result = assign_item_ids(self.extractor.extract(transcript, run_id))
+            
+            self.record_usage(result)
+            result = self.ground(result, transcript)
+            if not incremental:
+                # So that the first incremental edit reuses the unchanged segments and item IDs
+                self.incremental.seed(lambda: iter_lines(transcript), run_id, result)
+            return result
+    
+    def process_stream(self, chunks: Iterable[bytes], run_id: Optional[str] = None, incremental: bool = False,
+                       profile: Optional[bool] = None) -> ExtractionResult:
+        """Extract a transcript that arrives as chunks of UTF-8 bytes (an upload, a file).
+
+        The input is written to storage as it is read. Local extraction then reads it line by
+        line from a memory map, so memory stays flat however large the transcript is (grounding
+        streams it again, twice, keeping only the lines the items point to); Bedrock and
+        incremental extraction need the whole text and read it back.
+        """
+        run_id = run_id or new_run_id()
         
-        # Extract structured data
-        result = self.extractor.extract(transcript, run_id)
+        with self._profiled("extract", run_id, profile), \
+                span("process_transcript", run_id=run_id, incremental=incremental, streamed=True) as root:
+            self.last_trace_id = root.trace_id
+            
+            with span("storage.save_input_stream"):
+                path = self.storage.save_input_stream(run_id, chunks)
+            
+            if incremental or self.extractor.is_aws:
+                transcript = Path(path).read_text(encoding='utf-8')
+                if incremental:
+                    result = self.incremental.extract(transcript, run_id)
+                else:
+                    result = assign_item_ids(self.extractor.extract(transcript, run_id))
+                self.record_usage(result)
+                result = self.ground(result, transcript)
+                if not incremental:
+                    self.incremental.seed(lambda: iter_lines(transcript), run_id, result)
+                return result
+            else:
+                lines = self.storage.iter_input_lines(run_id)
+                result = self.extractor.extract_lines(lines, run_id, transcript_bytes=self.storage.input_size(run_id))
+            
+            result = assign_item_ids(result)
+            self.record_usage(result)
+            result = self.ground(result, read_lines=lambda: self.storage.iter_input_lines(run_id))
+            self.incremental.seed(lambda: self.storage.iter_input_lines(run_id), run_id, result)
+            return result
+    
+    @contextmanager
+    def _profiled(self, step: str, run_id: str, profile: Optional[bool]):
+        """Sample the call tree of the block and save it with the run's outputs, even if the block fails"""
+        self.last_profiles.pop(step, None)
+        if not should_profile(profile, self.config.PROFILE_SAMPLE_RATE):
+            yield
+            return
+        profiler = SamplingProfiler(self.config.PROFILE_INTERVAL_MS / 1000)
+        try:
+            with profiler:
+                yield
+        finally:
+            try:
+                self.last_profiles[step] = save_profile(self.storage, run_id, step, profiler)
+                metrics.increment("followupsync_profiles_saved_total", step=step)
+                logger.info("🔬 %s: %s profile saved (%d samples)", run_id, step, len(profiler.samples))
+            except Exception as e:
+                # A profile is never worth failing the run for
+                logger.warning("🔬 %s: could not save %s profile: %s", run_id, step, e)
+    
+    def record_usage(self, result: ExtractionResult):
+        """Add the Bedrock usage of an extraction to the tenant's spend and metrics"""
+        usage = result.usage
+        if usage is None:
+            return
+        tenant = self.config.TENANT or ''
+        self.usage.record(self.config.TENANT, result.run_id, usage)
+        for kind in ('input', 'output', 'cache_read', 'cache_write'):
+            metrics.increment("followupsync_bedrock_tokens_total", getattr(usage, f"{kind}_tokens"),
+                              tenant=tenant, model=usage.model_id or '', kind=kind)
+        metrics.increment("followupsync_bedrock_cost_usd_total", usage.cost_usd, tenant=tenant, model=usage.model_id or '')
+        if usage.downgraded_from:
+            metrics.increment("followupsync_budget_downgrades_total", tenant=tenant, model=usage.model_id or '')
+        metrics.set_gauge("followupsync_budget_used_ratio", round(budget_used(self.usage, self.config), 4), tenant=tenant)
+        logger.info("🪙 %s: %d input / %d output tokens (%d cached), $%.4f", result.run_id, usage.input_tokens,
+                    usage.output_tokens, usage.cache_read_tokens, usage.cost_usd)
+    
+    def ground(self, result: ExtractionResult, transcript: Optional[str] = None,
+               read_lines: Optional[Callable[[], Iterable[str]]] = None) -> ExtractionResult:
+        """Locate every item in the transcript, flagging or dropping those it does not support.
         
+        Without the transcript's text, read_lines is called to stream its lines (twice).
+        """
+        if self.config.GROUNDING_POLICY == 'off':
+            return result
+        with span("grounding", run_id=result.run_id, policy=self.config.GROUNDING_POLICY,
+                  streamed=transcript is None) as grounding:
+            if transcript is None:
+                index = StreamedTranscriptIndex(read_lines, result_quotes(result))
+            else:
+                index = TranscriptIndex(transcript)
+            stats = ground_result(result, index, self.config.GROUNDING_MIN_SCORE, self.config.GROUNDING_POLICY)
+            for key, value in stats.items():
+                grounding.set_attribute(key, value)
+        if stats['flagged'] or stats['dropped']:
+            logger.warning("🔎 %s: %d of %d items not found in the transcript (%s)", result.run_id,
+                           stats['flagged'] + stats['dropped'], stats['checked'], self.config.GROUNDING_POLICY)
         return result
     
     def save_artifacts(self, result: ExtractionResult) -> Dict[str, str]:
-        # Generate summary markdown
-        summary_md = self._generate_summary_md(result)
-        
-        # Save artifacts
-        summary_path = self.storage.save_output(result.run_id, "Summary.md", summary_md)
-        json_path = self.storage.save_output(result.run_id, "ActionItems.json", result.dict())
+        """Save Summary.md, ActionItems.json and the ARTIFACT_FORMATS renderings of a run"""
+        with span("save_artifacts", run_id=result.run_id):
+            paths = self.render_artifacts(result)
+            paths["action_items_json"] = self.storage.save_output(
+                result.run_id, "ActionItems.json", result.model_dump_json(indent=2)
+            )
+            
+            if self.config.ANALYTICS_ENABLED:
+                self.export_analytics(result)
         
-        return {
-            "summary_md": summary_path,
-            "action_items_json": json_path
-        }
+        return paths
     
-    def deliver_to_integrations(self, result: ExtractionResult, integrations: Dict[str, Any]) -> Dict[str, Any]:
+    def render_artifacts(self, result: ExtractionResult, formats: Optional[List[str]] = None) -> Dict[str, str]:
+        """Render templates straight into storage; returns the saved path of each"""
+        formats = formats or ["markdown"] + [f for f in self.config.ARTIFACT_FORMATS if f != "markdown"]
+        artifacts = renderer(self.config.ARTIFACT_TEMPLATES_DIR)
+        context = artifacts.context(result)
+        paths = {}
+        for fmt in formats:
+            filename, key = FORMATS[fmt]
+            with span("render", format=fmt):
+                paths[key] = self.storage.save_output_stream(result.run_id, filename, artifacts.generate(fmt, context))
+        return paths
+    
+    def export_analytics(self, result: ExtractionResult) -> Dict[str, int]:
+        """Append the run to the columnar analytics store"""
+        # pyarrow is only imported once something is exported
+        from core.analytics import AnalyticsStore
+        if self.analytics is None:
+            self.analytics = AnalyticsStore(self.config.ANALYTICS_DIR)
+        return self.analytics.export(result)
+    
+    def deliver_to_integrations(self, result: ExtractionResult, integrations: Dict[str, Any],
+                                profile: Optional[bool] = None) -> Dict[str, Any]:
+        """Deliver a run, sending only what changed since it was last delivered.
+
+        Every operation is recorded in the run's delivery ledger, so pressing Send twice
+        does not duplicate anything and an edited run only updates the items that changed.
+        """
+        assign_item_ids(result)
+        ledger = DeliveryLedger(self.storage, result.run_id)
         results = {}
         
-        if integrations.get('slack'):
-            channel = integrations['slack'].get('channel', '#general')
-            slack_result = self._send_to_slack(result, channel)
-            results['slack'] = slack_result
-        
-        if integrations.get('notion'):
-            notion_result = self._send_to_notion(result)
-            results['notion'] = notion_result
-        
-        if integrations.get('jira'):
-            jira_result = self._send_to_jira(result)
-            results['jira'] = jira_result
+        with self._profiled("deliver", result.run_id, profile), \
+                span("deliver_to_integrations", run_id=result.run_id) as root:
+            self.last_trace_id = root.trace_id
+            
+            # Resolved once per run, so per-item delivery does no user lookups
+            owners = {}
+            if any(integrations.get(service) for service in ('slack', 'notion', 'jira')):
+                with span("directory.resolve"):
+                    owners = self.directory.resolve_all(item.owner for item in result.action_items)
+            
+            if integrations.get('slack'):
+                channel = integrations['slack'].get('channel', '#general')
+                with span("deliver.slack"):
+                    results['slack'] = self._send_to_slack(result, channel, ledger, owners)
+            
+            if integrations.get('notion'):
+                with span("deliver.notion"):
+                    results['notion'] = self._send_to_notion(result, ledger, owners)
+            
+            if integrations.get('jira'):
+                with span("deliver.jira"):
+                    results['jira'] = self._send_to_jira(result, ledger, owners)
+            
+            for service, service_result in results.items():
+                self._queue_failures(result, service, integrations[service], service_result)
+            
+            for service in STATUS_SERVICES:
+                if service in results:
+                    self._track_status(result, service, ledger)
+            
+            if self.config.REMINDERS_ENABLED:
+                slack = integrations.get('slack')
+                channel = slack.get('channel') if isinstance(slack, dict) else None
+                self.schedule_reminders(result, channel or self.config.SLACK_DEFAULT_CHANNEL)
         
         return results
     
-    def _generate_summary_md(self, result: ExtractionResult) -> str:
-        md = f"# Meeting Summary - {result.run_id}\n\n"
-        
-        if result.decisions:
-            md += "## Decisions\n"
-            for i, decision in enumerate(result.decisions, 1):
-                md += f"{i}. {decision.text}\n"
-                if decision.owners:
-                    md += f"   - Owners: {', '.join(decision.owners)}\n"
-            md += "\n"
-        
-        if result.action_items:
-            md += "## Action Items\n"
-            for i, item in enumerate(result.action_items, 1):
-                md += f"{i}. **{item.title}**\n"
-                if item.owner:
-                    md += f"   - Owner: {item.owner}\n"
-                if item.due_date:
-                    md += f"   - Due: {item.due_date}\n"
-                if item.priority:
-                    md += f"   - Priority: {item.priority}\n"
-            md += "\n"
-        
-        if result.risks:
-            md += "## Risks & Blockers\n"
-            for i, risk in enumerate(result.risks, 1):
-                md += f"{i}. {risk.text}\n"
-                if risk.severity:
-                    md += f"   - Severity: {risk.severity}\n"
-                if risk.mitigation:
-                    md += f"   - Mitigation: {risk.mitigation}\n"
-            md += "\n"
-        
-        return md
-    
-    def _send_to_slack(self, result: ExtractionResult, channel: str) -> Dict[str, Any]:
-        summary_text = f"📋 Meeting Summary - {result.run_id}\n"
-        summary_text += f"Decisions: {len(result.decisions)} | Actions: {len(result.action_items)} | Risks: {len(result.risks)}"
-        
-        main_result = self.mcp_client.post_to_slack(channel, summary_text)
-        
-        if main_result.get('ok') and result.action_items:
-            thread_ts = main_result.get('ts')
-            for item in result.action_items:
-                action_text = f"🎯 {item.title}"
-                if item.owner:
-                    action_text += f" (@{item.owner})"
-                if item.due_date:
-                    action_text += f" - Due: {item.due_date}"
-                
-                self.mcp_client.post_to_slack(channel, action_text, thread_ts)
-        
-        return main_result
-    
-    def _send_to_notion(self, result: ExtractionResult) -> List[Dict[str, Any]]:
+    def queue_digest(self, result: ExtractionResult, integrations: Dict[str, Any]) -> Dict[str, Any]:
+        """Queue a run for the digest of its integrations, delivering the digest once it is full"""
+        entry = self.digests.add(result, integrations)
+        queued = {"digest": entry['key'], "runs": len(entry['runs'])}
+        logger.info("📬 %s queued for digest %s (%d run(s))", result.run_id, entry['key'], len(entry['runs']))
+        if len(entry['runs']) >= self.config.DIGEST_MAX_RUNS:
+            queued["delivery"] = self.deliver_digest(entry['key'])
+        return queued
+    
+    def flush_digests(self, force: bool = False) -> Dict[str, Any]:
+        """Deliver the digests that are due, or every digest with force=True"""
+        delivered = {}
+        for entry in self.digests.entries():
+            if force or is_due(entry, self.config.DIGEST_INTERVAL_MINUTES, self.config.DIGEST_MAX_RUNS):
+                delivered[entry['key']] = self.deliver_digest(entry['key'])
+        return delivered
+    
+    def deliver_digest(self, key: str) -> Dict[str, Any]:
+        """Deliver the runs queued in a digest as one consolidated delivery"""
+        with self.digest_lock:
+            entry = self.digests.get(key)
+            if not entry or not entry['runs']:
+                return {}
+            result = build_digest(entry)
+            with span("deliver_digest", digest=key, runs=len(entry['runs'])):
+                delivery = self.deliver_to_integrations(result, entry['integrations'])
+            # Failures that may succeed later are in the outbox now, under the digest's run ID
+            self.digests.remove(key, entry['runs'])
+        logger.info("📬 Delivered digest %s: %d run(s), %d action item(s)", key, len(result.sources), len(result.action_items))
+        return delivery
+    
+    def sync_status(self, services: Optional[List[str]] = None, force: bool = False) -> Dict[str, Any]:
+        """Pull Notion/Jira status changes made since the last sync, for services that are due"""
+        synced = {}
+        for service in services or STATUS_SERVICES:
+            if force or self.status_sync.due(service):
+                synced[service] = self.status_sync.sync(service)
+        return synced
+    
+    def schedule_reminders(self, result: ExtractionResult, channel: str) -> int:
+        """Schedule Slack reminders for the run's items with due dates; returns how many"""
+        return self.reminders.schedule(result, channel, self.config.REMINDER_HOUR, self.config.REMINDER_OFFSETS_HOURS)
+    
+    def send_reminders(self, now: Optional[float] = None) -> Dict[str, int]:
+        """Send the reminders that are due, one Slack message per owner"""
+        now = now or datetime.now().timestamp()
+        today = date.fromtimestamp(now)
+        sent = {"messages": 0, "items": 0, "skipped": 0}
+        
+        while True:
+            due = self.reminders.due(now, REMINDER_BATCH_SIZE)
+            if not due:
+                return sent
+            # Nobody needs reminding of what is done already
+            done = self.status.done_items((r['run_id'], r['item_id']) for r in due)
+            finished = [r for r in due if (r['run_id'], r['item_id']) in done]
+            self.reminders.remove(finished)
+            sent['skipped'] += len(finished)
+            
+            groups = coalesce([r for r in due if (r['run_id'], r['item_id']) not in done])
+            owners = self.directory.resolve_all(owner for owner, _ in groups)
+            for (owner, channel), reminders in groups.items():
+                items = unique_items(reminders)
+                message = render_reminder(owner, items, owners, today)
+                # A direct message when the owner has a Slack account, else the run's channel
+                target = owners.get(owner, {}).get('slack') or channel
+                with span("reminders.send", items=len(items)):
+                    response = self.mcp_client.post_to_slack(target, message['text'], blocks=message['blocks'])
+                if not response.get('error'):
+                    self.reminders.remove(reminders)
+                    sent['messages'] += 1
+                    sent['items'] += len(items)
+                    metrics.increment("followupsync_reminders_sent_total", len(items))
+                elif response.get('retryable'):
+                    self.reminders.postpone(reminders, now, self.config.REMINDER_RETRY_SECONDS)
+                else:
+                    logger.warning("⏰ Dropping %d reminder(s) for %s: %s", len(reminders), owner or channel, response['error'])
+                    self.reminders.remove(reminders)
+    
+    def _track_status(self, result: ExtractionResult, service: str, ledger: DeliveryLedger):
+        entries = ledger.service(service)['items']
+        self.status.track(service, result.run_id, [
+            (entries[item.id]['external_id'], item.id, item.title, item.owner,
+             str(item.due_date) if item.due_date else None)
+            for item in result.action_items if item.id in entries
+        ])
+    
+    def replay_outbox(self, service: Optional[str] = None) -> Dict[str, Any]:
+        """Re-deliver queued runs to integrations whose circuit is no longer open"""
+        replayed = {}
+        for entry in self.outbox.entries():
+            integrations = {
+                name: queued['options'] for name, queued in entry['services'].items()
+                if service in (None, name) and breaker(name, self.mcp_client.base_urls[name]).state != OPEN
+            }
+            if integrations:
+                result = ExtractionResult.model_validate(entry['result'])
+                replayed[entry['run_id']] = self.deliver_to_integrations(result, integrations)
+        return replayed
+    
+    def _queue_failures(self, result: ExtractionResult, service: str, options: Any, service_result: Any):
+        # Only failures that may succeed later (service down, rate limited) go to the outbox
+        if isinstance(service_result, dict):
+            responses = [service_result] + service_result.get('items', [])
+        else:
+            responses = service_result
+        errors = [r['error'] for r in responses if r.get('retryable')]
+        if errors:
+            self.outbox.add(result, service, options, errors[0])
+        else:
+            self.outbox.remove(result.run_id, service)
+    
+    def _sync_items(self, ledger: DeliveryLedger, service: str, payloads: Dict[str, Dict[str, Any]],
+                    id_field: str, create: Callable, update: Callable, delete: Callable,
+                    create_many: Optional[Callable] = None, batch_size: int = 1) -> List[Dict[str, Any]]:
+        """Create, update and delete a service's items to match payloads.
+        
+        With create_many (payloads -> one response per payload), new items are created
+        batch_size at a time instead of one call each.
+        """
+        creates, updates, deletes = ledger.plan(service, payloads)
         results = []
-        for item in result.action_items:
-            notion_result = self.mcp_client.create_notion_task(
-                title=item.title,
-                body=item.notes or "",
-                due_date=str(item.due_date) if item.due_date else None,
-                assignee=item.owner
-            )
-            results.append(notion_result)
+        
+        # The ledger is saved after every change (or batch of creates), so a crash midway does not
+        # lose the external IDs of what was already created and a retry does not duplicate it
+        step = batch_size if create_many else 1
+        for start in range(0, len(creates), step):
+            batch = creates[start:start + step]
+            if len(batch) > 1:
+                responses = create_many([payloads[item_id] for item_id in batch])
+            else:
+                responses = [create(payloads[batch[0]])]
+            for item_id, response in zip(batch, responses):
+                if not response.get('error'):
+                    ledger.record(service, item_id, response.get(id_field), payloads[item_id])
+                results.append({**response, 'op': 'create', 'item_id': item_id})
+            if any(not response.get('error') for response in responses):
+                ledger.save()
+        
+        for item_id in updates:
+            response = update(ledger.external_id(service, item_id), payloads[item_id])
+            if not response.get('error'):
+                ledger.record(service, item_id, ledger.external_id(service, item_id), payloads[item_id])
+                ledger.save()
+            results.append({**response, 'op': 'update', 'item_id': item_id})
+        
+        for item_id in deletes:
+            response = delete(ledger.external_id(service, item_id))
+            if not response.get('error'):
+                ledger.forget(service, item_id)
+                ledger.save()
+            results.append({**response, 'op': 'delete', 'item_id': item_id})
+        
         return results
     
-    def _send_to_jira(self, result: ExtractionResult) -> List[Dict[str, Any]]:
-        results = []
-        for item in result.action_items:
-            jira_result = self.mcp_client.create_jira_issue(
-                summary=item.title,
-                description=item.notes or f"Action item from meeting {result.run_id}",
-                assignee=item.owner
-            )
-            results.append(jira_result)
-        return results
\ No newline at end of file
+    def _send_to_slack(self, result: ExtractionResult, channel: str, ledger: DeliveryLedger,
+                       owners: Dict[str, Dict[str, Optional[str]]]) -> Dict[str, Any]:
+        """Post the run as Block Kit messages, updating them in place on re-delivery"""
+        messages = render_digest(result, owners) if result.sources else render_messages(result, owners)
+        
+        state = ledger.service('slack')
+        if state.get('channel') != channel:
+            # A new channel gets fresh messages
+            state = ledger.reset('slack')
+            state['channel'] = channel
+        posted = state.setdefault('messages', [])
+        operations = []
+        
+        if 'summary' in state:
+            # Delivered before as a summary plus one thread reply per item: the summary
+            # becomes the first message and the replies are removed
+            posted.insert(0, state.pop('summary'))
+            for item_id in list(state['items']):
+                response = self.mcp_client.delete_slack_message(state['channel_id'], ledger.external_id('slack', item_id))
+                if not response.get('error'):
+                    ledger.forget('slack', item_id)
+                operations.append({**response, 'op': 'delete', 'item_id': item_id})
+        
+        for index, message in enumerate(messages):
+            message_fingerprint = fingerprint(message)
+            if index < len(posted):
+                entry = posted[index]
+                if entry['fingerprint'] == message_fingerprint:
+                    continue
+                response = self.mcp_client.update_slack_message(
+                    state['channel_id'], entry['external_id'], message['text'], message['blocks']
+                )
+                if not response.get('error'):
+                    entry['fingerprint'] = message_fingerprint
+                op = 'update'
+            else:
+                # Overflow messages go in the thread of the first one
+                thread_ts = posted[0]['external_id'] if posted else None
+                response = self.mcp_client.post_to_slack(channel, message['text'], thread_ts, message['blocks'])
+                if not response.get('error'):
+                    if not posted:
+                        state['channel_id'] = response.get('channel') or channel
+                    posted.append({"external_id": response.get('ts'), "fingerprint": message_fingerprint})
+                op = 'create'
+            operations.append({**response, 'op': op, 'item_id': f"message-{index + 1}"})
+            if response.get('error'):
+                break
+        else:
+            # The run got shorter: drop messages that are no longer needed
+            while len(posted) > len(messages):
+                response = self.mcp_client.delete_slack_message(state['channel_id'], posted[-1]['external_id'])
+                operations.append({**response, 'op': 'delete', 'item_id': f"message-{len(posted)}"})
+                if response.get('error'):
+                    break
+                posted.pop()
+        ledger.save()
+        
+        if not posted:
+            return operations[-1] if operations else {"error": "Nothing to post"}
+        return {"ok": True, "ts": posted[0]['external_id'], "channel": state['channel_id'], "items": operations}
+    
+    def _send_to_notion(self, result: ExtractionResult, ledger: DeliveryLedger,
+                        owners: Dict[str, Dict[str, Optional[str]]]) -> List[Dict[str, Any]]:
+        payloads = {
+            item.id: {
+                "title": item.title,
+                "body": item.notes or "",
+                "due_date": str(item.due_date) if item.due_date else None,
+                "assignee": item.owner,
+                "assignee_user_id": owners.get(item.owner, {}).get('notion')
+            }
+            for item in deliverable_items(result)
+        }
+        return self._sync_items(
+            ledger, 'notion', payloads, 'id',
+            create=lambda p: self.mcp_client.create_notion_task(**p),
+            update=lambda page_id, p: self.mcp_client.update_notion_task(
+                page_id, p['title'], body=p['body'], due_date=p['due_date'], assignee=p['assignee'],
+                assignee_user_id=p['assignee_user_id']
+            ),
+            delete=self.mcp_client.archive_notion_task
+        )
+    
+    def _send_to_jira(self, result: ExtractionResult, ledger: DeliveryLedger,
+                      owners: Dict[str, Dict[str, Optional[str]]]) -> List[Dict[str, Any]]:
+        payloads = {}
+        for item in deliverable_items(result):
+            account_id = owners.get(item.owner, {}).get('jira')
+            description = item.notes or f"Action item from meeting {result.run_id}"
+            if item.owner and not account_id:
+                # Unassignable owners are kept in the description instead
+                description += f"\nOwner: {item.owner}"
+            payloads[item.id] = {
+                "summary": item.title,
+                "description": description,
+                "assignee_account_id": account_id
+            }
+        return self._sync_items(
+            ledger, 'jira', payloads, 'key',
+            create=lambda p: self.mcp_client.create_jira_issue(**p),
+            update=lambda key, p: self.mcp_client.update_jira_issue(key, **p),
+            delete=self.mcp_client.delete_jira_issue,
+            # New issues go out in bulk requests; a digest of a day's meetings is usually one call
+            create_many=self.mcp_client.create_jira_issues,
+            batch_size=JIRA_BULK_LIMIT
+        )
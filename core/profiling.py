@@ -0,0 +1,143 @@
+"""Opt-in sampling profiler for pipeline calls.
+
+While a call is profiled, a background thread reads the calling thread's stack every
+PROFILE_INTERVAL_MS (sys._current_frames), so the profiled code runs unchanged and the overhead
+depends on the sampling interval, not on how many functions are called. PROFILE_SAMPLE_RATE
+is the share of calls profiled (e.g. 0.01 keeps it on for 1% of production runs); the app can
+also profile a single run.
+
+Each profile is saved next to the run's outputs in two formats:
+
+- Profile-<step>.speedscope.json: open at https://www.speedscope.app
+- Profile-<step>.collapsed.txt: one "frame;frame;frame count" line per stack, for
+  flamegraph.pl or inferno
+
+Threads started by the profiled call (e.g. MCP session senders) are not sampled; time the
+call spends waiting on them shows up in the frame that waits.
+"""
+import json
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# (function name, file, first line) of a stack frame
+Frame = Tuple[str, str, int]
+
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+def should_profile(requested: Optional[bool], sample_rate: float) -> bool:
+    """An explicit request wins; otherwise a random share of calls is profiled"""
+    if requested is not None:
+        return requested
+    return sample_rate > 0 and random.random() < sample_rate
+
+class SamplingProfiler:
+    def __init__(self, interval_seconds: float = 0.01):
+        self.interval = interval_seconds
+        self.frames: Dict[Frame, int] = {}
+        self.stacks: Dict[Tuple[int, ...], int] = {}
+        # Stack index and seconds of every sample, in order
+        self.samples: List[int] = []
+        self.weights: List[float] = []
+        self.thread_id: Optional[int] = None
+        self.stopped = threading.Event()
+        self.sampler: Optional[threading.Thread] = None
+        self.started = 0.0
+        self.elapsed = 0.0
+
+    def __enter__(self):
+        self.thread_id = threading.get_ident()
+        self.started = time.perf_counter()
+        self.sampler = threading.Thread(target=self._run, name="followupsync-profiler", daemon=True)
+        self.sampler.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stopped.set()
+        self.sampler.join()
+        self.elapsed = time.perf_counter() - self.started
+        return False
+
+    def _run(self):
+        last = time.perf_counter()
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            now = time.perf_counter()
+            if frame is None:
+                continue
+            self._record(frame, now - last)
+            last = now
+
+    def _record(self, frame, seconds: float):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            key = (code.co_name, code.co_filename, code.co_firstlineno)
+            index = self.frames.get(key)
+            if index is None:
+                index = self.frames[key] = len(self.frames)
+            stack.append(index)
+            frame = frame.f_back
+        # Outermost frame first
+        stack = tuple(reversed(stack))
+        stack_index = self.stacks.get(stack)
+        if stack_index is None:
+            stack_index = self.stacks[stack] = len(self.stacks)
+        self.samples.append(stack_index)
+        self.weights.append(seconds)
+
+    def _frame_list(self) -> List[Frame]:
+        return sorted(self.frames, key=self.frames.get)
+
+    def collapsed(self) -> str:
+        """Folded stacks: "outer;inner count" per distinct stack"""
+        frames = self._frame_list()
+        stacks = sorted(self.stacks, key=self.stacks.get)
+        counts = Counter(self.samples)
+        lines = []
+        for stack_index, count in sorted(counts.items()):
+            names = (f"{name} ({_short_path(path)}:{line})" for name, path, line in (frames[i] for i in stacks[stack_index]))
+            lines.append(f"{';'.join(names)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def speedscope(self, name: str) -> Dict[str, Any]:
+        """The samples as a speedscope "sampled" profile, in milliseconds"""
+        stacks = sorted(self.stacks, key=self.stacks.get)
+        weights = [round(w * 1000, 3) for w in self.weights]
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": name,
+            "exporter": "followupsync",
+            "shared": {"frames": [{"name": n, "file": path, "line": line} for n, path, line in self._frame_list()]},
+            "profiles": [{
+                "type": "sampled",
+                "name": name,
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": round(sum(weights), 3),
+                "samples": [list(stacks[i]) for i in self.samples],
+                "weights": weights,
+            }],
+        }
+
+def _short_path(path: str) -> str:
+    """A file path from its package down, e.g. core/extract.py"""
+    parts = Path(path).parts
+    for marker in ("site-packages", "core", "mcp", "app", "bench"):
+        if marker in parts:
+            index = parts.index(marker)
+            return "/".join(parts[index + (marker == "site-packages"):])
+    return Path(path).name
+
+def save_profile(storage, run_id: str, step: str, profiler: SamplingProfiler) -> Dict[str, str]:
+    """Store a profile next to a run's outputs; returns the saved path of each format"""
+    name = f"{run_id} {step}"
+    return {
+        "speedscope": storage.save_output(run_id, f"Profile-{step}.speedscope.json",
+                                          json.dumps(profiler.speedscope(name), separators=(",", ":"))),
+        "collapsed": storage.save_output(run_id, f"Profile-{step}.collapsed.txt", profiler.collapsed()),
+    }
@@ -0,0 +1,187 @@
+"""Slack reminders for action items that are coming due or overdue.
+
+Delivering a run schedules a reminder for each action item with a due date and every offset in
+REMINDER_OFFSETS_HOURS from REMINDER_HOUR on that day (e.g. -24: the day before; 24, 72: one and
+three days late). Reminders live in a SQLite table indexed by fire time, which serves as a
+persisted priority queue: the scheduler reads only the reminders that are due and sleeps until
+the next one, so millions of pending reminders cost neither CPU nor memory, and a restart picks
+up where it left off without reading any run.
+
+When reminders fire, those for the same owner are sent as one Slack message: a direct message
+when the owner resolves to a Slack user, otherwise a mention in the channel the run went to.
+Items marked done in Notion or Jira (core/status.py) are skipped.
+
+    python -m core.reminders status
+    python -m core.reminders send              # send what is due now
+    python -m core.reminders backfill          # schedule the items of runs saved before
+"""
+import argparse
+import logging
+import sqlite3
+import threading
+from datetime import date, datetime, time as day_time, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from core.config import Config
+from core.schema import ExtractionResult
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reminders (
+    fire_at INTEGER NOT NULL,
+    run_id TEXT NOT NULL,
+    item_id TEXT NOT NULL,
+    owner TEXT,
+    title TEXT NOT NULL,
+    due_date TEXT NOT NULL,
+    channel TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (run_id, item_id, fire_at)
+);
+CREATE INDEX IF NOT EXISTS reminders_fire_at ON reminders (fire_at);
+"""
+
+# Reminders read and sent per round
+BATCH_SIZE = 1000
+
+COLUMNS = ("fire_at", "run_id", "item_id", "owner", "title", "due_date", "channel", "attempts")
+
+def fire_times(due: date, hour: int, offsets_hours: Iterable[float]) -> List[int]:
+    """Epoch seconds of the reminders of an item due on `due`, in the server's time zone"""
+    base = datetime.combine(due, day_time(hour))
+    return sorted({int((base + timedelta(hours=offset)).timestamp()) for offset in offsets_hours})
+
+class ReminderQueue:
+    def __init__(self, directory: str = None):
+        path = Path(directory or Config.REMINDERS_DIR) / "reminders.db"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(str(path), check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+
+    def schedule(self, result: ExtractionResult, channel: str, hour: int, offsets_hours: Iterable[float],
+                 now: float = None) -> int:
+        """(Re)schedule the reminders of a run's items; returns how many are pending.
+
+        A re-delivered run replaces its earlier reminders, so edited due dates move them.
+        """
+        now = now if now is not None else datetime.now().timestamp()
+        rows = [
+            (fire_at, result.run_id, item.id, item.owner, item.title, str(item.due_date), channel)
+            for item in result.action_items if item.due_date
+            for fire_at in fire_times(item.due_date, hour, offsets_hours) if fire_at > now
+        ]
+        with self.lock, self.db:
+            self.db.execute("DELETE FROM reminders WHERE run_id = ?", (result.run_id,))
+            self.db.executemany(
+                "INSERT OR REPLACE INTO reminders (fire_at, run_id, item_id, owner, title, due_date, channel) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+            )
+        return len(rows)
+
+    def due(self, now: float, limit: int) -> List[Dict[str, Any]]:
+        """Reminders whose time has come, earliest first"""
+        with self.lock:
+            rows = self.db.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM reminders WHERE fire_at <= ? ORDER BY fire_at LIMIT ?",
+                (int(now), limit)
+            ).fetchall()
+        return [dict(zip(COLUMNS, row)) for row in rows]
+
+    def next_fire_at(self) -> Optional[int]:
+        with self.lock:
+            return self.db.execute("SELECT MIN(fire_at) FROM reminders").fetchone()[0]
+
+    def remove(self, reminders: Iterable[Dict[str, Any]]):
+        with self.lock, self.db:
+            self.db.executemany(
+                "DELETE FROM reminders WHERE run_id = ? AND item_id = ? AND fire_at = ?",
+                [(r["run_id"], r["item_id"], r["fire_at"]) for r in reminders]
+            )
+
+    def postpone(self, reminders: Iterable[Dict[str, Any]], now: float, seconds: float):
+        """Try again after a failed send, backing off with every attempt"""
+        with self.lock, self.db:
+            self.db.executemany(
+                "UPDATE OR REPLACE reminders SET fire_at = ?, attempts = attempts + 1 "
+                "WHERE run_id = ? AND item_id = ? AND fire_at = ?",
+                [(int(now + seconds * 2 ** r["attempts"]), r["run_id"], r["item_id"], r["fire_at"]) for r in reminders]
+            )
+
+    def pending(self) -> int:
+        with self.lock:
+            return self.db.execute("SELECT COUNT(*) FROM reminders").fetchone()[0]
+
+def coalesce(reminders: List[Dict[str, Any]]) -> Dict[Tuple[Optional[str], str], List[Dict[str, Any]]]:
+    """Due reminders per (owner, channel), to be sent as one message each"""
+    groups: Dict[Tuple[Optional[str], str], List[Dict[str, Any]]] = {}
+    for reminder in reminders:
+        groups.setdefault((reminder["owner"], reminder["channel"]), []).append(reminder)
+    return groups
+
+def unique_items(reminders: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Each item once: a backlog (e.g. after downtime) may hold several reminders of one item"""
+    return list({(r["run_id"], r["item_id"]): r for r in reminders}.values())
+
+class ReminderScheduler:
+    """Background thread that sends reminders as they come due, sleeping until the next one"""
+
+    def __init__(self, pipelines: Callable[[], Iterable[Any]], max_sleep_seconds: float = 60):
+        self.pipelines = pipelines
+        self.max_sleep_seconds = max_sleep_seconds
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="reminders", daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+
+    def _run(self):
+        delay = 0.0
+        while not self.stopped.wait(delay):
+            delay = self.max_sleep_seconds
+            for pipeline in self.pipelines():
+                try:
+                    pipeline.send_reminders()
+                    next_fire_at = pipeline.reminders.next_fire_at()
+                except Exception:
+                    logger.exception("Sending reminders failed")
+                    continue
+                if next_fire_at is not None:
+                    # Reminders scheduled meanwhile are picked up within max_sleep_seconds
+                    delay = min(delay, max(0.0, next_fire_at - datetime.now().timestamp()))
+
+def main():
+    from core.pipeline import Pipeline
+
+    parser = argparse.ArgumentParser(description="Follow-up reminders for due action items")
+    parser.add_argument("command", choices=["status", "send", "backfill"])
+    parser.add_argument("--tenant", help="One of TENANTS; the default configuration when omitted")
+    args = parser.parse_args()
+
+    pipeline = Pipeline(Config.for_tenant(args.tenant))
+    if args.command == "status":
+        next_fire_at = pipeline.reminders.next_fire_at()
+        print(f"{pipeline.reminders.pending()} reminder(s) pending"
+              + (f", next at {datetime.fromtimestamp(next_fire_at)}" if next_fire_at else ""))
+    elif args.command == "send":
+        sent = pipeline.send_reminders()
+        print(f"Sent {sent['messages']} message(s) covering {sent['items']} item(s)")
+    else:
+        from core.ledger import DeliveryLedger
+
+        scheduled = 0
+        for path in sorted(Path("data/output").glob("*/ActionItems.json")):
+            result = ExtractionResult.model_validate_json(path.read_bytes())
+            # The channel the run was posted to, if it was
+            channel = DeliveryLedger(pipeline.storage, result.run_id).service('slack').get('channel')
+            scheduled += pipeline.schedule_reminders(result, channel or pipeline.config.SLACK_DEFAULT_CHANNEL)
+        print(f"Scheduled {scheduled} reminder(s)")
+
+if __name__ == "__main__":
+    main()
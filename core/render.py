@@ -0,0 +1,132 @@
+"""Artifacts rendered from Jinja templates.
+
+Each format is a template named after the file it produces, e.g. Summary.md.j2 renders
+Summary.md. The built-in templates live in content/templates/; a template of the same name in
+ARTIFACT_TEMPLATES_DIR replaces one without code changes. Templates are compiled once per
+renderer and stream their output in chunks, so an artifact is never built up as one string
+before it is written.
+
+    python -m core.render                     # re-render the artifacts of every saved run
+    python -m core.render --format ics --format jira_csv
+"""
+import argparse
+import csv
+import io
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from jinja2 import ChoiceLoader, Environment, FileSystemLoader, StrictUndefined, select_autoescape
+
+from core.config import Config
+from core.grounding import deliverable_items
+from core.schema import ExtractionResult
+
+DEFAULT_TEMPLATE_DIR = Path(__file__).resolve().parent.parent / "content" / "templates"
+
+# format -> (file name, key in the paths returned by Pipeline.save_artifacts)
+FORMATS: Dict[str, Tuple[str, str]] = {
+    "markdown": ("Summary.md", "summary_md"),
+    "html": ("Summary.html", "summary_html"),
+    "csv": ("ActionItems.csv", "action_items_csv"),
+    "ics": ("DueDates.ics", "due_dates_ics"),
+    "jira_csv": ("JiraImport.csv", "jira_import_csv"),
+}
+
+def _csv_row(values: Iterable[Any]) -> str:
+    """One CSV record, quoted as needed; None becomes an empty field"""
+    buffer = io.StringIO()
+    # The terminator makes the writer quote fields containing newlines; the template ends the line
+    csv.writer(buffer, lineterminator="\n").writerow(["" if v is None else v for v in values])
+    return buffer.getvalue()[:-1]
+
+def _ics_text(value: Any) -> str:
+    """Escape a TEXT value (RFC 5545 3.3.11)"""
+    text = str(value)
+    for char, escaped in (("\\", "\\\\"), (";", "\\;"), (",", "\\,"), ("\r\n", "\\n"), ("\n", "\\n")):
+        text = text.replace(char, escaped)
+    return text
+
+def _ics_fold(line: str) -> str:
+    """Fold a content line into 75-octet lines (RFC 5545 3.1)"""
+    if len(line.encode("utf-8")) <= 75:
+        return line
+    folded: List[str] = []
+    current, size = "", 0
+    for char in line:
+        width = len(char.encode("utf-8"))
+        # Continuation lines start with a space, which counts toward their 75 octets
+        if size + width > 75:
+            folded.append(current)
+            current, size = " ", 1
+        current += char
+        size += width
+    folded.append(current)
+    return "\n".join(folded)
+
+class ArtifactRenderer:
+    def __init__(self, template_dir: Optional[str] = None):
+        loaders = [FileSystemLoader(str(d)) for d in (template_dir, DEFAULT_TEMPLATE_DIR) if d]
+        self.env = Environment(
+            loader=ChoiceLoader(loaders),
+            autoescape=select_autoescape(enabled_extensions=("html.j2",), default_for_string=False),
+            trim_blocks=True,
+            lstrip_blocks=True,
+            keep_trailing_newline=True,
+            undefined=StrictUndefined,
+        )
+        self.env.filters.update(csv_row=_csv_row, ics_text=_ics_text, ics_fold=_ics_fold)
+
+    def context(self, result: ExtractionResult) -> Dict[str, Any]:
+        """Template variables of a run, computed once and shared by every format"""
+        return {
+            "run_id": result.run_id,
+            "decisions": result.decisions,
+            "action_items": result.action_items,
+            "risks": result.risks,
+            "deliverable": deliverable_items(result),
+            "generated_at": datetime.now(timezone.utc),
+            "one_day": timedelta(days=1),
+        }
+
+    def generate(self, fmt: str, context: Dict[str, Any]) -> Iterator[str]:
+        """Chunks of one artifact"""
+        filename, _ = FORMATS[fmt]
+        # get_template compiles a template on first use and caches it in the environment
+        template = self.env.get_template(f"{filename}.j2")
+        chunks = template.generate(**context)
+        if filename.endswith(".ics"):
+            # iCalendar lines end with CRLF
+            return (chunk.replace("\n", "\r\n") for chunk in chunks)
+        return chunks
+
+    def render(self, fmt: str, result: ExtractionResult) -> str:
+        return "".join(self.generate(fmt, self.context(result)))
+
+_renderers: Dict[Optional[str], ArtifactRenderer] = {}
+
+def renderer(template_dir: Optional[str] = None) -> ArtifactRenderer:
+    """The shared renderer for a template directory, so templates are compiled once per process"""
+    if template_dir not in _renderers:
+        _renderers[template_dir] = ArtifactRenderer(template_dir)
+    return _renderers[template_dir]
+
+def main():
+    from core.pipeline import Pipeline
+
+    parser = argparse.ArgumentParser(description="Re-render the artifacts of saved runs")
+    parser.add_argument("--format", action="append", choices=sorted(FORMATS),
+                        help="Format to render (repeatable); defaults to Summary.md plus ARTIFACT_FORMATS")
+    args = parser.parse_args()
+
+    # Runs saved locally; every run shares one renderer, so templates are compiled once
+    pipeline = Pipeline(Config.override(MODE="local"))
+    rendered = 0
+    for path in sorted(Path("data/output").glob("*/ActionItems.json")):
+        result = ExtractionResult.model_validate_json(path.read_bytes())
+        pipeline.render_artifacts(result, args.format)
+        rendered += 1
+    print(f"Rendered {rendered} run(s)")
+
+if __name__ == "__main__":
+    main()
@@ -2,27 +2,59 @@ from pydantic import BaseModel, Field
 from typing import List, Optional
 from datetime import date
 
+class SourceSpan(BaseModel):
+    """Where in the transcript an item is supported (core/grounding.py)"""
+    start: Optional[int] = None
+    end: Optional[int] = None
+    line: Optional[int] = None
+    speaker: Optional[str] = None
+    score: float = 0.0
+    grounded: bool = True
+
 class Decision(BaseModel):
+    id: Optional[str] = None
     text: str
     rationale: Optional[str] = None
     owners: List[str] = []
+    source: Optional[SourceSpan] = None
 
 class ActionItem(BaseModel):
+    id: Optional[str] = None
     title: str
     owner: Optional[str] = None
     due_date: Optional[date] = None
     priority: Optional[str] = Field(default="Medium", pattern="Low|Medium|High")
     notes: Optional[str] = None
     source_quote: Optional[str] = None
+    source: Optional[SourceSpan] = None
 
 class Risk(BaseModel):
+    id: Optional[str] = None
     text: str
     severity: Optional[str] = Field(default="Medium", pattern="Low|Medium|High")
     mitigation: Optional[str] = None
+    source: Optional[SourceSpan] = None
+
+class Usage(BaseModel):
+    """Bedrock tokens, model time and estimated cost of an extraction (core/usage.py)"""
+    model_id: Optional[str] = None
+    calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_read_tokens: int = 0
+    cache_write_tokens: int = 0
+    latency_ms: float = 0.0
+    cost_usd: float = 0.0
+    # The configured model, when a budget moved the extraction to a cheaper one (or "local")
+    downgraded_from: Optional[str] = None
 
 class ExtractionResult(BaseModel):
     run_id: str
     decisions: List[Decision]
     action_items: List[ActionItem]
     risks: List[Risk]
-    summary_md: str
\ No newline at end of file
+    summary_md: str
+    # Runs a digest was built from (core/digest.py); empty for a single meeting
+    sources: List[str] = []
+    # Bedrock usage of the extraction (core/usage.py); None for local extraction, unless a budget forced it
+    usage: Optional[Usage] = None
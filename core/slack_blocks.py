@@ -0,0 +1,203 @@
+"""Render an extraction result as Slack Block Kit messages.
+
+Everything is packed into as few messages as possible: items are joined into section blocks
+of up to SECTION_CHARS characters, and a new message is only started when the current one
+would exceed Slack's 50-block or 40,000-character limits.
+"""
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+
+from core.schema import ActionItem, ExtractionResult
+
+MAX_BLOCKS = 50
+MAX_MESSAGE_CHARS = 40000
+# Slack rejects section text longer than 3000 characters
+SECTION_CHARS = 3000
+HEADER_CHARS = 150
+# Items listed in one reminder message; the rest are summarized as a count
+REMINDER_ITEMS = 100
+
+Block = Dict[str, Any]
+
+def escape(text: str) -> str:
+    """Escape the characters Slack treats as markup in mrkdwn text"""
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+def _truncate(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[:limit - 1] + '…'
+
+def _section(text: str) -> Block:
+    return {"type": "section", "text": {"type": "mrkdwn", "text": text}}
+
+def _pack(lines: List[str]) -> List[Block]:
+    """Join lines into as few section blocks as the per-section limit allows"""
+    blocks = []
+    current = ''
+    for line in lines:
+        line = _truncate(line, SECTION_CHARS)
+        if current and len(current) + 1 + len(line) > SECTION_CHARS:
+            blocks.append(_section(current))
+            current = ''
+        current = f"{current}\n{line}" if current else line
+    if current:
+        blocks.append(_section(current))
+    return blocks
+
+def _owner_text(owner: Optional[str], owners: Dict[str, Dict[str, Optional[str]]]) -> str:
+    user_id = owners.get(owner, {}).get('slack')
+    # Only a <@user ID> mention notifies the owner
+    return f"<@{user_id}>" if user_id else f"@{escape(owner)}"
+
+def _item_line(item: ActionItem, owners: Dict[str, Dict[str, Optional[str]]], show_owner: bool = True) -> str:
+    details = []
+    if item.owner and show_owner:
+        details.append(_owner_text(item.owner, owners))
+    if item.due_date:
+        details.append(f"Due: {item.due_date}")
+    if item.priority:
+        details.append(item.priority)
+    line = f"• *{escape(item.title)}*"
+    if details:
+        line += " — " + " · ".join(details)
+    return line
+
+def _block_chars(block: Block) -> int:
+    text = block.get("text") or {}
+    elements = block.get("elements") or []
+    return len(text.get("text", "")) + sum(len(e.get("text", "")) for e in elements)
+
+def render_messages(result: ExtractionResult, owners: Dict[str, Dict[str, Optional[str]]] = None) -> List[Dict[str, Any]]:
+    """Block Kit messages for a run, each {"text": fallback, "blocks": [...]}"""
+    owners = owners or {}
+    counts = f"Decisions: {len(result.decisions)} | Actions: {len(result.action_items)} | Risks: {len(result.risks)}"
+    title = f"📋 Meeting Summary - {result.run_id}"
+
+    blocks: List[Block] = [
+        {"type": "header", "text": {"type": "plain_text", "text": _truncate(title, HEADER_CHARS), "emoji": True}},
+        {"type": "context", "elements": [{"type": "mrkdwn", "text": counts}]},
+    ]
+
+    blocks += _decision_blocks(result, owners)
+
+    if result.action_items:
+        lines = [_item_line(item, owners) for item in result.action_items]
+        blocks += [{"type": "divider"}, _section("*✅ Action Items*")] + _pack(lines)
+
+    blocks += _risk_blocks(result)
+    return _split(blocks, title, counts)
+
+def render_digest(result: ExtractionResult, owners: Dict[str, Dict[str, Optional[str]]] = None,
+                  today: date = None) -> List[Dict[str, Any]]:
+    """Block Kit messages for a digest of several runs: action items by owner, then by due date"""
+    owners = owners or {}
+    today = today or date.today()
+    counts = (f"Meetings: {len(result.sources)} | Decisions: {len(result.decisions)} | "
+              f"Actions: {len(result.action_items)} | Risks: {len(result.risks)}")
+    title = f"📬 Meeting Digest - {len(result.sources)} meetings"
+
+    blocks: List[Block] = [
+        {"type": "header", "text": {"type": "plain_text", "text": _truncate(title, HEADER_CHARS), "emoji": True}},
+        {"type": "context", "elements": [
+            {"type": "mrkdwn", "text": counts},
+            {"type": "mrkdwn", "text": _truncate("From: " + ", ".join(escape(s) for s in result.sources), SECTION_CHARS)},
+        ]},
+    ]
+
+    if result.action_items:
+        by_owner: Dict[Optional[str], List[ActionItem]] = {}
+        for item in result.action_items:
+            by_owner.setdefault(item.owner, []).append(item)
+        lines = []
+        # Owners alphabetically, unassigned items last
+        for owner in sorted(by_owner, key=lambda o: (o is None, (o or '').lower())):
+            items = sorted(by_owner[owner], key=lambda i: (i.due_date or date.max, i.title.lower()))
+            lines.append(f"*👤 {_owner_text(owner, owners) if owner else 'Unassigned'}* ({len(items)})")
+            group = None
+            for item in items:
+                if _due_group(item.due_date, today) != group:
+                    group = _due_group(item.due_date, today)
+                    lines.append(f"_{group}_")
+                lines.append(_item_line(item, owners, show_owner=False))
+        blocks += [{"type": "divider"}, _section("*✅ Action Items by Owner*")] + _pack(lines)
+
+    blocks += _decision_blocks(result, owners) + _risk_blocks(result)
+    return _split(blocks, title, counts)
+
+def render_reminder(owner: Optional[str], reminders: List[Dict[str, Any]],
+                    owners: Dict[str, Dict[str, Optional[str]]] = None, today: date = None) -> Dict[str, Any]:
+    """One Block Kit message with an owner's due and overdue items (core/reminders.py)"""
+    owners = owners or {}
+    today = today or date.today()
+    reminders = sorted(reminders, key=lambda r: (r["due_date"], r["title"].lower()))
+    lines = []
+    for reminder in reminders[:REMINDER_ITEMS]:
+        days = (date.fromisoformat(reminder["due_date"]) - today).days
+        if days < 0:
+            when = f"{-days} day{'s' if days < -1 else ''} overdue"
+        elif days == 0:
+            when = "due today"
+        elif days == 1:
+            when = "due tomorrow"
+        else:
+            when = f"due in {days} days"
+        lines.append(f"• *{escape(reminder['title'])}* — {when} ({reminder['due_date']})")
+    if len(reminders) > REMINDER_ITEMS:
+        lines.append(f"…and {len(reminders) - REMINDER_ITEMS} more")
+    who = _owner_text(owner, owners) if owner else "unassigned items"
+    return {
+        "text": f"⏰ {len(reminders)} follow-up(s) for {owner or 'unassigned items'}",
+        "blocks": [_section(f"⏰ *Follow-ups for {who}*")] + _pack(lines)
+    }
+
+def _due_group(due: Optional[date], today: date) -> str:
+    if not due:
+        return "No due date"
+    if due < today:
+        return "Overdue"
+    if due < today + timedelta(days=7):
+        return "Due this week"
+    return "Later"
+
+def _decision_blocks(result: ExtractionResult, owners: Dict[str, Dict[str, Optional[str]]]) -> List[Block]:
+    if not result.decisions:
+        return []
+    lines = []
+    for decision in result.decisions:
+        line = f"• {escape(decision.text)}"
+        if decision.owners:
+            line += " — " + ", ".join(_owner_text(owner, owners) for owner in decision.owners)
+        lines.append(line)
+    return [{"type": "divider"}, _section("*🎯 Decisions*")] + _pack(lines)
+
+def _risk_blocks(result: ExtractionResult) -> List[Block]:
+    if not result.risks:
+        return []
+    lines = []
+    for risk in result.risks:
+        line = f"• {escape(risk.text)}"
+        if risk.severity:
+            line += f" ({risk.severity})"
+        if risk.mitigation:
+            line += f" — Mitigation: {escape(risk.mitigation)}"
+        lines.append(line)
+    return [{"type": "divider"}, _section("*⚠️ Risks & Blockers*")] + _pack(lines)
+
+def _split(blocks: List[Block], title: str, counts: str) -> List[Dict[str, Any]]:
+    """Split only where a message would exceed Slack's limits"""
+    messages = [[]]
+    chars = 0
+    for block in blocks:
+        size = _block_chars(block)
+        if messages[-1] and (len(messages[-1]) >= MAX_BLOCKS or chars + size > MAX_MESSAGE_CHARS):
+            messages.append([])
+            chars = 0
+        messages[-1].append(block)
+        chars += size
+
+    return [
+        {
+            "text": f"{title}\n{counts}" if i == 0 else f"{title} (continued {i + 1}/{len(messages)})",
+            "blocks": message_blocks
+        }
+        for i, message_blocks in enumerate(messages)
+    ]
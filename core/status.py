@@ -0,0 +1,311 @@
+"""Status of delivered action items, synced back from Notion and Jira.
+
+Every Notion page and Jira issue created for an action item is recorded in a SQLite store
+({STATUS_DIR}/status.db) with its run, owner and due date. Changes are then pulled
+incrementally, so a sync costs one query per page of changed items however many items exist:
+
+- Notion: the database is queried for pages edited since the stored cursor;
+- Jira: the ingestion service receives issue webhooks (POST /webhooks/jira). JQL
+  `updated >= ...` polling since the cursor runs every STATUS_SYNC_INTERVAL_SECONDS until
+  webhooks arrive, then every STATUS_SYNC_FALLBACK_SECONDS to catch up on missed ones.
+
+    python -m core.status sync [--service notion] [--tenant marketing]
+    python -m core.status overdue
+"""
+import argparse
+import hashlib
+import hmac
+import logging
+import math
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from core.config import Config
+from core.tracing import metrics, span
+
+logger = logging.getLogger(__name__)
+
+SERVICES = ('notion', 'jira')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    service TEXT NOT NULL,
+    external_id TEXT NOT NULL,
+    run_id TEXT NOT NULL,
+    item_id TEXT NOT NULL,
+    title TEXT,
+    owner TEXT,
+    due_date TEXT,
+    status TEXT,
+    done INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT,
+    PRIMARY KEY (service, external_id)
+);
+CREATE INDEX IF NOT EXISTS items_run ON items (run_id);
+CREATE INDEX IF NOT EXISTS items_open ON items (done, due_date);
+CREATE TABLE IF NOT EXISTS cursors (
+    service TEXT PRIMARY KEY,
+    cursor TEXT NOT NULL,
+    webhook_at TEXT
+);
+"""
+
+# (external ID, item ID, title, owner, due date) of an item delivered to a service
+Tracked = Tuple[str, str, str, Optional[str], Optional[str]]
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+def _timestamp(value: Optional[str]) -> Optional[datetime]:
+    """Parse a Notion or Jira timestamp ("2025-10-21T14:05:00.000Z", "...000+0000")"""
+    if not value:
+        return None
+    value = value.replace("Z", "+00:00")
+    if len(value) > 5 and value[-5] in "+-" and value[-3] != ":":
+        value = f"{value[:-2]}:{value[-2:]}"
+    return datetime.fromisoformat(value).astimezone(timezone.utc)
+
+class StatusStore:
+    def __init__(self, directory: str = None):
+        path = Path(directory or Config.STATUS_DIR) / "status.db"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        # Shared by the delivery, webhook and sync threads, serialized by the lock
+        self.db = sqlite3.connect(str(path), check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+
+    def track(self, service: str, run_id: str, items: Iterable[Tracked]):
+        """Record the items a run has in a service, keeping the status of those already known"""
+        items = list(items)
+        with self.lock, self.db:
+            self.db.executemany(
+                """INSERT INTO items (service, external_id, run_id, item_id, title, owner, due_date)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (service, external_id) DO UPDATE SET
+                   run_id = excluded.run_id, item_id = excluded.item_id, title = excluded.title,
+                   owner = excluded.owner, due_date = excluded.due_date""",
+                [(service, external_id, run_id, *rest) for external_id, *rest in items]
+            )
+            # Items deleted from the run on re-delivery
+            known = [external_id for external_id, *_ in items]
+            self.db.execute(
+                f"DELETE FROM items WHERE service = ? AND run_id = ? AND external_id NOT IN ({','.join('?' * len(known))})",
+                [service, run_id, *known]
+            )
+
+    def apply(self, service: str, changes: Iterable[Dict[str, Any]]) -> int:
+        """Update the status of known items; returns how many changed.
+
+        A change older than the one already applied (a late webhook) is ignored.
+        """
+        rows = []
+        for change in changes:
+            if not change.get("id"):
+                continue
+            # Compared as text, so every timestamp is stored in UTC
+            updated_at = _timestamp(change.get("updated_at"))
+            updated_at = updated_at.isoformat() if updated_at else None
+            rows.append((change.get("status"), int(bool(change.get("done"))), updated_at, service, change["id"], updated_at))
+        with self.lock, self.db:
+            before = self.db.total_changes
+            self.db.executemany(
+                """UPDATE items SET status = ?, done = ?, updated_at = ?
+                   WHERE service = ? AND external_id = ? AND (updated_at IS NULL OR updated_at <= ?)""",
+                rows
+            )
+            return self.db.total_changes - before
+
+    def cursor(self, service: str) -> Optional[datetime]:
+        with self.lock:
+            row = self.db.execute("SELECT cursor FROM cursors WHERE service = ?", (service,)).fetchone()
+        return _timestamp(row[0]) if row and row[0] else None
+
+    def webhook_at(self, service: str) -> Optional[datetime]:
+        with self.lock:
+            row = self.db.execute("SELECT webhook_at FROM cursors WHERE service = ?", (service,)).fetchone()
+        return _timestamp(row[0]) if row and row[0] else None
+
+    def set_cursor(self, service: str, cursor: datetime):
+        """Move a service's cursor forward (never back)"""
+        current = self.cursor(service)
+        value = max(cursor, current) if current else cursor
+        with self.lock, self.db:
+            self.db.execute(
+                """INSERT INTO cursors (service, cursor) VALUES (?, ?)
+                   ON CONFLICT (service) DO UPDATE SET cursor = excluded.cursor""",
+                (service, value.isoformat())
+            )
+
+    def mark_webhook(self, service: str):
+        """Note that a webhook was received. The cursor stays: a webhook says nothing about
+        other items' events that may have been lost"""
+        with self.lock, self.db:
+            self.db.execute(
+                """INSERT INTO cursors (service, cursor, webhook_at) VALUES (?, ?, ?)
+                   ON CONFLICT (service) DO UPDATE SET webhook_at = excluded.webhook_at""",
+                (service, "", _now().isoformat())
+            )
+
+    def run_status(self, run_id: str) -> Dict[str, Dict[str, Any]]:
+        """Status of a run's items per item ID, e.g. {"act-1a2b": {"jira": "In Progress", "done": False}}"""
+        with self.lock:
+            rows = self.db.execute("SELECT item_id, service, status, done FROM items WHERE run_id = ?", (run_id,)).fetchall()
+        statuses: Dict[str, Dict[str, Any]] = {}
+        for item_id, service, status, done in rows:
+            entry = statuses.setdefault(item_id, {"done": False})
+            entry[service] = status
+            entry["done"] = entry["done"] or bool(done)
+        return statuses
+
+    def done_items(self, keys: Iterable[Tuple[str, str]]) -> set:
+        """The (run ID, item ID) pairs among `keys` that are done in any service"""
+        keys = set(keys)
+        run_ids = sorted({run_id for run_id, _ in keys})
+        if not run_ids:
+            return set()
+        with self.lock:
+            rows = self.db.execute(
+                f"SELECT run_id, item_id FROM items WHERE done = 1 AND run_id IN ({','.join('?' * len(run_ids))})",
+                run_ids
+            ).fetchall()
+        return {row for row in rows if row in keys}
+
+    def overdue(self, today: date = None) -> List[Dict[str, Any]]:
+        """Open items whose due date has passed, oldest first"""
+        today = today or date.today()
+        with self.lock:
+            rows = self.db.execute(
+                """SELECT service, external_id, run_id, item_id, title, owner, due_date, status FROM items
+                   WHERE done = 0 AND due_date < ? ORDER BY due_date, owner""",
+                (today.isoformat(),)
+            ).fetchall()
+        columns = ("service", "external_id", "run_id", "item_id", "title", "owner", "due_date", "status")
+        return [dict(zip(columns, row)) for row in rows]
+
+    def counts(self) -> Dict[str, Dict[str, int]]:
+        """Open and done items per service"""
+        with self.lock:
+            rows = self.db.execute("SELECT service, done, COUNT(*) FROM items GROUP BY service, done").fetchall()
+        counts: Dict[str, Dict[str, int]] = {}
+        for service, done, count in rows:
+            counts.setdefault(service, {"open": 0, "done": 0})["done" if done else "open"] = count
+        return counts
+
+class StatusSync:
+    """Pulls status changes into a StatusStore, starting from each service's cursor"""
+
+    def __init__(self, mcp_client, store: StatusStore, config=None):
+        self.mcp_client = mcp_client
+        self.store = store
+        self.config = config or Config
+
+    def sync(self, service: str) -> Dict[str, Any]:
+        """Apply the changes made since the last sync; returns counts or {"error": ...}"""
+        started = _now()
+        # Edits made while the previous sync ran are read again; applying them is idempotent
+        since = (self.store.cursor(service) or started - timedelta(days=self.config.STATUS_SYNC_LOOKBACK_DAYS))
+        since -= timedelta(seconds=self.config.STATUS_SYNC_OVERLAP_SECONDS)
+        with span("status.sync", service=service, since=since.isoformat()) as call:
+            if service == 'notion':
+                response = self.mcp_client.query_notion_changes(since.isoformat())
+            else:
+                response = self.mcp_client.search_jira_updates(math.ceil((started - since).total_seconds() / 60))
+            if response.get("error"):
+                call.set_error(str(response["error"]))
+                return {"error": response["error"]}
+            changes = response.get("changes", [])
+            updated = self.store.apply(service, changes)
+            call.set_attribute("changes", len(changes))
+            call.set_attribute("updated", updated)
+        self.store.set_cursor(service, started)
+        metrics.increment("followupsync_status_changes_total", len(changes), service=service)
+        if updated:
+            logger.info("🔄 %s: %d of %d changed item(s) are FollowUpSync items", service, updated, len(changes))
+        return {"changes": len(changes), "updated": updated}
+
+    def due(self, service: str) -> bool:
+        """Whether a service should be polled now"""
+        cursor = self.store.cursor(service)
+        interval = self.config.STATUS_SYNC_INTERVAL_SECONDS
+        webhook_at = self.store.webhook_at(service) if service == 'jira' else None
+        if webhook_at and (_now() - webhook_at).total_seconds() < self.config.STATUS_SYNC_FALLBACK_SECONDS:
+            # Webhooks are arriving and keep Jira current; polling only catches up on missed ones
+            interval = self.config.STATUS_SYNC_FALLBACK_SECONDS
+        return not cursor or (_now() - cursor).total_seconds() >= interval
+
+    def receive_jira_webhook(self, event: Dict[str, Any]) -> int:
+        """Apply an issue event sent by a Jira webhook; returns 1 if it changed a known item"""
+        issue = event.get("issue")
+        if not issue:
+            return 0
+        self.store.mark_webhook('jira')
+        return self.store.apply('jira', [jira_issue_change(issue)])
+
+def jira_issue_change(issue: Dict[str, Any]) -> Dict[str, Any]:
+    """Status change of a Jira issue, as returned by search or sent by a webhook"""
+    fields = issue.get("fields") or {}
+    status = fields.get("status") or {}
+    return {
+        "id": issue.get("key"),
+        "status": status.get("name"),
+        # Workflows name their final states freely; the category is always "done"
+        "done": (status.get("statusCategory") or {}).get("key") == "done",
+        "updated_at": fields.get("updated")
+    }
+
+def verify_signature(secret: str, body: bytes, signature: Optional[str]) -> bool:
+    """Check a Jira webhook's X-Hub-Signature header ("sha256=<hex HMAC of the body>")"""
+    if not signature or "=" not in signature:
+        return False
+    method, _, digest = signature.partition("=")
+    if method != "sha256":
+        return False
+    expected = hmac.new(secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, digest)
+
+class StatusSyncWorker:
+    """Background thread that polls every service whose sync is due"""
+
+    def __init__(self, pipelines: Callable[[], Iterable[Any]], interval_seconds: float = 30):
+        self.pipelines = pipelines
+        self.interval_seconds = interval_seconds
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="status-sync", daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+
+    def _run(self):
+        while not self.stopped.wait(self.interval_seconds):
+            for pipeline in self.pipelines():
+                try:
+                    pipeline.sync_status()
+                except Exception:
+                    logger.exception("Status sync failed")
+
+def main():
+    from core.pipeline import Pipeline
+
+    parser = argparse.ArgumentParser(description="Sync action item status from Notion and Jira")
+    parser.add_argument("command", choices=["sync", "overdue"])
+    parser.add_argument("--service", action="append", choices=SERVICES, help="Service to sync (repeatable); defaults to both")
+    parser.add_argument("--tenant", help="One of TENANTS; the default configuration when omitted")
+    args = parser.parse_args()
+
+    pipeline = Pipeline(Config.for_tenant(args.tenant))
+    if args.command == "sync":
+        for service, result in pipeline.sync_status(args.service, force=True).items():
+            print(f"{service}: {result}")
+        return
+    for item in pipeline.status.overdue():
+        print(f"{item['due_date']}  {item['owner'] or '-':<20} {item['title']} ({item['service']} {item['external_id']}: {item['status'] or 'unknown'})")
+
+if __name__ == "__main__":
+    main()
@@ -1,56 +1,191 @@
 import os
+import io
 import json
+import mmap
+import codecs
+import hashlib
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Union
+from typing import Iterable, Iterator, List, Optional, Union
 from core.config import Config
+from core.ids import run_id_time
+
+# S3 requires every part of a multipart upload but the last to be at least 5 MiB
+S3_PART_SIZE = 8 * 1024 * 1024
+# Read size when streaming uploads and files into save_input_stream
+CHUNK_SIZE = 1024 * 1024
+
+# S3 keys: followupsync/{shard}/{yyyy}/{mm}/{dd}/{run_id}/{filename}. The hash shard comes
+# first so that a day's writes spread over KEY_SHARDS prefixes (S3 scales request rates per
+# prefix); within a shard, runs are listed by date. Changing KEY_SHARDS moves every key.
+KEY_ROOT = "followupsync"
+KEY_SHARDS = 16
+# Runs whose ID carries no creation time (digests, IDs from before ULIDs)
+UNDATED = "undated"
+
+def key_shard_name(shard: int) -> str:
+    return format(shard, f"0{len(format(KEY_SHARDS - 1, 'x'))}x")
+
+def key_shard(run_id: str) -> str:
+    return key_shard_name(int(hashlib.sha1(run_id.encode('utf-8')).hexdigest(), 16) % KEY_SHARDS)
+
+def run_prefix(run_id: str) -> str:
+    """S3 prefix of a run's objects"""
+    created = run_id_time(run_id)
+    day = f"{created:%Y/%m/%d}" if created else UNDATED
+    return f"{KEY_ROOT}/{key_shard(run_id)}/{day}/{run_id}"
+
+def legacy_prefix(run_id: str) -> str:
+    """Where runs were saved before the partitioned layout (see core/migrate_runs.py)"""
+    return f"{KEY_ROOT}/{run_id}"
+
+def iter_chunks(fileobj, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Chunks of a binary file object, e.g. an upload"""
+    return iter(lambda: fileobj.read(chunk_size), b'')
 
 class StorageManager:
-    def __init__(self):
-        self.is_aws = Config.is_aws_mode()
+    def __init__(self, config=None):
+        self.config = config or Config
+        self.is_aws = self.config.is_aws_mode()
         if self.is_aws:
             import boto3
-            self.s3_client = boto3.client('s3', region_name=Config.BEDROCK_REGION)
+            self.s3_client = boto3.client('s3', region_name=self.config.BEDROCK_REGION)
     
     def save_input(self, run_id: str, content: str) -> str:
-        # Always save locally for now, even in AWS mode
+        """Save a transcript locally (read back by extraction) and, in AWS mode, to S3 with the run"""
         path = Path(f"data/input/{run_id}.txt")
         path.parent.mkdir(parents=True, exist_ok=True)
         path.write_text(content, encoding='utf-8')
+        if self.is_aws:
+            self.s3_client.put_object(Bucket=self.config.S3_BUCKET, Key=self._key(run_id, "input.txt"),
+                                      Body=content.encode('utf-8'))
         return str(path)
     
+    def save_input_stream(self, run_id: str, chunks: Iterable[bytes]) -> str:
+        """Save an input from chunks of UTF-8 bytes without holding it in memory.
+
+        Chunks are decoded incrementally (a character may be split across chunks; invalid
+        bytes become U+FFFD) and written to the local input file as they arrive. In AWS mode
+        the text is also streamed to S3 as a multipart upload.
+        """
+        path = Path(f"data/input/{run_id}.txt")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        upload = _MultipartUpload(self.s3_client, self.config.S3_BUCKET, self._key(run_id, "input.txt")) if self.is_aws else None
+        
+        try:
+            with open(path, 'w', encoding='utf-8', newline='') as f:
+                for chunk in chunks:
+                    text = decoder.decode(chunk)
+                    f.write(text)
+                    if upload:
+                        upload.write(text.encode('utf-8'))
+                text = decoder.decode(b'', final=True)
+                f.write(text)
+                if upload:
+                    upload.write(text.encode('utf-8'))
+                    upload.complete()
+        except BaseException:
+            if upload:
+                upload.abort()
+            raise
+        return str(path)
+    
+    def iter_input_lines(self, run_id: str) -> Iterator[str]:
+        """Lines of a saved input, read through a memory map of the local file"""
+        path = Path(f"data/input/{run_id}.txt")
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                for line in iter(mapped.readline, b''):
+                    yield line.decode('utf-8', errors='replace').rstrip('\r\n')
+    
+    def input_size(self, run_id: str) -> int:
+        return Path(f"data/input/{run_id}.txt").stat().st_size
+    
     def save_output(self, run_id: str, filename: str, content: Union[str, dict]) -> str:
         if isinstance(content, dict):
             content = json.dumps(content, indent=2, default=str)
         
         if self.is_aws:
-            key = f"followupsync/{run_id}/{filename}"
+            key = self._key(run_id, filename)
             self.s3_client.put_object(
-                Bucket=Config.S3_BUCKET,
+                Bucket=self.config.S3_BUCKET,
                 Key=key,
                 Body=content.encode('utf-8')
             )
-            return f"s3://{Config.S3_BUCKET}/{key}"
+            return f"s3://{self.config.S3_BUCKET}/{key}"
         else:
             path = Path(f"data/output/{run_id}/{filename}")
             path.parent.mkdir(parents=True, exist_ok=True)
             path.write_text(content, encoding='utf-8')
             return str(path)
     
-    def read_input(self, run_id: str) -> str:
+    def save_output_stream(self, run_id: str, filename: str, chunks: Iterable[str]) -> str:
+        """Save an output written in chunks, e.g. a rendered template"""
+        if self.is_aws:
+            key = self._key(run_id, filename)
+            buffer = io.BytesIO()
+            upload = None
+            try:
+                for chunk in chunks:
+                    data = chunk.encode('utf-8')
+                    if upload:
+                        upload.write(data)
+                        continue
+                    buffer.write(data)
+                    # Outputs larger than a part go up as a multipart upload
+                    if buffer.tell() >= S3_PART_SIZE:
+                        upload = _MultipartUpload(self.s3_client, self.config.S3_BUCKET, key)
+                        upload.write(buffer.getvalue())
+                if upload:
+                    upload.complete()
+                else:
+                    self.s3_client.put_object(Bucket=self.config.S3_BUCKET, Key=key, Body=buffer.getvalue())
+            except BaseException:
+                if upload:
+                    upload.abort()
+                raise
+            return f"s3://{self.config.S3_BUCKET}/{key}"
+        else:
+            path = Path(f"data/output/{run_id}/{filename}")
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, 'w', encoding='utf-8', newline='') as f:
+                for chunk in chunks:
+                    f.write(chunk)
+            return str(path)
+    
+    def read_output(self, run_id: str, filename: str) -> Optional[str]:
+        """Read a previously saved output, or None if it does not exist"""
         if self.is_aws:
-            key = f"followupsync/{run_id}/input.txt"
-            response = self.s3_client.get_object(Bucket=Config.S3_BUCKET, Key=key)
-            return response['Body'].read().decode('utf-8')
+            content = self._get(run_id, filename)
+            return content.decode('utf-8') if content is not None else None
         else:
-            path = Path(f"data/input/{run_id}.txt")
+            path = Path(f"data/output/{run_id}/{filename}")
+            if not path.exists():
+                return None
             return path.read_text(encoding='utf-8')
     
+    def read_input(self, run_id: str) -> str:
+        path = Path(f"data/input/{run_id}.txt")
+        if self.is_aws:
+            content = self._get(run_id, "input.txt")
+            if content is not None:
+                return content.decode('utf-8')
+            # Inputs of runs from before inputs were uploaded, on the machine that processed them
+            if not path.exists():
+                raise FileNotFoundError(f"No input saved for run {run_id}")
+        return path.read_text(encoding='utf-8')
+    
     def get_download_url(self, run_id: str, filename: str) -> str:
         if self.is_aws:
-            key = f"followupsync/{run_id}/{filename}"
+            key = self._key(run_id, filename)
+            if self._legacy_fallback(run_id) and not self._exists(key):
+                key = f"{legacy_prefix(run_id)}/{filename}"
             return self.s3_client.generate_presigned_url(
                 'get_object',
-                Params={'Bucket': Config.S3_BUCKET, 'Key': key},
+                Params={'Bucket': self.config.S3_BUCKET, 'Key': key},
                 ExpiresIn=3600
             )
         else:
@@ -59,12 +194,111 @@ class StorageManager:
     def get_file_content(self, run_id: str, filename: str) -> str:
         """Get file content for download in AWS mode"""
         if self.is_aws:
-            key = f"followupsync/{run_id}/{filename}"
             try:
-                response = self.s3_client.get_object(Bucket=Config.S3_BUCKET, Key=key)
-                return response['Body'].read().decode('utf-8')
+                content = self._get(run_id, filename)
+                if content is None:
+                    return f"Error reading from S3: no {filename} for run {run_id}"
+                return content.decode('utf-8')
             except Exception as e:
                 return f"Error reading from S3: {str(e)}"
         else:
             path = Path(f"data/output/{run_id}/{filename}")
-            return path.read_text(encoding='utf-8')
\ No newline at end of file
+            return path.read_text(encoding='utf-8')
+    
+    def list_runs(self, since: datetime, until: Optional[datetime] = None) -> List[str]:
+        """IDs of the runs created in [since, until), oldest first; undated runs are not listed.
+
+        In AWS mode this lists one day prefix per shard, never the whole bucket.
+        """
+        since = since if since.tzinfo else since.replace(tzinfo=timezone.utc)
+        until = until or datetime.now(timezone.utc)
+        until = until if until.tzinfo else until.replace(tzinfo=timezone.utc)
+        if self.is_aws:
+            candidates = []
+            paginator = self.s3_client.get_paginator('list_objects_v2')
+            day = since.date()
+            while day <= until.date():
+                for shard in range(KEY_SHARDS):
+                    prefix = f"{KEY_ROOT}/{key_shard_name(shard)}/{day:%Y/%m/%d}/"
+                    for page in paginator.paginate(Bucket=self.config.S3_BUCKET, Prefix=prefix, Delimiter='/'):
+                        candidates.extend(p['Prefix'][len(prefix):-1] for p in page.get('CommonPrefixes', []))
+                day += timedelta(days=1)
+        else:
+            output = Path("data/output")
+            candidates = [path.name for path in output.iterdir() if path.is_dir()] if output.exists() else []
+        runs = []
+        for run_id in candidates:
+            created = run_id_time(run_id)
+            if created and since <= created < until:
+                runs.append(run_id)
+        # ULIDs sort by creation time
+        return sorted(runs)
+    
+    def _key(self, run_id: str, filename: str) -> str:
+        return f"{run_prefix(run_id)}/{filename}"
+    
+    def _legacy_fallback(self, run_id: str) -> bool:
+        # ULID runs were never saved under the old layout
+        return self.config.S3_LEGACY_FALLBACK and run_id_time(run_id) is None
+    
+    def _get(self, run_id: str, filename: str) -> Optional[bytes]:
+        """An object of a run, looked up under the old layout too until runs are migrated"""
+        keys = [self._key(run_id, filename)]
+        if self._legacy_fallback(run_id):
+            keys.append(f"{legacy_prefix(run_id)}/{filename}")
+        for key in keys:
+            try:
+                response = self.s3_client.get_object(Bucket=self.config.S3_BUCKET, Key=key)
+            except self.s3_client.exceptions.NoSuchKey:
+                continue
+            return response['Body'].read()
+        return None
+    
+    def _exists(self, key: str) -> bool:
+        try:
+            self.s3_client.head_object(Bucket=self.config.S3_BUCKET, Key=key)
+        except self.s3_client.exceptions.ClientError:
+            return False
+        return True
+
+class _MultipartUpload:
+    """S3 multipart upload fed with bytes, sending a part whenever S3_PART_SIZE accumulates"""
+
+    def __init__(self, s3_client, bucket: str, key: str):
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.key = key
+        self.buffer = io.BytesIO()
+        self.parts = []
+        self.upload_id = s3_client.create_multipart_upload(Bucket=bucket, Key=key)['UploadId']
+
+    def write(self, data: bytes):
+        self.buffer.write(data)
+        if self.buffer.tell() >= S3_PART_SIZE:
+            self._flush()
+
+    def complete(self):
+        # The last part may be smaller than the minimum, and an empty input still needs one
+        if self.buffer.tell() or not self.parts:
+            self._flush()
+        self.s3_client.complete_multipart_upload(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self.upload_id,
+            MultipartUpload={'Parts': self.parts}
+        )
+
+    def abort(self):
+        self.s3_client.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self.upload_id)
+
+    def _flush(self):
+        number = len(self.parts) + 1
+        response = self.s3_client.upload_part(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self.upload_id,
+            PartNumber=number,
+            Body=self.buffer.getvalue()
+        )
+        self.parts.append({'ETag': response['ETag'], 'PartNumber': number})
+        self.buffer = io.BytesIO()
@@ -0,0 +1,302 @@
+"""Lightweight tracing and metrics for the pipeline and the MCP servers.
+
+Spans are written as OTLP/JSON lines to TRACE_EXPORT_PATH and/or posted in batches to an
+OTLP/HTTP collector at OTLP_ENDPOINT. Trace context travels between processes in the W3C
+``traceparent`` header. Span durations feed a Prometheus histogram that instrumented
+FastAPI apps serve at /metrics.
+"""
+import contextvars
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from collections import deque, namedtuple
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+SpanContext = namedtuple('SpanContext', ['trace_id', 'span_id'])
+
+# OTLP span kinds
+KINDS = {'internal': 1, 'server': 2, 'client': 3}
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_service_name = os.getenv("OTEL_SERVICE_NAME", "followupsync")
+_current_span = contextvars.ContextVar('followupsync_current_span', default=None)
+_recent_spans = deque(maxlen=4096)
+
+class Span:
+    __slots__ = ('name', 'kind', 'service', 'trace_id', 'span_id', 'parent_id',
+                 'start_ns', 'end_ns', 'attributes', 'error')
+
+    def __init__(self, name: str, kind: str, parent: Optional[SpanContext], attributes: Dict[str, Any]):
+        self.name = name
+        self.kind = kind
+        self.service = _service_name
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent else None
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = dict(attributes)
+        self.error = None
+
+    @property
+    def context(self) -> SpanContext:
+        return SpanContext(self.trace_id, self.span_id)
+
+    @property
+    def duration(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e9
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def set_error(self, message: str):
+        self.error = message[:500]
+
+def set_service_name(name: str):
+    global _service_name
+    _service_name = name
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+@contextmanager
+def span(name: str, parent: Optional[SpanContext] = None, kind: str = 'internal', **attributes):
+    """Time a block of work as a child of the current span (or of an explicit parent context)"""
+    if parent is None and _current_span.get() is not None:
+        parent = _current_span.get().context
+    active = Span(name, kind, parent, attributes)
+    token = _current_span.set(active)
+    try:
+        yield active
+    except Exception as e:
+        active.set_error(str(e))
+        raise
+    finally:
+        active.end_ns = time.time_ns()
+        _current_span.reset(token)
+        _finish(active)
+
+def inject(headers: Dict[str, str]) -> Dict[str, str]:
+    """Add the current trace context to outgoing HTTP headers"""
+    active = _current_span.get()
+    if active is not None:
+        headers['traceparent'] = f"00-{active.trace_id}-{active.span_id}-01"
+    return headers
+
+def extract(headers) -> Optional[SpanContext]:
+    """Read a trace context from incoming HTTP headers"""
+    parts = (headers.get('traceparent') or '').split('-')
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    return SpanContext(parts[1], parts[2])
+
+def trace_spans(trace_id: str) -> List[Dict[str, Any]]:
+    """Finished spans of one trace still held in memory, oldest first (for in-app timing)"""
+    spans = [s for s in list(_recent_spans) if s.trace_id == trace_id]
+    return [
+        {
+            "span": s.name,
+            "service": s.service,
+            "start_offset_ms": round((s.start_ns - spans[0].start_ns) / 1e6, 1),
+            "duration_ms": round(s.duration * 1000, 1),
+            "error": s.error or "",
+        }
+        for s in sorted(spans, key=lambda s: s.start_ns)
+    ]
+
+def _finish(finished: Span):
+    _recent_spans.append(finished)
+    labels = {"span": finished.name, "service": finished.service}
+    metrics.observe("followupsync_span_duration_seconds", finished.duration, **labels)
+    if finished.error:
+        metrics.increment("followupsync_span_errors_total", **labels)
+    _exporter.export(finished)
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+def _to_otlp(spans: List[Span]) -> Dict[str, Any]:
+    """Build an OTLP/JSON ExportTraceServiceRequest"""
+    by_service: Dict[str, List[Dict[str, Any]]] = {}
+    for s in spans:
+        record = {
+            "traceId": s.trace_id,
+            "spanId": s.span_id,
+            "name": s.name,
+            "kind": KINDS.get(s.kind, 1),
+            "startTimeUnixNano": str(s.start_ns),
+            "endTimeUnixNano": str(s.end_ns),
+            "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in s.attributes.items()],
+            "status": {"code": 2, "message": s.error} if s.error else {"code": 1},
+        }
+        if s.parent_id:
+            record["parentSpanId"] = s.parent_id
+        by_service.setdefault(s.service, []).append(record)
+
+    return {
+        "resourceSpans": [
+            {
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service}}]},
+                "scopeSpans": [{"scope": {"name": "followupsync"}, "spans": records}],
+            }
+            for service, records in by_service.items()
+        ]
+    }
+
+class _Exporter:
+    BATCH_SIZE = 128
+    FLUSH_INTERVAL = 5.0
+
+    def __init__(self):
+        self.path = os.getenv("TRACE_EXPORT_PATH")
+        self.endpoint = os.getenv("OTLP_ENDPOINT")
+        self.pending: List[Span] = []
+        self.lock = threading.Lock()
+        self.flusher = None
+
+    def export(self, finished: Span):
+        if not self.path and not self.endpoint:
+            return
+        with self.lock:
+            self.pending.append(finished)
+            if self.flusher is None:
+                self.flusher = threading.Thread(target=self._flush_periodically, daemon=True)
+                self.flusher.start()
+            if len(self.pending) < self.BATCH_SIZE:
+                return
+            batch, self.pending = self.pending, []
+        self._write(batch)
+
+    def flush(self):
+        with self.lock:
+            batch, self.pending = self.pending, []
+        if batch:
+            self._write(batch)
+
+    def _flush_periodically(self):
+        while True:
+            time.sleep(self.FLUSH_INTERVAL)
+            self.flush()
+
+    def _write(self, batch: List[Span]):
+        payload = _to_otlp(batch)
+        if self.path:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(payload) + '\n')
+        if self.endpoint:
+            try:
+                requests.post(f"{self.endpoint.rstrip('/')}/v1/traces", json=payload, timeout=5)
+            except Exception as e:
+                logger.warning("OTLP export failed: %s", e)
+
+class Metrics:
+    """In-process counters, gauges and histograms rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters: Dict[tuple, float] = {}
+        self.gauges: Dict[tuple, float] = {}
+        self.histograms: Dict[tuple, List[float]] = {}
+
+    @staticmethod
+    def _key(name: str, labels: Dict[str, Any]) -> tuple:
+        return (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+
+    def increment(self, name: str, value: float = 1, **labels):
+        key = self._key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, **labels):
+        with self.lock:
+            self.gauges[self._key(name, labels)] = value
+
+    def observe(self, name: str, value: float, **labels):
+        key = self._key(name, labels)
+        with self.lock:
+            # Per-bucket counts followed by sum and count
+            state = self.histograms.setdefault(key, [0] * len(DURATION_BUCKETS) + [0.0, 0])
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def render(self) -> str:
+        lines = []
+        with self.lock:
+            for kind, series in (('counter', self.counters), ('gauge', self.gauges)):
+                for name in sorted({key[0] for key in series}):
+                    lines.append(f"# TYPE {name} {kind}")
+                    for (series_name, labels), value in series.items():
+                        if series_name == name:
+                            lines.append(f"{name}{_labels(labels)} {value}")
+            for name in sorted({key[0] for key in self.histograms}):
+                lines.append(f"# TYPE {name} histogram")
+                for (series_name, labels), state in self.histograms.items():
+                    if series_name != name:
+                        continue
+                    for bound, count in zip(DURATION_BUCKETS, state):
+                        lines.append(f"{name}_bucket{_labels(labels + (('le', str(bound)),))} {count}")
+                    lines.append(f"{name}_bucket{_labels(labels + (('le', '+Inf'),))} {state[-1]}")
+                    lines.append(f"{name}_sum{_labels(labels)} {state[-2]}")
+                    lines.append(f"{name}_count{_labels(labels)} {state[-1]}")
+        return '\n'.join(lines) + '\n'
+
+def _labels(labels: tuple) -> str:
+    if not labels:
+        return ''
+    escaped = (
+        '{}="{}"'.format(k, v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for k, v in labels
+    )
+    return '{' + ','.join(escaped) + '}'
+
+metrics = Metrics()
+_exporter = _Exporter()
+
+def flush():
+    _exporter.flush()
+
+def instrument_app(app, service_name: str):
+    """Trace every request of a FastAPI app (continuing the caller's trace) and serve /metrics"""
+    from fastapi import Request, Response
+
+    set_service_name(service_name)
+
+    @app.middleware("http")
+    async def trace_requests(request: Request, call_next):
+        if request.url.path == "/metrics":
+            return await call_next(request)
+        with span(f"{request.method} unmatched", parent=extract(request.headers), kind='server') as active:
+            try:
+                response = await call_next(request)
+            finally:
+                # Named after the matched route's template (/jobs/{job_id}), set by the router, so
+                # span names and metric labels stay bounded whatever paths are requested
+                route = request.scope.get("route")
+                active.name = f"{request.method} {getattr(route, 'path', 'unmatched')}"
+            active.set_attribute("http.status_code", response.status_code)
+            if response.status_code >= 500:
+                active.set_error(f"HTTP {response.status_code}")
+        return response
+
+    @app.get("/metrics")
+    async def prometheus_metrics():
+        return Response(metrics.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,202 @@
+"""Bedrock usage accounting and budgets.
+
+Every Bedrock extraction records the tokens it used (input, output, prompt cache reads and
+writes), how long the model took and what that costs at MODEL_PRICES. The usage travels with
+the run (ExtractionResult.usage, saved in ActionItems.json) and is appended to a SQLite store,
+{USAGE_DIR}/usage.db, which totals spend per day. Each tenant has its own store under
+{USAGE_DIR}/{tenant}/ (see Config.for_tenant); the report covers every tenant unless --tenant is given.
+
+A tenant's USAGE_DAILY_BUDGET_USD and USAGE_MONTHLY_BUDGET_USD cap that spend. Once either is
+USAGE_DOWNGRADE_AT used, extraction moves to USAGE_DOWNGRADE_MODEL_ID (when set); once one is
+spent, transcripts are extracted locally until the day or month is over.
+
+    python -m core.usage report [--days 30]
+    python -m core.usage budget [--tenant marketing]
+"""
+import argparse
+import logging
+import sqlite3
+import threading
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from core.config import Config
+from core.schema import Usage
+
+logger = logging.getLogger(__name__)
+
+# USD per million tokens: input, output, cache read, cache write (on-demand, us-east-1).
+# Matched against model IDs by substring, so inference profiles (us.amazon.nova-micro-v1:0)
+# are priced like their model.
+MODEL_PRICES: Dict[str, Tuple[float, float, float, float]] = {
+    "amazon.nova-micro": (0.035, 0.14, 0.00875, 0.0),
+    "amazon.nova-lite": (0.06, 0.24, 0.015, 0.0),
+    "amazon.nova-pro": (0.80, 3.20, 0.20, 0.0),
+    "anthropic.claude-3-haiku": (0.25, 1.25, 0.03, 0.30),
+    "anthropic.claude-3-5-haiku": (0.80, 4.00, 0.08, 1.00),
+    "anthropic.claude-3-5-sonnet": (3.00, 15.00, 0.30, 3.75),
+    "anthropic.claude-3-7-sonnet": (3.00, 15.00, 0.30, 3.75),
+    "anthropic.claude-sonnet-4": (3.00, 15.00, 0.30, 3.75),
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS extractions (
+    day TEXT NOT NULL,
+    tenant TEXT NOT NULL,
+    run_id TEXT NOT NULL,
+    model_id TEXT,
+    calls INTEGER NOT NULL,
+    input_tokens INTEGER NOT NULL,
+    output_tokens INTEGER NOT NULL,
+    cache_read_tokens INTEGER NOT NULL,
+    cache_write_tokens INTEGER NOT NULL,
+    latency_ms REAL NOT NULL,
+    cost_usd REAL NOT NULL,
+    downgraded INTEGER NOT NULL,
+    recorded_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS extractions_tenant_day ON extractions (tenant, day);
+"""
+
+TOKEN_KINDS = ("input", "output", "cache_read", "cache_write")
+
+_unpriced = set()
+
+def model_price(model_id: str) -> Optional[Tuple[float, float, float, float]]:
+    for name, price in MODEL_PRICES.items():
+        if name in model_id:
+            return price
+    return None
+
+def usage_from_response(response: Dict[str, Any], model_id: str, latency_ms: float) -> Usage:
+    """Usage of one InvokeModel call, from the usage block of a Nova or Claude response"""
+    usage = response.get('usage') or {}
+    result = Usage(
+        model_id=model_id,
+        calls=1,
+        input_tokens=usage.get('inputTokens', usage.get('input_tokens', 0)),
+        output_tokens=usage.get('outputTokens', usage.get('output_tokens', 0)),
+        cache_read_tokens=usage.get('cacheReadInputTokenCount', usage.get('cache_read_input_tokens', 0)) or 0,
+        cache_write_tokens=usage.get('cacheWriteInputTokenCount', usage.get('cache_creation_input_tokens', 0)) or 0,
+        latency_ms=round(latency_ms, 1),
+    )
+    price = model_price(model_id)
+    if price is None:
+        if model_id not in _unpriced:
+            _unpriced.add(model_id)
+            logger.warning("💸 No price for %s; its usage is recorded at $0 (add it to MODEL_PRICES)", model_id)
+    else:
+        tokens = (result.input_tokens, result.output_tokens, result.cache_read_tokens, result.cache_write_tokens)
+        result.cost_usd = round(sum(n * p for n, p in zip(tokens, price)) / 1_000_000, 6)
+    return result
+
+def combine(usages: Iterable[Optional[Usage]]) -> Optional[Usage]:
+    """Total usage of several extractions (e.g. the segments of an incremental run)"""
+    total = None
+    for usage in usages:
+        if usage is None:
+            continue
+        if total is None:
+            total = usage.model_copy()
+            continue
+        for kind in TOKEN_KINDS:
+            setattr(total, f"{kind}_tokens", getattr(total, f"{kind}_tokens") + getattr(usage, f"{kind}_tokens"))
+        total.calls += usage.calls
+        total.latency_ms = round(total.latency_ms + usage.latency_ms, 1)
+        total.cost_usd = round(total.cost_usd + usage.cost_usd, 6)
+        total.downgraded_from = total.downgraded_from or usage.downgraded_from
+    return total
+
+class UsageStore:
+    def __init__(self, directory: str = None):
+        path = Path(directory or Config.USAGE_DIR) / "usage.db"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(str(path), check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+
+    def record(self, tenant: Optional[str], run_id: str, usage: Usage, today: date = None):
+        """Append one extraction; a re-extracted run is charged again"""
+        with self.lock, self.db:
+            self.db.execute(
+                "INSERT INTO extractions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (str(today or date.today()), tenant or '', run_id, usage.model_id, usage.calls,
+                 usage.input_tokens, usage.output_tokens, usage.cache_read_tokens, usage.cache_write_tokens,
+                 usage.latency_ms, usage.cost_usd, int(bool(usage.downgraded_from)),
+                 datetime.now(timezone.utc).isoformat())
+            )
+
+    def spent(self, tenant: Optional[str], since: date) -> float:
+        """USD a tenant spent from `since` (inclusive) on"""
+        with self.lock:
+            return self.db.execute(
+                "SELECT COALESCE(SUM(cost_usd), 0) FROM extractions WHERE tenant = ? AND day >= ?",
+                (tenant or '', str(since))
+            ).fetchone()[0]
+
+    def daily(self, days: int = 30, tenant: Optional[str] = None, today: date = None) -> List[Dict[str, Any]]:
+        """Totals per day and tenant over the last `days` days, most recent first"""
+        since = date.fromordinal((today or date.today()).toordinal() - days + 1)
+        query = (
+            "SELECT day, tenant, COUNT(DISTINCT run_id), SUM(calls), SUM(input_tokens), SUM(output_tokens), "
+            "SUM(cache_read_tokens), SUM(cache_write_tokens), ROUND(AVG(latency_ms), 1), ROUND(SUM(cost_usd), 6), "
+            "SUM(downgraded) FROM extractions WHERE day >= ?"
+        )
+        params: List[Any] = [str(since)]
+        if tenant is not None:
+            query += " AND tenant = ?"
+            params.append(tenant)
+        query += " GROUP BY day, tenant ORDER BY day DESC, tenant"
+        columns = ("day", "tenant", "runs", "calls", "input_tokens", "output_tokens", "cache_read_tokens",
+                   "cache_write_tokens", "avg_latency_ms", "cost_usd", "downgraded")
+        with self.lock:
+            return [dict(zip(columns, row)) for row in self.db.execute(query, params).fetchall()]
+
+def budget_used(store: UsageStore, config, today: date = None) -> float:
+    """Largest share of the tenant's daily or monthly budget spent so far; 0 without budgets"""
+    today = today or date.today()
+    used = 0.0
+    if config.USAGE_DAILY_BUDGET_USD > 0:
+        used = store.spent(config.TENANT, today) / config.USAGE_DAILY_BUDGET_USD
+    if config.USAGE_MONTHLY_BUDGET_USD > 0:
+        used = max(used, store.spent(config.TENANT, today.replace(day=1)) / config.USAGE_MONTHLY_BUDGET_USD)
+    return used
+
+def budget_model(store: UsageStore, config, today: date = None) -> Optional[str]:
+    """Model the next extraction should use under the tenant's budgets; None to extract locally"""
+    used = budget_used(store, config, today)
+    if used >= 1:
+        return None
+    if used >= config.USAGE_DOWNGRADE_AT and config.USAGE_DOWNGRADE_MODEL_ID:
+        return config.USAGE_DOWNGRADE_MODEL_ID
+    return config.BEDROCK_MODEL_ID
+
+def main():
+    parser = argparse.ArgumentParser(description="Bedrock usage and budgets")
+    parser.add_argument("command", choices=["report", "budget"])
+    parser.add_argument("--days", type=int, default=30, help="Days covered by the report")
+    parser.add_argument("--tenant", help="One of TENANTS; the default configuration when omitted")
+    args = parser.parse_args()
+
+    config = Config.for_tenant(args.tenant)
+    if args.command == "report":
+        tenants = [args.tenant] if args.tenant else [None] + Config.TENANTS
+        rows = [row for tenant in tenants for row in UsageStore(Config.for_tenant(tenant).USAGE_DIR).daily(args.days)]
+        for row in sorted(rows, key=lambda row: (row['day'], row['tenant']), reverse=True):
+            print(f"{row['day']} {row['tenant'] or '-':<12} {row['runs']:>5} run(s) {row['input_tokens']:>10} in "
+                  f"{row['output_tokens']:>9} out {row['cache_read_tokens']:>9} cached  ${row['cost_usd']:.4f}"
+                  + (f"  ({row['downgraded']} downgraded)" if row['downgraded'] else ""))
+        return
+    store = UsageStore(config.USAGE_DIR)
+    today = date.today()
+    print(f"Today: ${store.spent(config.TENANT, today):.4f}"
+          + (f" of ${config.USAGE_DAILY_BUDGET_USD:.2f}" if config.USAGE_DAILY_BUDGET_USD else ""))
+    print(f"This month: ${store.spent(config.TENANT, today.replace(day=1)):.4f}"
+          + (f" of ${config.USAGE_MONTHLY_BUDGET_USD:.2f}" if config.USAGE_MONTHLY_BUDGET_USD else ""))
+    model_id = budget_model(store, config, today)
+    print(f"Next extraction: {model_id or 'local'}" if config.is_aws_mode() else "Next extraction: local (MODE=local)")
+
+if __name__ == "__main__":
+    main()
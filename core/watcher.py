@@ -0,0 +1,298 @@
+"""Watch-folder ingestion daemon.
+
+Transcripts dropped into the watched directories are processed through the pipeline once
+they stop changing, and their artifacts are saved through StorageManager. A persisted cursor
+records every processed file (by size and mtime), so restarts only pick up new or changed files.
+
+    python -m core.watcher /shared/recordings [/other/dir ...] [--poll]
+
+Uses inotify on Linux and falls back to polling elsewhere (or with --poll, e.g. for network
+mounts where inotify sees no events).
+"""
+import argparse
+import ctypes
+import ctypes.util
+import fnmatch
+import json
+import logging
+import os
+import select
+import signal
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from core.config import Config
+from core.pipeline import Pipeline
+from core.storage import iter_chunks
+from core.tracing import span
+from core.workers import WorkerPool, QueueFull
+
+logger = logging.getLogger(__name__)
+
+# Size and mtime of a file; a file whose signature is stable for the settle time is complete
+Signature = Tuple[int, int]
+
+class WatchCursor:
+    """Persisted record of processed files, keyed by absolute path"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.lock = threading.Lock()
+        self.dirty = False
+        self.entries: Dict[str, Dict] = {}
+        if self.path.exists():
+            self.entries = json.loads(self.path.read_text(encoding='utf-8'))
+
+    def is_done(self, path: str, signature: Signature) -> bool:
+        with self.lock:
+            entry = self.entries.get(path)
+        return bool(entry) and (entry['size'], entry['mtime_ns']) == signature
+
+    def mark(self, path: str, signature: Signature, **info):
+        with self.lock:
+            self.entries[path] = {'size': signature[0], 'mtime_ns': signature[1], **info}
+            self.dirty = True
+
+    def prune(self):
+        """Forget files that no longer exist"""
+        with self.lock:
+            missing = [path for path in self.entries if not os.path.exists(path)]
+            for path in missing:
+                del self.entries[path]
+            self.dirty = self.dirty or bool(missing)
+
+    def flush(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            content = json.dumps(self.entries)
+            self.dirty = False
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix('.tmp')
+        tmp.write_text(content, encoding='utf-8')
+        os.replace(tmp, self.path)
+
+class _PollingSource:
+    def __init__(self, directories: List[str], interval: float):
+        self.directories = directories
+        self.interval = interval
+        self.known: Dict[str, Signature] = {}
+
+    def changes(self, timeout: float) -> Iterable[str]:
+        time.sleep(min(timeout, self.interval))
+        changed = []
+        current = {}
+        for directory in self.directories:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if not entry.is_file():
+                        continue
+                    st = entry.stat()
+                    current[entry.path] = (st.st_size, st.st_mtime_ns)
+                    if self.known.get(entry.path) != current[entry.path]:
+                        changed.append(entry.path)
+        self.known = current
+        return changed
+
+    def close(self):
+        pass
+
+class _InotifySource:
+    IN_MODIFY = 0x002
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+    IN_Q_OVERFLOW = 0x4000
+    EVENT_HEADER = struct.Struct('iIII')
+
+    def __init__(self, directories: List[str]):
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.directories: Dict[int, str] = {}
+        mask = self.IN_MODIFY | self.IN_CLOSE_WRITE | self.IN_MOVED_TO | self.IN_CREATE
+        for directory in directories:
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), mask)
+            if wd < 0:
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+            self.directories[wd] = directory
+
+    def changes(self, timeout: float) -> Iterable[str]:
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            data = os.read(self.fd, 1024 * 1024)
+        except BlockingIOError:
+            return []
+
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = self.EVENT_HEADER.unpack_from(data, offset)
+            offset += self.EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if mask & self.IN_Q_OVERFLOW:
+                # Events were dropped; fall back to a full rescan
+                changed.update(_list_files(self.directories.values()))
+            elif name and wd in self.directories:
+                changed.add(os.path.join(self.directories[wd], os.fsdecode(name)))
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+def _list_files(directories: Iterable[str]) -> List[str]:
+    files = []
+    for directory in directories:
+        with os.scandir(directory) as entries:
+            files.extend(entry.path for entry in entries if entry.is_file())
+    return files
+
+class FolderWatcher:
+    def __init__(self, directories: List[str], pipeline: Optional[Pipeline] = None,
+                 workers: int = None, queue_size: int = None, settle_seconds: float = None,
+                 patterns: List[str] = None, cursor_path: str = None, force_polling: bool = False):
+        self.directories = [os.path.abspath(d) for d in directories]
+        self.pipeline = pipeline or Pipeline()
+        self.pool = WorkerPool(
+            workers=workers or Config.WATCH_WORKERS,
+            max_queue=queue_size or Config.WATCH_QUEUE_SIZE,
+            name="watch-worker"
+        )
+        self.settle_seconds = Config.WATCH_SETTLE_SECONDS if settle_seconds is None else settle_seconds
+        self.patterns = patterns or Config.WATCH_PATTERNS
+        # Per tenant, so watchers of different tenants never skip each other's files
+        self.cursor = WatchCursor(cursor_path or self.pipeline.config.WATCH_CURSOR_PATH)
+        self.force_polling = force_polling
+        # path -> (last signature seen, monotonic time it was first seen)
+        self.pending: Dict[str, Tuple[Optional[Signature], float]] = {}
+        self.inflight: Set[str] = set()
+        self.inflight_lock = threading.Lock()
+        self.stopped = threading.Event()
+
+    def _open_source(self):
+        if not self.force_polling and sys.platform.startswith('linux'):
+            try:
+                return _InotifySource(self.directories)
+            except OSError as e:
+                logger.warning("inotify unavailable (%s), falling back to polling", e)
+        return _PollingSource(self.directories, interval=max(0.5, self.settle_seconds / 2))
+
+    def _wanted(self, path: str) -> bool:
+        name = os.path.basename(path)
+        # Skip hidden and partial files written by recorders and editors
+        if name.startswith('.') or name.endswith(('.tmp', '.part', '~')):
+            return False
+        return any(fnmatch.fnmatch(name, pattern) for pattern in self.patterns)
+
+    def run(self):
+        for directory in self.directories:
+            os.makedirs(directory, exist_ok=True)
+        self.cursor.prune()
+        source = self._open_source()
+        logger.info("Watching %s with %s", ", ".join(self.directories), type(source).__name__)
+
+        # Anything that appeared while we were down
+        self._track(_list_files(self.directories))
+        try:
+            while not self.stopped.is_set():
+                self._track(source.changes(timeout=0.5))
+                self._dispatch_settled()
+                self.cursor.flush()
+        finally:
+            source.close()
+            self.pool.shutdown()
+            self.cursor.flush()
+
+    def stop(self):
+        self.stopped.set()
+
+    def _track(self, paths: Iterable[str]):
+        now = time.monotonic()
+        for path in paths:
+            if self._wanted(path):
+                # Every event restarts the settle window
+                self.pending[path] = (None, now)
+
+    def _dispatch_settled(self):
+        now = time.monotonic()
+        for path, (last_signature, since) in list(self.pending.items()):
+            if now - since < self.settle_seconds:
+                continue
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                del self.pending[path]
+                continue
+
+            signature = (st.st_size, st.st_mtime_ns)
+            if signature != last_signature:
+                # Still being written (or first check); wait another settle window
+                self.pending[path] = (signature, now)
+                continue
+            if self.cursor.is_done(path, signature):
+                del self.pending[path]
+                continue
+
+            with self.inflight_lock:
+                if path in self.inflight:
+                    continue
+                self.inflight.add(path)
+            try:
+                self.pool.submit(self._process, path, signature)
+            except QueueFull:
+                # Backpressure: leave the rest pending until workers catch up
+                with self.inflight_lock:
+                    self.inflight.discard(path)
+                return
+            del self.pending[path]
+
+    def _process(self, path: str, signature: Signature):
+        try:
+            with span("watch.process_file", path=path, size=signature[0]):
+                with open(path, 'rb') as f:
+                    result = self.pipeline.process_stream(iter_chunks(f))
+                self.pipeline.save_artifacts(result)
+            self.cursor.mark(path, signature, run_id=result.run_id, processed_at=time.time())
+            logger.info("Processed %s as run %s", path, result.run_id)
+        except Exception as e:
+            # Recorded so a bad file is not retried until it changes
+            logger.exception("Failed to process %s", path)
+            self.cursor.mark(path, signature, error=str(e), processed_at=time.time())
+        finally:
+            with self.inflight_lock:
+                self.inflight.discard(path)
+
+def main():
+    parser = argparse.ArgumentParser(description="Process transcripts dropped into watched directories")
+    parser.add_argument("directories", nargs="*", help="Directories to watch (default: WATCH_DIRS)")
+    parser.add_argument("--poll", action="store_true", help="Poll instead of using inotify")
+    parser.add_argument("--workers", type=int, help="Worker threads (default: WATCH_WORKERS)")
+    parser.add_argument("--tenant", help="Process files with this tenant's configuration (one of TENANTS)")
+    args = parser.parse_args()
+
+    directories = args.directories or Config.WATCH_DIRS
+    if not directories:
+        parser.error("no directories given and WATCH_DIRS is not set")
+
+    try:
+        pipeline = Pipeline(Config.for_tenant(args.tenant))
+    except ValueError as e:
+        parser.error(str(e))
+
+    watcher = FolderWatcher(directories, pipeline=pipeline, workers=args.workers, force_polling=args.poll)
+    signal.signal(signal.SIGTERM, lambda *_: watcher.stop())
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        watcher.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+import logging
+import math
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (weight, max concurrent jobs; 0 = no limit) of a tenant
+Quota = Tuple[float, int]
+
+class QueueFull(Exception):
+    """Raised when a job is submitted to a pool whose queue is at capacity"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+class TokenBucket:
+    """Blocking token bucket: `rate` tokens per second, holding up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, amount: float) -> float:
+        """Take `amount` tokens, waiting for them if needed; returns the seconds waited"""
+        # A request larger than the bucket only has to wait for a full one
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return waited
+                delay = (amount - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def refund(self, amount: float):
+        """Return tokens that were reserved but not used; a negative amount charges extra"""
+        with self.lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+class _TenantQueue:
+    def __init__(self, weight: float, max_concurrency: int, virtual_time: float):
+        self.jobs: Deque[Tuple[Callable, tuple, dict]] = deque()
+        self.weight = max(weight, 0.001)
+        self.max_concurrency = max_concurrency
+        self.running = 0
+        # Stride scheduling: the tenant with the lowest pass runs next, and each job it starts
+        # advances its pass by 1/weight, so tenants get workers in proportion to their weight
+        self.pass_value = virtual_time
+
+    def runnable(self) -> bool:
+        return bool(self.jobs) and (not self.max_concurrency or self.running < self.max_concurrency)
+
+class WorkerPool:
+    """A fixed number of worker threads draining a bounded job queue.
+
+    Jobs are queued per tenant and handed out by weighted fair scheduling: a tenant with a
+    large backlog cannot starve the others, and no tenant runs more than its concurrency
+    quota at once. `quotas` maps a tenant to its (weight, max_concurrency).
+    """
+
+    def __init__(self, workers: int = 4, max_queue: int = 100, name: str = "followupsync-worker",
+                 quotas: Callable[[Optional[str]], Quota] = None):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.quotas = quotas or (lambda tenant: (1.0, 0))
+        self.tenants: Dict[Optional[str], _TenantQueue] = {}
+        self.queued = 0
+        self.virtual_time = 0.0
+        self.closing = False
+        self.lock = threading.Lock()
+        self.ready = threading.Condition(self.lock)
+        # Exponentially weighted job duration, used to estimate Retry-After
+        self.avg_job_seconds = 1.0
+        self.threads = [
+            threading.Thread(target=self._work, name=f"{name}-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, fn: Callable, *args, **kwargs):
+        self.submit_for(None, fn, *args, **kwargs)
+
+    def submit_for(self, tenant: Optional[str], fn: Callable, *args, **kwargs):
+        """Queue a job on behalf of a tenant"""
+        with self.lock:
+            if self.queued >= self.max_queue:
+                raise QueueFull(self._retry_after())
+            queue = self.tenants.get(tenant)
+            if queue is None:
+                weight, max_concurrency = self.quotas(tenant)
+                queue = self.tenants[tenant] = _TenantQueue(weight, max_concurrency, self.virtual_time)
+            elif not queue.jobs and not queue.running:
+                # An idle tenant does not bank credit for the time it had nothing queued
+                queue.pass_value = max(queue.pass_value, self.virtual_time)
+            queue.jobs.append((fn, args, kwargs))
+            self.queued += 1
+            self.ready.notify()
+
+    def free_slots(self) -> int:
+        with self.lock:
+            return self.max_queue - self.queued
+
+    def retry_after(self) -> int:
+        """Seconds until the queue has likely drained enough to accept more work"""
+        with self.lock:
+            return self._retry_after()
+
+    def stats(self) -> Dict[Optional[str], Dict[str, int]]:
+        """Queued and running jobs per tenant"""
+        with self.lock:
+            return {tenant: {"queued": len(q.jobs), "running": q.running} for tenant, q in self.tenants.items()}
+
+    def shutdown(self, wait: bool = True):
+        """Stop once every queued job has run"""
+        with self.lock:
+            self.closing = True
+            self.ready.notify_all()
+        if wait:
+            for thread in self.threads:
+                thread.join()
+
+    def _retry_after(self) -> int:
+        backlog = self.queued / self.workers
+        return max(1, math.ceil(backlog * self.avg_job_seconds))
+
+    def _next_job(self):
+        with self.lock:
+            while True:
+                candidates = [(q.pass_value, tenant) for tenant, q in self.tenants.items() if q.runnable()]
+                if candidates:
+                    _, tenant = min(candidates, key=lambda c: c[0])
+                    queue = self.tenants[tenant]
+                    self.virtual_time = queue.pass_value
+                    queue.pass_value += 1 / queue.weight
+                    queue.running += 1
+                    self.queued -= 1
+                    return tenant, queue.jobs.popleft()
+                if self.closing and not self.queued:
+                    return None, None
+                self.ready.wait()
+
+    def _work(self):
+        while True:
+            tenant, job = self._next_job()
+            if job is None:
+                return
+            fn, args, kwargs = job
+            start = time.monotonic()
+            try:
+                fn(*args, **kwargs)
+            except Exception:
+                logger.exception("Worker job failed")
+            finally:
+                elapsed = time.monotonic() - start
+                with self.lock:
+                    self.avg_job_seconds = 0.8 * self.avg_job_seconds + 0.2 * elapsed
+                    self.tenants[tenant].running -= 1
+                    # A tenant at its concurrency limit may have become runnable again
+                    self.ready.notify_all()
@@ -0,0 +1,36 @@
+from fastapi import FastAPI
+from dotenv import load_dotenv
+import sys
+from pathlib import Path
+
+# Allow running as `python mcp/gateway.py` from the project root
+sys.path.append(str(Path(__file__).parent.parent))
+# Before the project imports: core.tracing and mcp.shared read their settings on import
+load_dotenv()
+
+from core.tracing import instrument_app
+from mcp import slack_server, notion_server, jira_server
+from mcp.protocol import MCPServer, mcp_router, run_stdio
+
+# Serves the Slack, Notion and Jira tools from one process. Tool paths do not overlap, so
+# MCP_SLACK_URL, MCP_NOTION_URL and MCP_JIRA_URL can all point at this app; the three routers
+# share the connection pool, Notion schema cache and rate limiters in mcp/shared.py.
+app = FastAPI(title="FollowUpSync MCP Gateway")
+app.include_router(slack_server.router)
+app.include_router(notion_server.router)
+app.include_router(jira_server.router)
+# One MCP endpoint (/mcp, or stdio) listing every tool
+mcp_server = MCPServer("followupsync-gateway", {**slack_server.TOOLS, **notion_server.TOOLS, **jira_server.TOOLS})
+app.include_router(mcp_router(mcp_server))
+instrument_app(app, "mcp-gateway")
+
+@app.get("/health")
+async def health():
+    return {"status": "healthy", "service": "mcp-gateway", "services": ["slack", "notion", "jira"]}
+
+if __name__ == "__main__":
+    if "--stdio" in sys.argv:
+        run_stdio(mcp_server)
+    else:
+        import uvicorn
+        uvicorn.run(app, host="127.0.0.1", port=8000)
@@ -0,0 +1,269 @@
+from fastapi import FastAPI, HTTPException, Header, Request
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field
+from typing import Optional, List, Dict, Any
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import threading
+import requests
+import json
+import logging
+import time
+import uuid
+import sys
+from pathlib import Path
+
+# Allow running as `python mcp/ingest_server.py` from the project root
+sys.path.append(str(Path(__file__).parent.parent))
+
+from core.config import Config
+from core.digest import DigestScheduler
+from core.pipeline import Pipeline
+from core.reminders import ReminderScheduler
+from core.status import StatusSyncWorker, verify_signature
+from core.tracing import instrument_app, span
+from core.workers import WorkerPool, QueueFull
+
+logger = logging.getLogger("ingest")
+
+app = FastAPI(title="FollowUpSync Ingestion Service")
+instrument_app(app, "ingest")
+
+WEBHOOK_ATTEMPTS = 3
+WEBHOOK_WORKERS = 4
+
+class TranscriptJob(BaseModel):
+    transcript: str = Field(min_length=1)
+    # One of TENANTS; the deployment's default configuration when omitted
+    tenant: Optional[str] = None
+    run_id: Optional[str] = None
+    incremental: bool = False
+    # Same shape as Pipeline.deliver_to_integrations, e.g. {"slack": {"channel": "#team"}, "jira": true}
+    integrations: Optional[Dict[str, Any]] = None
+    callback_url: Optional[str] = None
+    metadata: Dict[str, Any] = {}
+
+class TranscriptBatch(BaseModel):
+    transcripts: List[TranscriptJob] = Field(min_length=1)
+
+class JobStore:
+    """In-memory job records; the oldest finished jobs are evicted beyond `retention`"""
+
+    def __init__(self, retention: int):
+        self.retention = retention
+        self.jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def create(self, request: TranscriptJob) -> Dict[str, Any]:
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "status": "queued",
+            "tenant": request.tenant,
+            "run_id": request.run_id,
+            "metadata": request.metadata,
+            "created_at": _now(),
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "artifacts": None,
+            "delivery": None,
+            "error": None,
+        }
+        with self.lock:
+            self.jobs[job["job_id"]] = job
+            excess = len(self.jobs) - self.retention
+            if excess > 0:
+                # Queued and running jobs stay however old they are; clients are still polling them
+                finished = [job_id for job_id, old in self.jobs.items() if old["status"] not in ("queued", "running")]
+                for job_id in finished[:excess]:
+                    self.jobs.pop(job_id)
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return dict(job) if job else None
+
+    def update(self, job_id: str, **fields):
+        with self.lock:
+            self.jobs[job_id].update(fields)
+
+    def remove(self, job_id: str):
+        with self.lock:
+            self.jobs.pop(job_id, None)
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+def _quota(tenant: Optional[str]):
+    config = Config.for_tenant(tenant)
+    return config.WORKER_WEIGHT, config.WORKER_MAX_CONCURRENCY
+
+pipelines: Dict[Optional[str], Pipeline] = {}
+pipelines_lock = threading.Lock()
+# Shared by all tenants, with weighted fair scheduling between them
+pool = WorkerPool(workers=Config.INGEST_WORKERS, max_queue=Config.INGEST_QUEUE_SIZE, name="ingest-worker",
+                  quotas=_quota)
+store = JobStore(Config.INGEST_JOB_RETENTION)
+# Callbacks retry with backoff; they get their own threads so a slow receiver never holds up a worker
+webhooks = ThreadPoolExecutor(max_workers=WEBHOOK_WORKERS, thread_name_prefix="ingest-webhook")
+
+def _pipeline(tenant: Optional[str]) -> Pipeline:
+    with pipelines_lock:
+        if tenant not in pipelines:
+            pipelines[tenant] = Pipeline(Config.for_tenant(tenant))
+        return pipelines[tenant]
+
+def _digest_pipelines() -> List[Pipeline]:
+    tenants = [None] + Config.TENANTS
+    return [_pipeline(tenant) for tenant in tenants if Config.for_tenant(tenant).DIGEST_ENABLED]
+
+# Delivers queued digests once they are due, for every tenant with digest mode on
+digests = DigestScheduler(_digest_pipelines)
+digests.start()
+
+def _status_pipelines() -> List[Pipeline]:
+    tenants = [None] + Config.TENANTS
+    return [_pipeline(tenant) for tenant in tenants if Config.for_tenant(tenant).STATUS_SYNC_ENABLED]
+
+# Pulls Notion/Jira status changes for every tenant with status sync on
+status_sync = StatusSyncWorker(_status_pipelines)
+status_sync.start()
+
+def _reminder_pipelines() -> List[Pipeline]:
+    tenants = [None] + Config.TENANTS
+    return [_pipeline(tenant) for tenant in tenants if Config.for_tenant(tenant).REMINDERS_ENABLED]
+
+# Sends follow-up reminders as they come due, for every tenant with reminders on
+reminders = ReminderScheduler(_reminder_pipelines)
+reminders.start()
+
+def _check_tenant(request: TranscriptJob):
+    try:
+        Config.for_tenant(request.tenant)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _check_auth(authorization: Optional[str]):
+    if authorization != f"Bearer {Config.MCP_AUTH_TOKEN}":
+        raise HTTPException(status_code=401, detail="Invalid or missing bearer token")
+
+def _queue_full(retry_after: int) -> JSONResponse:
+    return JSONResponse(
+        {"detail": "Ingestion queue is full"},
+        status_code=429,
+        headers={"Retry-After": str(retry_after)}
+    )
+
+def _accepted(job: Dict[str, Any]) -> Dict[str, Any]:
+    return {"job_id": job["job_id"], "status": job["status"], "status_url": f"/jobs/{job['job_id']}"}
+
+def _run_job(job_id: str, request: TranscriptJob):
+    store.update(job_id, status="running", started_at=_now())
+    pipeline = _pipeline(request.tenant)
+    try:
+        with span("ingest.job", job_id=job_id, tenant=request.tenant or ''):
+            result = pipeline.process_transcript(request.transcript, run_id=request.run_id, incremental=request.incremental)
+            artifacts = pipeline.save_artifacts(result)
+            delivery = None
+            if request.integrations and pipeline.config.DIGEST_ENABLED:
+                delivery = pipeline.queue_digest(result, request.integrations)
+            elif request.integrations:
+                delivery = pipeline.deliver_to_integrations(result, request.integrations)
+        store.update(
+            job_id,
+            status="succeeded",
+            run_id=result.run_id,
+            result=result.model_dump(mode='json'),
+            artifacts=artifacts,
+            delivery=delivery,
+            finished_at=_now()
+        )
+    except Exception as e:
+        logger.exception("Ingestion job %s failed", job_id)
+        store.update(job_id, status="failed", error=str(e), finished_at=_now())
+
+    if request.callback_url:
+        webhooks.submit(_send_webhook, request.callback_url, store.get(job_id))
+
+def _send_webhook(url: str, job: Dict[str, Any]):
+    for attempt in range(WEBHOOK_ATTEMPTS):
+        try:
+            response = requests.post(url, json=job, timeout=10)
+            if response.status_code < 400:
+                return
+            logger.warning("Webhook %s returned %s", url, response.status_code)
+        except Exception as e:
+            logger.warning("Webhook %s failed: %s", url, e)
+        time.sleep(2 ** attempt)
+
+@app.post("/transcripts", status_code=202)
+async def submit_transcript(request: TranscriptJob, authorization: Optional[str] = Header(None)):
+    _check_auth(authorization)
+    _check_tenant(request)
+    job = store.create(request)
+    try:
+        pool.submit_for(request.tenant, _run_job, job["job_id"], request)
+    except QueueFull as e:
+        store.remove(job["job_id"])
+        return _queue_full(e.retry_after)
+    return _accepted(job)
+
+@app.post("/transcripts/batch", status_code=202)
+async def submit_batch(request: TranscriptBatch, authorization: Optional[str] = Header(None)):
+    _check_auth(authorization)
+    for item in request.transcripts:
+        _check_tenant(item)
+    # Handlers run on the event loop, so nothing else can enqueue between the capacity
+    # check and the submits below: a batch is either fully queued or rejected.
+    if pool.free_slots() < len(request.transcripts):
+        return _queue_full(pool.retry_after())
+    jobs = []
+    for item in request.transcripts:
+        job = store.create(item)
+        pool.submit_for(item.tenant, _run_job, job["job_id"], item)
+        jobs.append(_accepted(job))
+    return {"jobs": jobs}
+
+@app.post("/webhooks/jira")
+async def jira_webhook(request: Request, tenant: Optional[str] = None, x_hub_signature: Optional[str] = Header(None)):
+    """Issue events from a Jira webhook, e.g. https://<host>/webhooks/jira?tenant=platform"""
+    try:
+        config = Config.for_tenant(tenant)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not config.JIRA_WEBHOOK_SECRET:
+        raise HTTPException(status_code=404, detail="Jira webhook not configured")
+    body = await request.body()
+    if not verify_signature(config.JIRA_WEBHOOK_SECRET, body, x_hub_signature):
+        raise HTTPException(status_code=401, detail="Invalid webhook signature")
+    try:
+        event = json.loads(body)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON body: {e}")
+    updated = _pipeline(tenant).status_sync.receive_jira_webhook(event)
+    return {"ok": True, "updated": updated}
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, authorization: Optional[str] = Header(None)):
+    _check_auth(authorization)
+    job = store.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/health")
+async def health():
+    return {
+        "status": "healthy",
+        "service": "ingest",
+        "queued": Config.INGEST_QUEUE_SIZE - pool.free_slots(),
+        "queue_capacity": Config.INGEST_QUEUE_SIZE,
+        "workers": Config.INGEST_WORKERS,
+        "tenants": {tenant or "default": stats for tenant, stats in pool.stats().items()}
+    }
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="127.0.0.1", port=8004)
@@ -1,11 +1,28 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import Optional
-import requests
+from fastapi import APIRouter, FastAPI, HTTPException
+from pydantic import BaseModel, Field
+from typing import List, Optional
 import base64
 import os
+import logging
+from dotenv import load_dotenv
+import sys
+from pathlib import Path
 
-app = FastAPI(title="Jira MCP Server")
+# Allow running as `python mcp/jira_server.py` from the project root
+sys.path.append(str(Path(__file__).parent.parent))
+# Before the project imports: core.tracing and mcp.shared read their settings on import
+load_dotenv()
+
+from core.mcp_client import JIRA_BULK_LIMIT
+from core.status import jira_issue_change
+from core.tracing import instrument_app, span
+from mcp.protocol import MCPServer, mcp_router, run_stdio
+from mcp.shared import http, limiters
+
+logger = logging.getLogger("jira-mcp")
+
+# Mounted by this server's own app below and by the combined gateway (mcp/gateway.py)
+router = APIRouter()
 
 class JiraCreateIssue(BaseModel):
     cloud_base_url: str
@@ -14,75 +31,302 @@ class JiraCreateIssue(BaseModel):
     project_key: str
     summary: str
     description: str
-    assignee: Optional[str] = None
+    # Atlassian account ID; Jira Cloud does not accept names or email addresses here
+    assignee_account_id: Optional[str] = None
 
-@app.post("/jira_create_issue")
-async def jira_create_issue(request: JiraCreateIssue):
-    url = f"{request.cloud_base_url}/rest/api/3/issue"
-    
+class JiraIssue(BaseModel):
+    summary: str
+    description: str
+    assignee_account_id: Optional[str] = None
+
+class JiraCreateIssues(BaseModel):
+    cloud_base_url: str
+    email: str
+    api_token: str
+    project_key: str
+    issues: List[JiraIssue] = Field(min_length=1, max_length=JIRA_BULK_LIMIT)
+
+class JiraUpdateIssue(BaseModel):
+    cloud_base_url: str
+    email: str
+    api_token: str
+    issue_key: str
+    summary: str
+    description: str
+    assignee_account_id: Optional[str] = None
+
+class JiraDeleteIssue(BaseModel):
+    cloud_base_url: str
+    email: str
+    api_token: str
+    issue_key: str
+
+class JiraListUsers(BaseModel):
+    cloud_base_url: str
+    email: str
+    api_token: str
+    page_size: int = 1000
+
+class JiraSearchUpdates(BaseModel):
+    cloud_base_url: str
+    email: str
+    api_token: str
+    project_key: str
+    # Issues updated in the last this many minutes; relative, so the account's time zone does not matter
+    minutes: int
+    page_size: int = 100
+
+def _jira_headers(email: str, api_token: str) -> dict:
     # Create basic auth header
-    auth_string = f"{request.email}:{request.api_token}"
+    auth_string = f"{email}:{api_token}"
     auth_bytes = auth_string.encode('ascii')
     auth_b64 = base64.b64encode(auth_bytes).decode('ascii')
     
-    headers = {
+    return {
         "Authorization": f"Basic {auth_b64}",
         "Content-Type": "application/json"
     }
-    
-    payload = {
-        "fields": {
-            "project": {
-                "key": request.project_key
-            },
-            "summary": request.summary,
-            "description": {
-                "type": "doc",
-                "version": 1,
-                "content": [
-                    {
-                        "type": "paragraph",
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": request.description
-                            }
-                        ]
-                    }
-                ]
-            },
-            "issuetype": {
-                "name": "Task"
-            }
+
+def _issue_fields(summary: str, description: str, assignee_account_id: Optional[str]) -> dict:
+    fields = {
+        "summary": summary,
+        "description": {
+            "type": "doc",
+            "version": 1,
+            "content": [
+                {
+                    "type": "paragraph",
+                    "content": [
+                        {
+                            "type": "text",
+                            "text": description
+                        }
+                    ]
+                }
+            ]
         }
     }
     
     # Add assignee if provided
-    if request.assignee:
-        payload["fields"]["assignee"] = {
-            "emailAddress": request.assignee
+    if assignee_account_id:
+        fields["assignee"] = {
+            "accountId": assignee_account_id
         }
     
+    return fields
+
+def _error_detail(response) -> list:
     try:
-        response = requests.post(url, json=payload, headers=headers)
-        result = response.json()
-        
-        if response.status_code == 201:
-            issue_key = result.get("key")
-            return {
-                "key": issue_key,
-                "url": f"{request.cloud_base_url}/browse/{issue_key}"
-            }
+        return response.json().get("errorMessages", ["Unknown error"])
+    except ValueError:
+        return ["Unknown error"]
+
+@router.post("/jira_create_issue")
+def jira_create_issue(request: JiraCreateIssue):
+    """Create a Jira task in a project"""
+    url = f"{request.cloud_base_url}/rest/api/3/issue"
+    headers = _jira_headers(request.email, request.api_token)
+    
+    fields = _issue_fields(request.summary, request.description, request.assignee_account_id)
+    fields["project"] = {
+        "key": request.project_key
+    }
+    fields["issuetype"] = {
+        "name": "Task"
+    }
+    payload = {"fields": fields}
+    
+    limiters["jira"].acquire()
+    try:
+        with span("jira.issue.create", kind='client') as call:
+            response = http.post(url, json=payload, headers=headers)
+            call.set_attribute("http.status_code", response.status_code)
+    except Exception as e:
+        logger.warning("Jira create issue failed: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    # Outside the try: Jira's own status (e.g. 400 for an invalid field) must reach the caller
+    if response.status_code != 201:
+        raise HTTPException(status_code=response.status_code, detail=_error_detail(response))
+    issue_key = response.json().get("key")
+    return {
+        "key": issue_key,
+        "url": f"{request.cloud_base_url}/browse/{issue_key}"
+    }
+
+def _bulk_error(error: dict) -> str:
+    element = error.get("elementErrors") or {}
+    messages = element.get("errorMessages", []) + [f"{field}: {message}" for field, message in element.get("errors", {}).items()]
+    return "; ".join(messages) or f"HTTP {error.get('status', 400)}"
+
+@router.post("/jira_create_issues")
+def jira_create_issues(request: JiraCreateIssues):
+    """Create several Jira tasks in one request; issues Jira rejects are reported one by one"""
+    url = f"{request.cloud_base_url}/rest/api/3/issue/bulk"
+    headers = _jira_headers(request.email, request.api_token)
+    
+    updates = []
+    for issue in request.issues:
+        fields = _issue_fields(issue.summary, issue.description, issue.assignee_account_id)
+        fields["project"] = {"key": request.project_key}
+        fields["issuetype"] = {"name": "Task"}
+        updates.append({"fields": fields})
+    
+    limiters["jira"].acquire()
+    try:
+        with span("jira.issue.bulk_create", kind='client', issues=len(updates)) as call:
+            response = http.post(url, json={"issueUpdates": updates}, headers=headers)
+            call.set_attribute("http.status_code", response.status_code)
+    except Exception as e:
+        logger.warning("Jira bulk create failed: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    # 201 when at least one issue was created, 400 when none was; either way "errors" names
+    # each rejected issue by its position and "issues" lists the created ones in order
+    try:
+        result = response.json() if response.status_code in (201, 400) else {}
+    except ValueError:
+        result = {}
+    failed = {error.get("failedElementNumber"): error for error in result.get("errors", [])}
+    if not failed and response.status_code != 201:
+        raise HTTPException(status_code=response.status_code, detail=_error_detail(response))
+    created = iter(result.get("issues", []))
+    issues = []
+    for index in range(len(updates)):
+        if index in failed:
+            issues.append({"error": _bulk_error(failed[index])})
         else:
-            raise HTTPException(status_code=response.status_code, detail=result.get("errorMessages", ["Unknown error"]))
+            issue = next(created, None)
+            if issue is None:
+                # Neither created nor rejected: Jira's answer is short of issues
+                issues.append({"error": "Jira returned no issue for this element"})
+                continue
+            issues.append({"key": issue["key"], "url": f"{request.cloud_base_url}/browse/{issue['key']}"})
+    return {"issues": issues}
+
+@router.post("/jira_update_issue")
+def jira_update_issue(request: JiraUpdateIssue):
+    """Update the summary, description and assignee of an issue"""
+    url = f"{request.cloud_base_url}/rest/api/3/issue/{request.issue_key}"
+    headers = _jira_headers(request.email, request.api_token)
+    payload = {"fields": _issue_fields(request.summary, request.description, request.assignee_account_id)}
+    
+    limiters["jira"].acquire()
+    try:
+        with span("jira.issue.update", kind='client') as call:
+            response = http.put(url, json=payload, headers=headers)
+            call.set_attribute("http.status_code", response.status_code)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
     
+    # Jira answers a successful edit with 204 No Content
+    if response.status_code != 204:
+        raise HTTPException(status_code=response.status_code, detail=_error_detail(response))
+    return {
+        "key": request.issue_key,
+        "url": f"{request.cloud_base_url}/browse/{request.issue_key}"
+    }
+
+@router.post("/jira_delete_issue")
+def jira_delete_issue(request: JiraDeleteIssue):
+    """Delete an issue"""
+    url = f"{request.cloud_base_url}/rest/api/3/issue/{request.issue_key}"
+    headers = _jira_headers(request.email, request.api_token)
+    
+    limiters["jira"].acquire()
+    try:
+        with span("jira.issue.delete", kind='client') as call:
+            response = http.delete(url, headers=headers)
+            call.set_attribute("http.status_code", response.status_code)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    
+    if response.status_code != 204:
+        raise HTTPException(status_code=response.status_code, detail=_error_detail(response))
+    return {"key": request.issue_key, "deleted": True}
+
+@router.post("/jira_list_users")
+def jira_list_users(request: JiraListUsers):
+    """List active Atlassian accounts, for resolving names to Jira account IDs"""
+    url = f"{request.cloud_base_url}/rest/api/3/users/search"
+    headers = _jira_headers(request.email, request.api_token)
+    users = []
+    start = 0
+    while True:
+        limiters["jira"].acquire()
+        try:
+            with span("jira.users.search", kind='client') as call:
+                response = http.get(url, params={"startAt": start, "maxResults": request.page_size}, headers=headers)
+                call.set_attribute("http.status_code", response.status_code)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+        
+        if response.status_code != 200:
+            raise HTTPException(status_code=response.status_code, detail=_error_detail(response))
+        page = response.json()
+        for user in page:
+            # Skip apps and customer accounts, which cannot be assigned issues
+            if user.get("accountType") == "atlassian" and user.get("active", True):
+                users.append({
+                    "account_id": user["accountId"],
+                    "name": user.get("displayName"),
+                    "email": user.get("emailAddress")
+                })
+        if len(page) < request.page_size:
+            return {"users": users}
+        start += len(page)
+
+@router.post("/jira_search_updates")
+def jira_search_updates(request: JiraSearchUpdates):
+    """Status of the project's issues updated in the last few minutes"""
+    url = f"{request.cloud_base_url}/rest/api/3/search/jql"
+    headers = _jira_headers(request.email, request.api_token)
+    body = {
+        "jql": f'project = "{request.project_key}" AND updated >= "-{max(1, request.minutes)}m" ORDER BY updated ASC',
+        "fields": ["status", "updated"],
+        "maxResults": request.page_size
+    }
+    changes = []
+    while True:
+        limiters["jira"].acquire()
+        try:
+            with span("jira.search", kind='client') as call:
+                response = http.post(url, json=body, headers=headers)
+                call.set_attribute("http.status_code", response.status_code)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+        
+        if response.status_code != 200:
+            raise HTTPException(status_code=response.status_code, detail=_error_detail(response))
+        page = response.json()
+        changes.extend(jira_issue_change(issue) for issue in page.get("issues", []))
+        if page.get("isLast", True) or not page.get("nextPageToken"):
+            return {"changes": changes}
+        body["nextPageToken"] = page["nextPageToken"]
+
+# Tool name -> (handler, request model), for callers that invoke the handlers in-process
+TOOLS = {
+    "jira_create_issue": (jira_create_issue, JiraCreateIssue),
+    "jira_create_issues": (jira_create_issues, JiraCreateIssues),
+    "jira_update_issue": (jira_update_issue, JiraUpdateIssue),
+    "jira_delete_issue": (jira_delete_issue, JiraDeleteIssue),
+    "jira_list_users": (jira_list_users, JiraListUsers),
+    "jira_search_updates": (jira_search_updates, JiraSearchUpdates),
+}
+
+app = FastAPI(title="Jira MCP Server")
+app.include_router(router)
+mcp_server = MCPServer("jira-mcp", TOOLS)
+app.include_router(mcp_router(mcp_server))
+instrument_app(app, "jira-mcp")
 
 @app.get("/health")
 async def health():
     return {"status": "healthy", "service": "jira-mcp"}
 
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="127.0.0.1", port=8003)
\ No newline at end of file
+    if "--stdio" in sys.argv:
+        run_stdio(mcp_server)
+    else:
+        import uvicorn
+        uvicorn.run(app, host="127.0.0.1", port=8003)
@@ -1,49 +1,104 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import APIRouter, FastAPI, HTTPException
 from pydantic import BaseModel
 from typing import Optional
-import requests
 import os
+import logging
 from dotenv import load_dotenv
+import sys
+from pathlib import Path
 
+# Allow running as `python mcp/notion_server.py` from the project root
+sys.path.append(str(Path(__file__).parent.parent))
+# Before the project imports: core.tracing and mcp.shared read their settings on import
 load_dotenv()
 
-app = FastAPI(title="Notion MCP Server")
+from core.tracing import instrument_app, span
+from mcp.protocol import MCPServer, mcp_router, run_stdio
+from mcp.shared import http, limiters, notion_schemas
+
+logger = logging.getLogger("notion-mcp")
+
+NOTION_API_BASE_URL = os.getenv("NOTION_API_BASE_URL", "https://api.notion.com/v1")
+
+# Mounted by this server's own app below and by the combined gateway (mcp/gateway.py)
+router = APIRouter()
 
 class NotionCreateTask(BaseModel):
+    # Integration token of the calling tenant; NOTION_TOKEN when omitted
+    token: Optional[str] = None
     database_id: str
     title: str
     body: str
     due_date: Optional[str] = None
     assignee: Optional[str] = None
+    # Notion user ID of the assignee, set on the database's people property if it has one
+    assignee_user_id: Optional[str] = None
+
+class NotionUpdateTask(BaseModel):
+    token: Optional[str] = None
+    page_id: str
+    database_id: str
+    title: str
+    # Replaces the text of the page's first paragraph when given
+    body: Optional[str] = None
+    # An explicit null clears the due date; leaving it out keeps it
+    due_date: Optional[str] = None
+    assignee: Optional[str] = None
+    assignee_user_id: Optional[str] = None
+
+class NotionArchiveTask(BaseModel):
+    token: Optional[str] = None
+    page_id: str
+
+class NotionListUsers(BaseModel):
+    token: Optional[str] = None
+    page_size: int = 100
+
+class NotionQueryChanges(BaseModel):
+    token: Optional[str] = None
+    database_id: str
+    # ISO 8601 timestamp; pages edited at or after it are returned, oldest first
+    since: str
+    page_size: int = 100
+
+# Status or checkbox values that mean a task is finished
+DONE_STATUSES = {"done", "complete", "completed", "closed", "resolved"}
 
-@app.post("/notion_create_task")
-async def notion_create_task(request: NotionCreateTask):
-    token = os.getenv("NOTION_TOKEN")
+def _notion_headers(token: Optional[str] = None) -> dict:
+    token = token or os.getenv("NOTION_TOKEN")
     if not token:
         raise HTTPException(status_code=400, detail="NOTION_TOKEN not configured")
     
-    url = "https://api.notion.com/v1/pages"
-    headers = {
+    return {
         "Authorization": f"Bearer {token}",
         "Content-Type": "application/json",
         "Notion-Version": "2022-06-28"
     }
+
+def _database_properties(database_id: str, headers: dict) -> Optional[dict]:
+    """Property schema of a database, or None if it could not be retrieved"""
+    limiters["notion"].acquire()
+    with span("notion.databases.retrieve", kind='client') as call:
+        db_response = http.get(f"{NOTION_API_BASE_URL}/databases/{database_id}", headers=headers)
+        call.set_attribute("http.status_code", db_response.status_code)
     
-    # Get database schema first to find the correct property names
-    db_url = f"https://api.notion.com/v1/databases/{request.database_id}"
-    db_response = requests.get(db_url, headers=headers)
+    if db_response.status_code != 200:
+        return None
+    return db_response.json().get("properties", {})
+
+def _build_properties(database_id: str, title: str, due_date: Optional[str], assignee: Optional[str], headers: dict,
+                      assignee_user_id: Optional[str] = None, clear_due_date: bool = False) -> dict:
+    # Property names come from the database schema, which is cached between tasks
+    db_properties = notion_schemas.get_or_load(database_id, lambda: _database_properties(database_id, headers))
     
     properties = {}
     
-    if db_response.status_code == 200:
-        db_info = db_response.json()
-        db_properties = db_info.get("properties", {})
-        
+    if db_properties is not None:
         # Find the title property
         for prop_name, prop_info in db_properties.items():
             if prop_info.get("type") == "title":
                 # Clean up the title - remove leading dashes and extract just the task
-                clean_title = request.title.strip()
+                clean_title = title.strip()
                 if clean_title.startswith('-'):
                     clean_title = clean_title[1:].strip()
                 
@@ -58,19 +113,19 @@ async def notion_create_task(request: NotionCreateTask):
                 }
                 break
         
-        # Add due date if provided
-        if request.due_date:
+        # Add due date if provided, or empty it
+        if due_date or clear_due_date:
             for prop_name, prop_info in db_properties.items():
                 if prop_info.get("type") == "date":
                     properties[prop_name] = {
                         "date": {
-                            "start": request.due_date
-                        }
+                            "start": due_date
+                        } if due_date else None
                     }
                     break
         
         # Add assignee if provided
-        if request.assignee:
+        if assignee:
             for prop_name, prop_info in db_properties.items():
                 prop_type = prop_info.get("type")
                 if prop_type == "rich_text" and ("assignee" in prop_name.lower() or "owner" in prop_name.lower()):
@@ -78,12 +133,19 @@ async def notion_create_task(request: NotionCreateTask):
                         "rich_text": [
                             {
                                 "text": {
-                                    "content": request.assignee
+                                    "content": assignee
                                 }
                             }
                         ]
                     }
                     break
+        
+        if assignee_user_id:
+            people = [name for name, info in db_properties.items() if info.get("type") == "people"]
+            # Prefer a people property named like an assignee over e.g. "Reviewers"
+            named = [name for name in people if "assignee" in name.lower() or "owner" in name.lower()]
+            if named or people:
+                properties[(named or people)[0]] = {"people": [{"id": assignee_user_id}]}
     else:
         # Fallback
         properties = {
@@ -91,13 +153,24 @@ async def notion_create_task(request: NotionCreateTask):
                 "title": [
                     {
                         "text": {
-                            "content": request.title
+                            "content": title
                         }
                     }
                 ]
             }
         }
     
+    return properties
+
+@router.post("/notion_create_task")
+def notion_create_task(request: NotionCreateTask):
+    """Create a task page in a Notion database"""
+    headers = _notion_headers(request.token)
+    url = f"{NOTION_API_BASE_URL}/pages"
+    
+    properties = _build_properties(request.database_id, request.title, request.due_date, request.assignee, headers,
+                                   request.assignee_user_id)
+    
     payload = {
         "parent": {
             "database_id": request.database_id
@@ -124,31 +197,183 @@ async def notion_create_task(request: NotionCreateTask):
             }
         ]
     
+    limiters["notion"].acquire()
     try:
-        print(f"Sending payload: {payload}")
-        response = requests.post(url, json=payload, headers=headers)
-        result = response.json()
-        print(f"Response status: {response.status_code}")
-        print(f"Response body: {result}")
-        
-        if response.status_code == 200:
-            return {
-                "id": result.get("id"),
-                "url": result.get("url")
-            }
-        else:
-            error_msg = result.get("message", "Unknown error")
-            print(f"Notion API error: {error_msg}")
-            raise HTTPException(status_code=response.status_code, detail=error_msg)
+        with span("notion.pages.create", kind='client') as call:
+            response = http.post(url, json=payload, headers=headers)
+            result = response.json()
+            call.set_attribute("http.status_code", response.status_code)
+    except Exception as e:
+        logger.warning("Notion create task failed: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
     
+    if response.status_code != 200:
+        error_msg = result.get("message", "Unknown error")
+        logger.warning("Notion API error (%s): %s", response.status_code, error_msg)
+        raise HTTPException(status_code=response.status_code, detail=error_msg)
+    return {
+        "id": result.get("id"),
+        "url": result.get("url")
+    }
+
+def _patch_page(page_id: str, payload: dict, headers: dict) -> dict:
+    limiters["notion"].acquire()
+    try:
+        with span("notion.pages.update", kind='client') as call:
+            response = http.patch(f"{NOTION_API_BASE_URL}/pages/{page_id}", json=payload, headers=headers)
+            result = response.json()
+            call.set_attribute("http.status_code", response.status_code)
     except Exception as e:
-        print(f"Exception: {str(e)}")
+        logger.warning("Notion page update failed: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
+    
+    if response.status_code != 200:
+        raise HTTPException(status_code=response.status_code, detail=result.get("message", "Unknown error"))
+    return {
+        "id": result.get("id"),
+        "url": result.get("url")
+    }
+
+@router.post("/notion_update_task")
+def notion_update_task(request: NotionUpdateTask):
+    """Update the title, body, due date and assignee of a task page"""
+    headers = _notion_headers(request.token)
+    properties = _build_properties(request.database_id, request.title, request.due_date, request.assignee, headers,
+                                   request.assignee_user_id,
+                                   clear_due_date="due_date" in request.model_fields_set and not request.due_date)
+    page = _patch_page(request.page_id, {"properties": properties}, headers)
+    if request.body is not None:
+        _set_body(request.page_id, request.body, headers)
+    return page
+
+def _set_body(page_id: str, body: str, headers: dict):
+    """Rewrite the paragraph a task was created with, or add one if it has none"""
+    rich_text = [{"type": "text", "text": {"content": body}}] if body else []
+    limiters["notion"].acquire()
+    with span("notion.blocks.children.list", kind='client') as call:
+        response = http.get(f"{NOTION_API_BASE_URL}/blocks/{page_id}/children", params={"page_size": 1}, headers=headers)
+        call.set_attribute("http.status_code", response.status_code)
+    if response.status_code != 200:
+        raise HTTPException(status_code=response.status_code, detail=response.json().get("message", "Unknown error"))
+    blocks = response.json().get("results", [])
+    
+    limiters["notion"].acquire()
+    if blocks and blocks[0].get("type") == "paragraph":
+        with span("notion.blocks.update", kind='client') as call:
+            response = http.patch(f"{NOTION_API_BASE_URL}/blocks/{blocks[0]['id']}",
+                                  json={"paragraph": {"rich_text": rich_text}}, headers=headers)
+            call.set_attribute("http.status_code", response.status_code)
+    elif body:
+        with span("notion.blocks.children.append", kind='client') as call:
+            response = http.patch(f"{NOTION_API_BASE_URL}/blocks/{page_id}/children", headers=headers, json={
+                "children": [{"object": "block", "type": "paragraph", "paragraph": {"rich_text": rich_text}}]
+            })
+            call.set_attribute("http.status_code", response.status_code)
+    if response.status_code != 200:
+        raise HTTPException(status_code=response.status_code, detail=response.json().get("message", "Unknown error"))
+
+@router.post("/notion_archive_task")
+def notion_archive_task(request: NotionArchiveTask):
+    """Archive a task page"""
+    headers = _notion_headers(request.token)
+    return _patch_page(request.page_id, {"archived": True}, headers)
+
+@router.post("/notion_list_users")
+def notion_list_users(request: NotionListUsers):
+    """List the workspace's people, for resolving names to Notion user IDs"""
+    headers = _notion_headers(request.token)
+    users = []
+    cursor = None
+    while True:
+        params = {"page_size": request.page_size}
+        if cursor:
+            params["start_cursor"] = cursor
+        limiters["notion"].acquire()
+        with span("notion.users.list", kind='client') as call:
+            response = http.get(f"{NOTION_API_BASE_URL}/users", params=params, headers=headers)
+            call.set_attribute("http.status_code", response.status_code)
+        result = response.json()
+        if response.status_code != 200:
+            raise HTTPException(status_code=response.status_code, detail=result.get("message", "Unknown error"))
+        
+        for user in result.get("results", []):
+            if user.get("type") == "person":
+                users.append({
+                    "id": user["id"],
+                    "name": user.get("name"),
+                    "email": user.get("person", {}).get("email")
+                })
+        if not result.get("has_more"):
+            return {"users": users}
+        cursor = result.get("next_cursor")
+
+def _page_status(properties: dict) -> tuple:
+    """(status name, done) of a task page, from its status, select or checkbox property"""
+    for prop_type in ("status", "select"):
+        for name, value in properties.items():
+            if value.get("type") == prop_type and (prop_type == "status" or "status" in name.lower()):
+                option = value.get(prop_type) or {}
+                status = option.get("name")
+                return status, (status or "").lower() in DONE_STATUSES
+    for name, value in properties.items():
+        if value.get("type") == "checkbox":
+            done = bool(value.get("checkbox"))
+            return ("Done" if done else "Not done"), done
+    return None, False
+
+@router.post("/notion_query_changes")
+def notion_query_changes(request: NotionQueryChanges):
+    """Status of the task pages edited since a point in time"""
+    headers = _notion_headers(request.token)
+    body = {
+        "filter": {"timestamp": "last_edited_time", "last_edited_time": {"on_or_after": request.since}},
+        "sorts": [{"timestamp": "last_edited_time", "direction": "ascending"}],
+        "page_size": request.page_size
+    }
+    pages = []
+    while True:
+        limiters["notion"].acquire()
+        with span("notion.databases.query", kind='client') as call:
+            response = http.post(f"{NOTION_API_BASE_URL}/databases/{request.database_id}/query", json=body, headers=headers)
+            call.set_attribute("http.status_code", response.status_code)
+        result = response.json()
+        if response.status_code != 200:
+            raise HTTPException(status_code=response.status_code, detail=result.get("message", "Unknown error"))
+        
+        for page in result.get("results", []):
+            status, done = _page_status(page.get("properties", {}))
+            pages.append({
+                "id": page["id"],
+                "status": "Archived" if page.get("archived") else status,
+                "done": done,
+                "updated_at": page.get("last_edited_time")
+            })
+        if not result.get("has_more"):
+            return {"changes": pages}
+        body["start_cursor"] = result.get("next_cursor")
+
+# Tool name -> (handler, request model), for callers that invoke the handlers in-process
+TOOLS = {
+    "notion_create_task": (notion_create_task, NotionCreateTask),
+    "notion_update_task": (notion_update_task, NotionUpdateTask),
+    "notion_archive_task": (notion_archive_task, NotionArchiveTask),
+    "notion_list_users": (notion_list_users, NotionListUsers),
+    "notion_query_changes": (notion_query_changes, NotionQueryChanges),
+}
+
+app = FastAPI(title="Notion MCP Server")
+app.include_router(router)
+mcp_server = MCPServer("notion-mcp", TOOLS)
+app.include_router(mcp_router(mcp_server))
+instrument_app(app, "notion-mcp")
 
 @app.get("/health")
 async def health():
     return {"status": "healthy", "service": "notion-mcp"}
 
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="127.0.0.1", port=8002)
\ No newline at end of file
+    if "--stdio" in sys.argv:
+        run_stdio(mcp_server)
+    else:
+        import uvicorn
+        uvicorn.run(app, host="127.0.0.1", port=8002)
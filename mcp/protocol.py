@@ -0,0 +1,231 @@
+"""Model Context Protocol (JSON-RPC 2.0) front end for the MCP servers' tools.
+
+Every server exposes its TOOLS registry over two transports:
+
+- streamable HTTP: `POST /mcp` with a single message or a batch, answered with JSON. The
+  `initialize` response carries an `Mcp-Session-Id` header that later requests send back.
+- stdio: newline-delimited messages on stdin/stdout (`python mcp/slack_server.py --stdio`).
+
+Requests in a batch (HTTP) or arriving back to back (stdio) run concurrently, so a client can
+pipeline many tool calls over one session.
+"""
+import json
+import logging
+import sys
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel, ValidationError
+
+from core.tracing import extract, span
+
+logger = logging.getLogger("mcp-protocol")
+
+PROTOCOL_VERSION = "2025-03-26"
+SUPPORTED_VERSIONS = ("2024-11-05", "2025-03-26", "2025-06-18")
+SESSION_HEADER = "Mcp-Session-Id"
+MAX_SESSIONS = 1000
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+
+Tools = Dict[str, Tuple[Callable[[BaseModel], Dict[str, Any]], Type[BaseModel]]]
+
+class MCPServer:
+    """Dispatches JSON-RPC messages to a server's tool handlers"""
+
+    def __init__(self, name: str, tools: Tools, version: str = "1.0.0", workers: int = 8):
+        self.name = name
+        self.version = version
+        self.tools = tools
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"{name}-rpc")
+        self.sessions: "OrderedDict[str, bool]" = OrderedDict()
+        self.sessions_lock = threading.Lock()
+
+    def handle(self, message: Any) -> Optional[Dict[str, Any]]:
+        """Answer one message; notifications (no id) get no response"""
+        if not isinstance(message, dict) or message.get("jsonrpc") != "2.0" or "method" not in message:
+            return _error(None, INVALID_REQUEST, "Invalid JSON-RPC request")
+        request_id = message.get("id")
+        is_notification = "id" not in message
+        try:
+            result = self._dispatch(message["method"], message.get("params") or {})
+        except _RPCError as e:
+            return None if is_notification else _error(request_id, e.code, e.message)
+        except Exception as e:
+            logger.exception("MCP method %s failed", message["method"])
+            return None if is_notification else _error(request_id, INTERNAL_ERROR, str(e))
+        return None if is_notification else {"jsonrpc": "2.0", "id": request_id, "result": result}
+
+    def handle_batch(self, messages: List[Any]) -> List[Dict[str, Any]]:
+        responses = self.executor.map(self.handle, messages)
+        return [response for response in responses if response is not None]
+
+    def _dispatch(self, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        if method == "initialize":
+            requested = params.get("protocolVersion")
+            return {
+                "protocolVersion": requested if requested in SUPPORTED_VERSIONS else PROTOCOL_VERSION,
+                "capabilities": {"tools": {"listChanged": False}},
+                "serverInfo": {"name": self.name, "version": self.version}
+            }
+        if method == "ping" or method.startswith("notifications/"):
+            return {}
+        if method == "tools/list":
+            return {"tools": [
+                {
+                    "name": name,
+                    "description": (handler.__doc__ or name).strip(),
+                    "inputSchema": model.model_json_schema()
+                }
+                for name, (handler, model) in self.tools.items()
+            ]}
+        if method == "tools/call":
+            return self._call_tool(params)
+        raise _RPCError(METHOD_NOT_FOUND, f"Method not found: {method}")
+
+    def _call_tool(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        name = params.get("name")
+        if name not in self.tools:
+            raise _RPCError(INVALID_PARAMS, f"Unknown tool: {name}")
+        handler, model = self.tools[name]
+        try:
+            request = model(**(params.get("arguments") or {}))
+        except ValidationError as e:
+            raise _RPCError(INVALID_PARAMS, str(e))
+
+        # Callers pass their trace context in _meta, the JSON-RPC counterpart of traceparent
+        with span(f"tools/call {name}", parent=extract(params.get("_meta") or {}), kind='server') as call:
+            try:
+                result = handler(request)
+            except HTTPException as e:
+                # Tool failures are results, not protocol errors; _meta keeps the HTTP status so
+                # clients can tell a rejected request from an outage, as over REST
+                call.set_error(str(e.detail))
+                return {"content": [{"type": "text", "text": str(e.detail)}], "isError": True,
+                        "_meta": {"status_code": e.status_code}}
+        return {
+            "content": [{"type": "text", "text": json.dumps(result)}],
+            "structuredContent": result,
+            "isError": False
+        }
+
+    def open_session(self) -> str:
+        session_id = uuid.uuid4().hex
+        with self.sessions_lock:
+            self.sessions[session_id] = True
+            while len(self.sessions) > MAX_SESSIONS:
+                self.sessions.popitem(last=False)
+        return session_id
+
+    def has_session(self, session_id: str) -> bool:
+        with self.sessions_lock:
+            return session_id in self.sessions
+
+    def close_session(self, session_id: str):
+        with self.sessions_lock:
+            self.sessions.pop(session_id, None)
+
+class _RPCError(Exception):
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+def _error(request_id: Any, code: int, message: str) -> Dict[str, Any]:
+    return {"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": message}}
+
+def _is_initialize(payload: Any) -> bool:
+    messages = payload if isinstance(payload, list) else [payload]
+    return any(isinstance(m, dict) and m.get("method") == "initialize" for m in messages)
+
+def mcp_router(server: MCPServer) -> APIRouter:
+    """Streamable HTTP endpoint for `server` at /mcp"""
+    router = APIRouter()
+
+    @router.post("/mcp")
+    async def receive(request: Request):
+        # Accepts a single message or a batch, so the body is parsed by hand rather than by a model
+        try:
+            payload = json.loads(await request.body())
+        except ValueError:
+            return JSONResponse(_error(None, PARSE_ERROR, "Parse error"), status_code=400)
+
+        session_id = request.headers.get(SESSION_HEADER)
+        headers = {}
+        if _is_initialize(payload):
+            session_id = server.open_session()
+            headers[SESSION_HEADER] = session_id
+        elif not session_id:
+            return JSONResponse(_error(None, INVALID_REQUEST, f"Missing {SESSION_HEADER} header"), status_code=400)
+        elif not server.has_session(session_id):
+            return JSONResponse(_error(None, INVALID_REQUEST, "Unknown session"), status_code=404)
+
+        if isinstance(payload, list):
+            responses = await run_in_threadpool(server.handle_batch, payload)
+        else:
+            response = await run_in_threadpool(server.handle, payload)
+            responses = response if response is not None else []
+        if not responses:
+            # Only notifications or responses were sent
+            return Response(status_code=202, headers=headers)
+        return JSONResponse(responses, headers=headers)
+
+    @router.get("/mcp")
+    async def stream():
+        # No server-initiated messages, so there is no SSE stream to open
+        return Response(status_code=405, headers={"Allow": "POST, DELETE"})
+
+    @router.delete("/mcp")
+    async def end_session(request: Request):
+        server.close_session(request.headers.get(SESSION_HEADER, ""))
+        return Response(status_code=204)
+
+    return router
+
+def run_stdio(server: MCPServer):
+    """Serve newline-delimited JSON-RPC on stdin/stdout until stdin closes"""
+    out_lock = threading.Lock()
+    stdout = sys.stdout
+    # Anything else printing to stdout would corrupt the protocol stream
+    sys.stdout = sys.stderr
+
+    def write(response: Any):
+        with out_lock:
+            stdout.write(json.dumps(response) + "\n")
+            stdout.flush()
+
+    def respond(message: Any):
+        response = server.handle(message)
+        if response is not None:
+            write(response)
+
+    def respond_batch(messages: List[Any]):
+        responses = server.handle_batch(messages)
+        if responses:
+            write(responses)
+
+    logger.info("%s serving MCP on stdio", server.name)
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        try:
+            message = json.loads(line)
+        except ValueError:
+            write(_error(None, PARSE_ERROR, "Parse error"))
+            continue
+        if isinstance(message, list):
+            # handle_batch fans out on the executor itself, so it must not run on it
+            threading.Thread(target=respond_batch, args=(message,), daemon=True).start()
+        else:
+            server.executor.submit(respond, message)
+    server.executor.shutdown(wait=True)
@@ -0,0 +1,72 @@
+"""Connection pool, caches and rate limiters shared by the MCP servers.
+
+When the servers run as separate processes each gets its own copy; inside the gateway
+(mcp/gateway.py) all three share them.
+"""
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+POOL_SIZE = int(os.getenv("MCP_HTTP_POOL_SIZE", "32"))
+
+# Keep-alive connections to the SaaS APIs, reused across requests and services
+http = requests.Session()
+http.mount("https://", HTTPAdapter(pool_connections=8, pool_maxsize=POOL_SIZE))
+http.mount("http://", HTTPAdapter(pool_connections=8, pool_maxsize=POOL_SIZE))
+
+class RateLimiter:
+    """Blocking token bucket: waits for capacity instead of letting the API answer 429"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+class TTLCache:
+    def __init__(self, ttl_seconds: float):
+        self.ttl = ttl_seconds
+        self.entries: Dict[Any, Tuple[float, Any]] = {}
+        self.lock = threading.Lock()
+
+    def get_or_load(self, key: Any, load: Callable[[], Any]) -> Any:
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and entry[0] > now:
+                return entry[1]
+        value = load()
+        if value is not None:
+            with self.lock:
+                self.entries[key] = (now + self.ttl, value)
+        return value
+
+# Defaults follow the documented API limits: Slack ~1 message/s per channel with short
+# bursts, Notion ~3 requests/s per integration. A rate of 0 disables a limiter.
+limiters = {
+    "slack": RateLimiter(float(os.getenv("SLACK_RATE_LIMIT", "1")), int(os.getenv("SLACK_RATE_BURST", "20"))),
+    "notion": RateLimiter(float(os.getenv("NOTION_RATE_LIMIT", "3")), int(os.getenv("NOTION_RATE_BURST", "10"))),
+    "jira": RateLimiter(float(os.getenv("JIRA_RATE_LIMIT", "10")), int(os.getenv("JIRA_RATE_BURST", "20"))),
+}
+
+# Notion database schemas, looked up before every page create/update
+notion_schemas = TTLCache(float(os.getenv("NOTION_SCHEMA_TTL", "300")))
@@ -1,31 +1,83 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import APIRouter, FastAPI, HTTPException
 from pydantic import BaseModel
-from typing import Optional
-import requests
+from typing import Any, Dict, List, Optional
 import os
+import logging
 from dotenv import load_dotenv
+import sys
+from pathlib import Path
 
+# Allow running as `python mcp/slack_server.py` from the project root
+sys.path.append(str(Path(__file__).parent.parent))
+# Before the project imports: core.tracing and mcp.shared read their settings on import
 load_dotenv()
 
-app = FastAPI(title="Slack MCP Server")
+from core.tracing import instrument_app, span
+from mcp.protocol import MCPServer, mcp_router, run_stdio
+from mcp.shared import http, limiters
+
+logger = logging.getLogger("slack-mcp")
+
+SLACK_API_BASE_URL = os.getenv("SLACK_API_BASE_URL", "https://slack.com/api")
+
+# Mounted by this server's own app below and by the combined gateway (mcp/gateway.py).
+# Handlers are plain functions: they block on the Slack API, so FastAPI runs them in its
+# threadpool instead of on the event loop.
+router = APIRouter()
 
 class SlackPostMessage(BaseModel):
+    # Bot token of the calling tenant; SLACK_BOT_TOKEN when omitted
+    token: Optional[str] = None
     channel: str
+    # With blocks, text is the notification/fallback text
     text: str
     thread_ts: Optional[str] = None
+    blocks: Optional[List[Dict[str, Any]]] = None
+
+class SlackUpdateMessage(BaseModel):
+    token: Optional[str] = None
+    channel: str
+    ts: str
+    text: str
+    blocks: Optional[List[Dict[str, Any]]] = None
+
+class SlackDeleteMessage(BaseModel):
+    token: Optional[str] = None
+    channel: str
+    ts: str
+
+class SlackListUsers(BaseModel):
+    token: Optional[str] = None
+    page_size: int = 200
 
-@app.post("/slack_post_message")
-async def slack_post_message(request: SlackPostMessage):
-    token = os.getenv("SLACK_BOT_TOKEN")
+def _call_slack(method: str, payload: dict, form: bool = False, token: Optional[str] = None) -> dict:
+    token = token or os.getenv("SLACK_BOT_TOKEN")
     if not token:
         raise HTTPException(status_code=400, detail="SLACK_BOT_TOKEN not configured")
     
-    url = "https://slack.com/api/chat.postMessage"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json"
-    }
-    
+    headers = {"Authorization": f"Bearer {token}"}
+    # Read methods such as users.list only accept form-encoded arguments
+    body = {"data": payload} if form else {"json": payload}
+    limiters["slack"].acquire()
+    with span(f"slack.{method}", kind='client') as call:
+        try:
+            response = http.post(f"{SLACK_API_BASE_URL}/{method}", headers=headers, **body)
+            result = response.json()
+        except Exception as e:
+            logger.warning("Slack %s failed: %s", method, e)
+            raise HTTPException(status_code=500, detail=str(e))
+        
+        call.set_attribute("http.status_code", response.status_code)
+        if not result.get("ok"):
+            error_msg = result.get("error", "Unknown error")
+            call.set_error(error_msg)
+            logger.warning("Slack API error from %s: %s", method, error_msg)
+            raise HTTPException(status_code=400, detail=error_msg)
+        return result
+
+@router.post("/slack_post_message")
+def slack_post_message(request: SlackPostMessage):
+    """Post a message to a Slack channel, optionally as a reply in a thread"""
     payload = {
         "channel": request.channel,
         "text": request.text
@@ -33,33 +85,83 @@ async def slack_post_message(request: SlackPostMessage):
     
     if request.thread_ts:
         payload["thread_ts"] = request.thread_ts
+    if request.blocks:
+        payload["blocks"] = request.blocks
     
-    try:
-        print(f"Sending to Slack: {payload}")
-        response = requests.post(url, json=payload, headers=headers)
-        result = response.json()
-        print(f"Slack response status: {response.status_code}")
-        print(f"Slack response: {result}")
-        
-        if result.get("ok"):
-            return {
-                "ok": True,
-                "ts": result.get("ts"),
-                "permalink": f"https://slack.com/archives/{request.channel}/p{result.get('ts', '').replace('.', '')}"
-            }
-        else:
-            error_msg = result.get("error", "Unknown error")
-            print(f"Slack API error: {error_msg}")
-            raise HTTPException(status_code=400, detail=error_msg)
-    
-    except Exception as e:
-        print(f"Slack exception: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+    result = _call_slack("chat.postMessage", payload, token=request.token)
+    return {
+        "ok": True,
+        "ts": result.get("ts"),
+        "channel": result.get("channel"),
+        "permalink": f"https://slack.com/archives/{request.channel}/p{result.get('ts', '').replace('.', '')}"
+    }
+
+@router.post("/slack_update_message")
+def slack_update_message(request: SlackUpdateMessage):
+    """Replace the text of a message posted earlier"""
+    # chat.update needs the channel ID returned by chat.postMessage, not the channel name
+    payload = {
+        "channel": request.channel,
+        "ts": request.ts,
+        "text": request.text
+    }
+    if request.blocks is not None:
+        payload["blocks"] = request.blocks
+    result = _call_slack("chat.update", payload, token=request.token)
+    return {"ok": True, "ts": result.get("ts"), "channel": result.get("channel")}
+
+@router.post("/slack_delete_message")
+def slack_delete_message(request: SlackDeleteMessage):
+    """Delete a message posted earlier"""
+    _call_slack("chat.delete", {"channel": request.channel, "ts": request.ts}, token=request.token)
+    return {"ok": True, "ts": request.ts}
+
+@router.post("/slack_list_users")
+def slack_list_users(request: SlackListUsers):
+    """List the workspace's active human users, for resolving names to user IDs"""
+    users = []
+    cursor = None
+    while True:
+        payload = {"limit": request.page_size}
+        if cursor:
+            payload["cursor"] = cursor
+        result = _call_slack("users.list", payload, form=True, token=request.token)
+        for member in result.get("members", []):
+            if member.get("deleted") or member.get("is_bot") or member.get("id") == "USLACKBOT":
+                continue
+            profile = member.get("profile", {})
+            users.append({
+                "id": member["id"],
+                "name": member.get("name"),
+                "real_name": profile.get("real_name") or member.get("real_name"),
+                "display_name": profile.get("display_name"),
+                "email": profile.get("email")
+            })
+        cursor = result.get("response_metadata", {}).get("next_cursor")
+        if not cursor:
+            return {"users": users}
+
+# Tool name -> (handler, request model), for callers that invoke the handlers in-process
+TOOLS = {
+    "slack_post_message": (slack_post_message, SlackPostMessage),
+    "slack_update_message": (slack_update_message, SlackUpdateMessage),
+    "slack_delete_message": (slack_delete_message, SlackDeleteMessage),
+    "slack_list_users": (slack_list_users, SlackListUsers),
+}
+
+app = FastAPI(title="Slack MCP Server")
+app.include_router(router)
+mcp_server = MCPServer("slack-mcp", TOOLS)
+app.include_router(mcp_router(mcp_server))
+instrument_app(app, "slack-mcp")
 
 @app.get("/health")
 async def health():
     return {"status": "healthy", "service": "slack-mcp"}
 
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="127.0.0.1", port=8001)
\ No newline at end of file
+    if "--stdio" in sys.argv:
+        run_stdio(mcp_server)
+    else:
+        import uvicorn
+        uvicorn.run(app, host="127.0.0.1", port=8001)
@@ -2,6 +2,15 @@
 echo Starting FollowUpSync in Local Mode...
 echo.
 
+if "%1"=="--gateway" (
+    echo Starting MCP gateway...
+    start "MCP Gateway" cmd /k "python mcp/gateway.py"
+    set MCP_SLACK_URL=http://localhost:8000
+    set MCP_NOTION_URL=http://localhost:8000
+    set MCP_JIRA_URL=http://localhost:8000
+    goto wait_for_mcp
+)
+
 echo Starting MCP servers...
 start "Slack MCP" cmd /k "python mcp/slack_server.py"
 timeout /t 2 /nobreak >nul
@@ -12,6 +21,7 @@ timeout /t 2 /nobreak >nul
 start "Jira MCP" cmd /k "python mcp/jira_server.py"
 timeout /t 2 /nobreak >nul
 
+:wait_for_mcp
 echo Waiting for MCP servers to start...
 timeout /t 5 /nobreak >nul
 
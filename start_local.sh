@@ -3,21 +3,31 @@
 echo "Starting FollowUpSync in Local Mode..."
 echo
 
-echo "Starting MCP servers..."
-python mcp/slack_server.py &
-SLACK_PID=$!
+if [ "$1" = "--gateway" ]; then
+    echo "Starting MCP gateway..."
+    python mcp/gateway.py &
+    MCP_PIDS=$!
+    export MCP_SLACK_URL=http://localhost:8000
+    export MCP_NOTION_URL=http://localhost:8000
+    export MCP_JIRA_URL=http://localhost:8000
+else
+    echo "Starting MCP servers..."
+    python mcp/slack_server.py &
+    SLACK_PID=$!
 
-python mcp/notion_server.py &
-NOTION_PID=$!
+    python mcp/notion_server.py &
+    NOTION_PID=$!
 
-python mcp/jira_server.py &
-JIRA_PID=$!
+    python mcp/jira_server.py &
+    JIRA_PID=$!
+    MCP_PIDS="$SLACK_PID $NOTION_PID $JIRA_PID"
+fi
+
+# Cleanup on exit
+trap "kill $MCP_PIDS" EXIT
 
 echo "Waiting for MCP servers to start..."
 sleep 5
 
 echo "Starting Streamlit app..."
 streamlit run app/streamlit_app.py
-
-# Cleanup on exit
-trap "kill $SLACK_PID $NOTION_PID $JIRA_PID" EXIT
\ No newline at end of file